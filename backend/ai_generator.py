@@ -1,9 +1,66 @@
+import asyncio
+import contextvars
 import os
-from typing import List, Optional
+import threading
+import time
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
 
 from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
 from langchain_openai import ChatOpenAI
 
+# The tool call running in the current thread, if any (see ToolCall)
+current_tool_call: contextvars.ContextVar[Optional["ToolCall"]] = (
+    contextvars.ContextVar("current_tool_call", default=None)
+)
+
+
+class ToolCall:
+    """
+    One tool call of a model turn, run on an executor thread.
+
+    Threads cannot be stopped, so a call that times out is abandoned instead:
+    if it has not started it is skipped, and whatever it later tries to record
+    (sources in a RequestContext check claim()) is dropped. Abandoning fails
+    once the call has recorded its results, which are then as good as in.
+    """
+
+    def __init__(self, on_start: Optional[Callable[[], None]] = None):
+        self.started = threading.Event()
+        self.started_at: Optional[float] = None
+        self._on_start = on_start
+        self._lock = threading.Lock()
+        self._abandoned = False
+        self._claimed = False
+
+    def run(self, function: Callable, *args, **kwargs):
+        with self._lock:
+            if self._abandoned:
+                return None  # Given up on before it started
+            self.started_at = time.monotonic()
+        self.started.set()
+        if self._on_start is not None:
+            self._on_start()
+        token = current_tool_call.set(self)
+        try:
+            return function(*args, **kwargs)
+        finally:
+            current_tool_call.reset(token)
+
+    def claim(self) -> bool:
+        """Whether the call may record its results, i.e. was not abandoned"""
+        with self._lock:
+            if not self._abandoned:
+                self._claimed = True
+            return not self._abandoned
+
+    def abandon(self) -> bool:
+        """Drop the call's results; False if it has already recorded them"""
+        with self._lock:
+            if not self._claimed:
+                self._abandoned = True
+            return self._abandoned
+
 
 class AIGenerator:
     """Handles interactions with Perplexity for generating responses."""
@@ -32,8 +89,11 @@ class AIGenerator:
         "Provide only the direct answer to what was asked."
     )
 
-    def __init__(self, model: str = "llama-3.1-sonar-hybrid"):
+    def __init__(
+        self, model: str = "llama-3.1-sonar-hybrid", tool_timeout: float = 10.0
+    ):
         self.model = model
+        self.tool_timeout = tool_timeout  # Seconds allowed per tool call
         api_key = os.getenv("PERPLEXITY_API_KEY") or os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise ValueError(
@@ -47,22 +107,60 @@ class AIGenerator:
             base_url="https://api.perplexity.ai",
         )
 
+    def _build_messages(self, query: str, conversation_history: Optional[str]) -> List:
+        """Build the initial message list for a query."""
+        messages = [SystemMessage(content=self.SYSTEM_PROMPT)]
+        if conversation_history:
+            messages.append(
+                HumanMessage(content=f"Previous conversation:\n{conversation_history}")
+            )
+
+        messages.append(HumanMessage(content=query))
+        return messages
+
+    @staticmethod
+    def _parse_tool_call(tool_call) -> Tuple[Optional[str], Dict[str, Any], str]:
+        """Extract (name, args, id) from a dict or object tool call."""
+        if isinstance(tool_call, dict):
+            return (
+                tool_call.get("name"),
+                tool_call.get("args", {}),
+                tool_call.get("id", ""),
+            )
+        return (
+            getattr(tool_call, "name", None),
+            getattr(tool_call, "args", {}) or {},
+            getattr(tool_call, "id", ""),
+        )
+
+    @staticmethod
+    def _append_tool_results(messages: List, response, tool_results: List[Dict]):
+        """Append the tool-calling turn and its results to the message list."""
+        messages.append(response)
+        for tool_result in tool_results:
+            messages.append(
+                AIMessage(
+                    content=str(tool_result["content"]),
+                    tool_call_id=tool_result["tool_call_id"],
+                )
+            )
+
     def generate_response(
         self,
         query: str,
         conversation_history: Optional[str] = None,
         tools: Optional[List] = None,
         tool_manager=None,
+        executor=None,
     ) -> str:
-        """Generate an AI response with optional tool usage and context."""
+        """
+        Generate an AI response with optional tool usage and context.
 
-        messages = [SystemMessage(content=self.SYSTEM_PROMPT)]
-        if conversation_history:
-            messages.append(
-                HumanMessage(content=f"Previous conversation:\n{conversation_history}")
-            )
+        Several tool calls from one model turn run concurrently on the executor
+        when one is given, and one after another otherwise.
+        """
 
-        messages.append(HumanMessage(content=query))
+        messages = self._build_messages(query, conversation_history)
 
         response = (
             self.llm.bind_tools(tools).invoke(messages)
@@ -71,39 +169,257 @@ class AIGenerator:
         )
 
         if hasattr(response, "tool_calls") and response.tool_calls and tool_manager:
+            tool_results = self._execute_tool_calls(response, tool_manager, executor)
+            self._append_tool_results(messages, response, tool_results)
+
+            final_response = self.llm.invoke(messages)
+            return getattr(final_response, "content", final_response)
+
+        return getattr(response, "content", response)
+
+    def _tool_error(self, tool_name: str, error: BaseException) -> str:
+        """Tool result text for a call that failed or timed out."""
+        if isinstance(error, (TimeoutError, asyncio.TimeoutError)):
+            return f"Tool '{tool_name}' timed out after {self.tool_timeout:g}s"
+        return f"Tool '{tool_name}' failed: {error}"
+
+    @staticmethod
+    def _tool_result(call_id: str, tool_name: str, content) -> Dict:
+        return {"tool_call_id": call_id, "name": tool_name, "content": content}
+
+    def _valid_tool_calls(self, response) -> List[Tuple[str, Dict[str, Any], str]]:
+        """Parsed (name, args, id) of the response's tool calls that have a name."""
+        parsed = [self._parse_tool_call(tool_call) for tool_call in response.tool_calls]
+        return [call for call in parsed if call[0]]
+
+    def _execute_tool_calls(self, response, tool_manager, executor=None) -> List[Dict]:
+        """
+        Run the response's tool calls and collect results in call order.
+
+        With an executor the calls run concurrently, each allowed tool_timeout
+        seconds from when it starts running (and as long again to get a
+        thread). A call that raises or times out yields an error message as
+        its result instead of failing the whole turn; a timed-out call's
+        results are dropped (see ToolCall). Without an executor the calls run
+        one after another on the calling thread, with no timeout.
+        """
+        calls = self._valid_tool_calls(response)
+        if executor is None:
             tool_results = []
-            for tool_call in response.tool_calls:
-                if isinstance(tool_call, dict):
-                    tool_name = tool_call.get("name")
-                    tool_args = tool_call.get("args", {})
-                    call_id = tool_call.get("id", "")
-                else:
-                    tool_name = getattr(tool_call, "name", None)
-                    tool_args = getattr(tool_call, "args", {}) or {}
-                    call_id = getattr(tool_call, "id", "")
-
-                if not tool_name:
-                    continue
-
-                tool_result = tool_manager.execute_tool(tool_name, **tool_args)
-                tool_results.append(
-                    {
-                        "tool_call_id": call_id,
-                        "name": tool_name,
-                        "content": tool_result,
-                    }
-                )
+            for tool_name, tool_args, call_id in calls:
+                try:
+                    content = tool_manager.execute_tool(tool_name, **tool_args)
+                except Exception as e:
+                    content = self._tool_error(tool_name, e)
+                tool_results.append(self._tool_result(call_id, tool_name, content))
+            return tool_results
 
-            messages.append(response)
-            for tool_result in tool_results:
-                messages.append(
-                    AIMessage(
-                        content=str(tool_result["content"]),
-                        tool_call_id=tool_result["tool_call_id"],
-                    )
-                )
+        tool_calls = [ToolCall() for _ in calls]
+        futures = [
+            executor.submit(
+                tool_call.run, tool_manager.execute_tool, tool_name, **tool_args
+            )
+            for (tool_name, tool_args, _), tool_call in zip(calls, tool_calls)
+        ]
+        tool_results = []
+        for (tool_name, _, call_id), tool_call, future in zip(
+            calls, tool_calls, futures
+        ):
+            try:
+                content = self._wait_for_tool_call(tool_call, future)
+            except Exception as e:
+                content = self._tool_error(tool_name, e)
+            tool_results.append(self._tool_result(call_id, tool_name, content))
+        return tool_results
 
-            final_response = self.llm.invoke(messages)
+    def _wait_for_tool_call(self, tool_call: ToolCall, future):
+        """A tool call's result, or TimeoutError once it is abandoned"""
+        if tool_call.started.wait(self.tool_timeout):
+            remaining = tool_call.started_at + self.tool_timeout - time.monotonic()
+            try:
+                return future.result(timeout=max(0.0, remaining))
+            except TimeoutError:
+                pass
+        if tool_call.abandon():
+            raise TimeoutError
+        return future.result()  # It recorded its results, so it is finishing
+
+    async def _await_tool_call(
+        self, tool_call: ToolCall, started: asyncio.Event, future
+    ):
+        """Async variant of _wait_for_tool_call"""
+        try:
+            await asyncio.wait_for(started.wait(), self.tool_timeout)
+            remaining = tool_call.started_at + self.tool_timeout - time.monotonic()
+            return await asyncio.wait_for(asyncio.shield(future), max(0.0, remaining))
+        except TimeoutError:
+            if tool_call.abandon():
+                raise
+        return await future
+
+    async def _aexecute_tool_calls(
+        self, response, tool_manager, executor=None
+    ) -> List[Dict]:
+        """
+        Run the response's tool calls concurrently on the executor.
+
+        Results come back in call order; each call is bounded by tool_timeout
+        as in _execute_tool_calls, and a failing call yields an error message
+        instead of raising.
+        """
+        loop = asyncio.get_running_loop()
+        calls = self._valid_tool_calls(response)
+        waits = []
+        for tool_name, tool_args, _ in calls:
+            started = asyncio.Event()
+            tool_call = ToolCall(
+                on_start=partial(loop.call_soon_threadsafe, started.set)
+            )
+            future = loop.run_in_executor(
+                executor,
+                partial(
+                    tool_call.run, tool_manager.execute_tool, tool_name, **tool_args
+                ),
+            )
+            waits.append(self._await_tool_call(tool_call, started, future))
+        outcomes = await asyncio.gather(*waits, return_exceptions=True)
+        return [
+            self._tool_result(
+                call_id,
+                tool_name,
+                (
+                    self._tool_error(tool_name, outcome)
+                    if isinstance(outcome, BaseException)
+                    else outcome
+                ),
+            )
+            for (tool_name, _, call_id), outcome in zip(calls, outcomes)
+        ]
+
+    async def agenerate_response(
+        self,
+        query: str,
+        conversation_history: Optional[str] = None,
+        tools: Optional[List] = None,
+        tool_manager=None,
+        executor=None,
+    ) -> str:
+        """
+        Async variant of generate_response.
+
+        LLM round-trips use the client's async API, and tool execution (embedding
+        and ChromaDB queries) runs on the given executor so the event loop is
+        never blocked.
+        """
+
+        messages = self._build_messages(query, conversation_history)
+
+        response = await (
+            self.llm.bind_tools(tools).ainvoke(messages)
+            if tools
+            else self.llm.ainvoke(messages)
+        )
+
+        if hasattr(response, "tool_calls") and response.tool_calls and tool_manager:
+            tool_results = await self._aexecute_tool_calls(
+                response, tool_manager, executor
+            )
+            self._append_tool_results(messages, response, tool_results)
+
+            final_response = await self.llm.ainvoke(messages)
             return getattr(final_response, "content", final_response)
 
         return getattr(response, "content", response)
+
+    @staticmethod
+    def _with_context(query: str, context: str) -> str:
+        """Append retrieved course material to a query prompt."""
+        if not context:
+            return f"{query}\n\nNo relevant course material was found."
+        return f"{query}\n\nRelevant course material:\n{context}"
+
+    def generate_with_context(
+        self,
+        query: str,
+        context: str,
+        conversation_history: Optional[str] = None,
+    ) -> str:
+        """Answer from already retrieved course material in a single LLM call."""
+        messages = self._build_messages(
+            self._with_context(query, context), conversation_history
+        )
+        response = self.llm.invoke(messages)
+        return getattr(response, "content", response)
+
+    async def agenerate_with_context(
+        self,
+        query: str,
+        context: str,
+        conversation_history: Optional[str] = None,
+    ) -> str:
+        """
+        Answer from already retrieved course material in a single LLM call.
+
+        Used when retrieval happened up front (e.g. for a batch of queries), so
+        the tool-deciding round-trip is skipped.
+        """
+        messages = self._build_messages(
+            self._with_context(query, context), conversation_history
+        )
+        response = await self.llm.ainvoke(messages)
+        return getattr(response, "content", response)
+
+    async def astream_with_context(
+        self,
+        query: str,
+        context: str,
+        conversation_history: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        """Stream an answer from already retrieved course material."""
+        messages = self._build_messages(
+            self._with_context(query, context), conversation_history
+        )
+        async for chunk in self.llm.astream(messages):
+            token = getattr(chunk, "content", chunk)
+            if token:
+                yield token
+
+    async def astream_response(
+        self,
+        query: str,
+        conversation_history: Optional[str] = None,
+        tools: Optional[List] = None,
+        tool_manager=None,
+        executor=None,
+    ) -> AsyncIterator[str]:
+        """
+        Stream the answer as text tokens.
+
+        The tool-deciding call is not streamed; once any tool results are in,
+        tokens of the final call are yielded as the LLM produces them. A direct
+        answer without tool use is yielded as a single token.
+        """
+
+        messages = self._build_messages(query, conversation_history)
+
+        response = await (
+            self.llm.bind_tools(tools).ainvoke(messages)
+            if tools
+            else self.llm.ainvoke(messages)
+        )
+
+        if hasattr(response, "tool_calls") and response.tool_calls and tool_manager:
+            tool_results = await self._aexecute_tool_calls(
+                response, tool_manager, executor
+            )
+            self._append_tool_results(messages, response, tool_results)
+
+            async for chunk in self.llm.astream(messages):
+                token = getattr(chunk, "content", chunk)
+                if token:
+                    yield token
+            return
+
+        content = getattr(response, "content", response)
+        if content:
+            yield content
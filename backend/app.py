@@ -1,16 +1,22 @@
+import asyncio
+import json
 import os
+import threading
+import time
 import warnings
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 
 from .config import config
-from .rag_system import RAGSystem
+from .ingestion_lock import IngestionInProgress
+from .readiness import Readiness
 
 warnings.filterwarnings("ignore", message="resource_tracker: There appear to be.*")
 
@@ -30,8 +36,10 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
-# Initialize RAG system
-rag_system = RAGSystem(config)
+# The RAG system (embedding model, vector store, LLM client) is built in a
+# background thread at startup so the server can accept connections at once
+rag_system = None
+readiness = Readiness()
 
 
 # Pydantic models for request/response
@@ -40,16 +48,38 @@ class QueryRequest(BaseModel):
 
     query: str
     session_id: Optional[str] = None
+    use_cache: bool = True  # Allow answering standalone questions from cache
 
 
 class QueryResponse(BaseModel):
     """Response model for course queries"""
 
     answer: str
-    sources: List[str]
+    sources: List[Dict[str, Any]]
     session_id: str
 
 
+class BatchQueryRequest(BaseModel):
+    """Request model for answering many standalone questions at once"""
+
+    queries: List[str]
+    use_cache: bool = True
+
+
+class BatchQueryResult(BaseModel):
+    """One answer of a batch; error is set instead of answer if it failed"""
+
+    answer: Optional[str] = None
+    sources: List[Dict[str, Any]] = []
+    error: Optional[str] = None
+
+
+class BatchQueryResponse(BaseModel):
+    """Response model for batch queries, in request order"""
+
+    results: List[BatchQueryResult]
+
+
 class CourseStats(BaseModel):
     """Response model for course statistics"""
 
@@ -60,17 +90,48 @@ class CourseStats(BaseModel):
 # API Endpoints
 
 
+async def _require_rag_system():
+    """Return the RAG system, waiting briefly for startup; 503 if it isn't ready"""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + config.STARTUP_WAIT_SECONDS
+    while rag_system is None and not readiness.has_failed and loop.time() < deadline:
+        await asyncio.sleep(0.05)
+
+    if rag_system is None:
+        detail = (
+            f"RAG system failed to start: {readiness.error}"
+            if readiness.has_failed
+            else "RAG system is starting up, retry shortly"
+        )
+        raise HTTPException(
+            status_code=503, detail=detail, headers={"Retry-After": "5"}
+        )
+    return rag_system
+
+
+@app.get("/api/ready")
+async def get_readiness():
+    """Report startup progress; 200 once queries can be served, 503 before"""
+    snapshot = readiness.snapshot()
+    return JSONResponse(snapshot, status_code=200 if snapshot["ready"] else 503)
+
+
 @app.post("/api/query", response_model=QueryResponse)
 async def query_documents(request: QueryRequest):
     """Process a query and return response with sources"""
+    rag_system = await _require_rag_system()
     try:
         # Create session if not provided
         session_id = request.session_id
         if not session_id:
-            session_id = rag_system.session_manager.create_session()
+            session_id = await run_in_threadpool(
+                rag_system.session_manager.create_session
+            )
 
-        # Process query using RAG system
-        answer, sources = rag_system.query(request.query, session_id)
+        # Process query using RAG system without blocking the event loop
+        answer, sources = await rag_system.aquery(
+            request.query, session_id, use_cache=request.use_cache
+        )
 
         return QueryResponse(answer=answer, sources=sources, session_id=session_id)
     except Exception as e:
@@ -80,11 +141,68 @@ async def query_documents(request: QueryRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _format_sse(event: str, data) -> str:
+    """Format a single Server-Sent Events frame with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/api/query/stream")
+async def stream_query(request: QueryRequest):
+    """Process a query and stream the answer as Server-Sent Events"""
+    rag_system = await _require_rag_system()
+    session_id = request.session_id
+    if not session_id:
+        session_id = await run_in_threadpool(rag_system.session_manager.create_session)
+
+    async def event_stream():
+        yield _format_sse("session", {"session_id": session_id})
+        try:
+            async for event, data in rag_system.astream_query(
+                request.query, session_id, use_cache=request.use_cache
+            ):
+                if event == "token":
+                    data = {"text": data}
+                yield _format_sse(event, data)
+        except Exception as e:
+            import traceback
+
+            traceback.print_exc()
+            yield _format_sse("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/api/query/batch", response_model=BatchQueryResponse)
+async def query_documents_batch(request: BatchQueryRequest):
+    """Answer a batch of standalone questions with shared retrieval"""
+    if len(request.queries) > config.MAX_BATCH_QUERIES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {config.MAX_BATCH_QUERIES} queries per batch",
+        )
+
+    rag_system = await _require_rag_system()
+    try:
+        results = await rag_system.aquery_batch(
+            request.queries, use_cache=request.use_cache
+        )
+        return BatchQueryResponse(
+            results=[BatchQueryResult(**result) for result in results]
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.get("/api/courses", response_model=CourseStats)
 async def get_course_stats():
     """Get course analytics and statistics"""
+    rag_system = await _require_rag_system()
     try:
-        analytics = rag_system.get_course_analytics()
+        analytics = await run_in_threadpool(rag_system.get_course_analytics)
         return CourseStats(
             total_courses=analytics["total_courses"],
             course_titles=analytics["course_titles"],
@@ -93,19 +211,92 @@ async def get_course_stats():
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.on_event("startup")
-async def startup_event():
-    """Load initial documents on startup"""
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    """Get hit-rate metrics of the answer and embedding caches"""
+    rag_system = await _require_rag_system()
+    return rag_system.get_cache_stats()
+
+
+def _initialize_rag_system():
+    """
+    Build the RAG system and warm the retriever, then ingest docs and keep the
+    store in sync with other processes, all in the background
+    """
+    global rag_system
+
+    try:
+        readiness.set_stage("loading", "Loading embedding model and vector store")
+        # Imported here so that importing the app (and binding the port) does not
+        # pay for chromadb, sentence-transformers and the LLM client
+        from .rag_system import RAGSystem
+
+        system = RAGSystem(config)
+        # Run one embedding so the first real query doesn't pay for model warm-up
+        system.vector_store.embed_query("warm up")
+        # Stored vectors from another model or backend would quietly degrade
+        # retrieval, so refuse to serve with them
+        system.vector_store.verify_embeddings(config.EMBEDDING_MIN_SIMILARITY)
+    except Exception as e:
+        import traceback
+
+        traceback.print_exc()
+        readiness.mark_failed(str(e))
+        return
+
+    rag_system = system
+    readiness.mark_ready()
+    print("RAG system ready")
+
+    _load_initial_documents(system)
+    _refresh_index_periodically(system)
+
+
+def _load_initial_documents(system):
+    """Ingest the docs folder, unless another process owns ingestion"""
     docs_path = "docs"
-    if os.path.exists(docs_path):
+    if config.SERVER_ROLE == "serve":
+        print("Serving read-only; documents are loaded by `python -m backend.ingest`")
+        readiness.set_ingestion("skipped")
+    elif os.path.exists(docs_path):
         print("Loading initial documents...")
+        readiness.set_ingestion("running")
         try:
-            courses, chunks = rag_system.add_course_folder(
-                docs_path, clear_existing=False
+            courses, chunks = system.add_course_folder(
+                docs_path, clear_existing=False, progress=readiness.update_ingestion
             )
             print(f"Loaded {courses} courses with {chunks} chunks")
+            readiness.set_ingestion("done")
+        except IngestionInProgress:
+            # Another worker got the lock; its changes are picked up on refresh
+            print("Another process is loading documents")
+            readiness.set_ingestion("skipped")
         except Exception as e:
             print(f"Error loading documents: {e}")
+            readiness.set_ingestion("failed")
+    else:
+        readiness.set_ingestion("done")
+
+
+def _refresh_index_periodically(system):
+    """Reload the vector store whenever another process has ingested into it"""
+    if config.INDEX_REFRESH_INTERVAL <= 0:
+        return
+    while True:
+        time.sleep(config.INDEX_REFRESH_INTERVAL)
+        try:
+            if system.refresh_index():
+                print("Reloaded vector store after external ingestion")
+        except Exception as e:
+            print(f"Error refreshing vector store: {e}")
+
+
+@app.on_event("startup")
+async def startup_event():
+    """Start loading models and initial documents without blocking startup"""
+    threading.Thread(
+        target=_initialize_rag_system, name="rag-startup", daemon=True
+    ).start()
 
 
 # Custom static file handler with no-cache headers for development
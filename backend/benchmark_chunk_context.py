@@ -0,0 +1,146 @@
+"""
+Compare the chunk context modes on the course documents.
+
+    python -m backend.benchmark_chunk_context [folder] [-k 5]
+
+The folder is ingested once per CHUNK_CONTEXT_MODE, each into its own
+temporary store with the configured embedder. Reported per mode:
+
+- chunks, and the mean characters embedded per chunk
+- embed: seconds spent embedding during ingestion, and chunks per second
+- recall@k and MRR for dense and hybrid search: a query is answered when a
+  chunk of its lesson is among the top k results
+
+Queries are the lesson titles of the documents, each aimed at its own lesson,
+so neither mode gets the course or lesson context of the query for free.
+"""
+
+import argparse
+import shutil
+import sys
+import tempfile
+from typing import Any, Dict, List, Optional, Tuple
+
+from .config import config
+from .document_processor import DocumentProcessor
+from .embedding_service import create_embedder
+from .ingestion import IngestionPipeline, list_course_files
+from .vector_store import CHUNK_CONTEXT_MODES, VectorStore
+
+# Search modes whose ranking depends on the embedded text
+EVALUATED_SEARCH_MODES = ("dense", "hybrid")
+
+
+def load_queries(file_paths: List[str]) -> List[Tuple[str, Tuple[str, int]]]:
+    """(lesson title, (course title, lesson number)) for every lesson"""
+    processor = DocumentProcessor(config.CHUNK_SIZE, config.CHUNK_OVERLAP)
+    queries = []
+    for file_path in file_paths:
+        course, _ = processor.process_course_document(file_path)
+        queries.extend(
+            (lesson.title, (course.title, lesson.lesson_number))
+            for lesson in course.lessons
+        )
+    return queries
+
+
+def evaluate(
+    store: VectorStore, queries: List[Tuple[str, Tuple[str, int]]], k: int
+) -> Dict[str, Dict[str, float]]:
+    """Recall@k and MRR of each evaluated search mode"""
+    scores = {}
+    for mode in EVALUATED_SEARCH_MODES:
+        hits = 0
+        reciprocal_ranks = 0.0
+        for query, target in queries:
+            results = store.search(query, limit=k, mode=mode)
+            for rank, metadata in enumerate(results.metadata, start=1):
+                if (metadata.get("course_title"), metadata.get("lesson_number")) == (
+                    target
+                ):
+                    hits += 1
+                    reciprocal_ranks += 1 / rank
+                    break
+        scores[mode] = {
+            "recall": hits / len(queries),
+            "mrr": reciprocal_ranks / len(queries),
+        }
+    return scores
+
+
+def run_mode(
+    chunk_context: str,
+    file_paths: List[str],
+    queries: List[Tuple[str, Tuple[str, int]]],
+    embedder,
+    k: int,
+) -> Dict[str, Any]:
+    """Ingest the files into a temporary store in one mode and evaluate it"""
+    chroma_path = tempfile.mkdtemp()
+    try:
+        store = VectorStore(
+            chroma_path,
+            config.EMBEDDING_MODEL,
+            config.MAX_RESULTS,
+            config.EMBEDDING_CACHE_SIZE,
+            embedder=embedder,
+            chunk_context=chunk_context,
+        )
+        pipeline = IngestionPipeline(
+            DocumentProcessor(config.CHUNK_SIZE, config.CHUNK_OVERLAP),
+            store,
+            batch_size=config.EMBEDDING_BATCH_SIZE,
+            workers=config.INGESTION_WORKERS,
+        )
+        stats = pipeline.ingest(file_paths)
+        documents = store.course_content.get(include=["documents"])["documents"]
+        return {
+            "chunks": len(documents),
+            "mean_chars": sum(map(len, documents)) / max(1, len(documents)),
+            "embed_seconds": stats.embed_seconds,
+            "chunks_per_second": (
+                stats.chunks_added / stats.embed_seconds if stats.embed_seconds else 0
+            ),
+            "search": evaluate(store, queries, k),
+        }
+    finally:
+        shutil.rmtree(chroma_path, ignore_errors=True)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m backend.benchmark_chunk_context",
+        description="Compare embedding cost and recall of the chunk context modes",
+    )
+    parser.add_argument("folder", nargs="?", default="docs")
+    parser.add_argument("-k", type=int, default=config.MAX_RESULTS)
+    args = parser.parse_args(argv)
+
+    file_paths = list_course_files(args.folder)
+    queries = load_queries(file_paths)
+    if not queries:
+        print(f"No course documents with lessons in {args.folder}")
+        return 1
+    print(f"{config.EMBEDDING_MODEL}: {len(queries)} lesson-title queries")
+
+    # One embedder for all modes, so the model is loaded once
+    embedder = create_embedder(config)
+    header = f"{'mode':<9} {'chunks':>6} {'chars':>6} {'embed s':>8} {'chunks/s':>9}"
+    for mode in EVALUATED_SEARCH_MODES:
+        header += f" {f'{mode} r@{args.k}':>10} {f'{mode} MRR':>10}"
+    print(header)
+    for chunk_context in CHUNK_CONTEXT_MODES:
+        result = run_mode(chunk_context, file_paths, queries, embedder, args.k)
+        line = (
+            f"{chunk_context:<9} {result['chunks']:>6} {result['mean_chars']:>6.0f}"
+            f" {result['embed_seconds']:>8.2f} {result['chunks_per_second']:>9.1f}"
+        )
+        for mode in EVALUATED_SEARCH_MODES:
+            scores = result["search"][mode]
+            line += f" {scores['recall']:>10.3f} {scores['mrr']:>10.3f}"
+        print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
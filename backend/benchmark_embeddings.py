@@ -0,0 +1,192 @@
+"""
+Compare embedding backends on the course documents.
+
+    python -m backend.benchmark_embeddings [folder] [--backends torch,onnx-int8]
+                                           [-k 5] [--repeats 3]
+
+Each backend runs in a fresh process so its memory can be measured on its
+own. The first backend listed (by default "torch", the full-precision model)
+is the reference. Reported per backend:
+
+- load: seconds to load the model
+- rss: peak resident memory of the process, and the part added by the model
+- p50/p95: latency of embedding one query, in milliseconds
+- docs/s: throughput of embedding the chunks in batches
+- similarity: mean cosine similarity of its chunk vectors to the reference's,
+  which is what startup checks against EMBEDDING_MIN_SIMILARITY
+- recall@k: share of the reference's top-k chunks per query that the backend
+  also ranks in its top k
+
+Queries are the lesson titles of the documents.
+"""
+
+import argparse
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .config import config
+from .document_processor import DocumentProcessor
+from .embedding_service import EMBEDDING_BACKENDS, load_model_embedder
+from .ingestion import list_course_files
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _run_backend(
+    model_name: str,
+    backend: str,
+    documents: List[str],
+    queries: List[str],
+    repeats: int,
+    batch_size: int,
+) -> Dict[str, Any]:
+    """Load and time one backend; runs in its own process"""
+    rss_before = _peak_rss_mb()
+    start = time.perf_counter()
+    embed = load_model_embedder(model_name, backend)
+    embed(["warm up"])
+    load_seconds = time.perf_counter() - start
+
+    latencies = []
+    for _ in range(repeats):
+        for query in queries:
+            start = time.perf_counter()
+            embed([query])
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    document_embeddings = []
+    for offset in range(0, len(documents), batch_size):
+        document_embeddings.extend(embed(documents[offset : offset + batch_size]))
+    encode_seconds = time.perf_counter() - start
+
+    rss = _peak_rss_mb()
+    return {
+        "load_seconds": load_seconds,
+        "rss_mb": rss,
+        "model_rss_mb": rss - rss_before,
+        "p50_ms": float(np.percentile(latencies, 50)) * 1000,
+        "p95_ms": float(np.percentile(latencies, 95)) * 1000,
+        "docs_per_second": len(documents) / encode_seconds if encode_seconds else 0.0,
+        "documents": np.asarray(document_embeddings, dtype=np.float32),
+        "queries": np.asarray(embed(queries), dtype=np.float32),
+    }
+
+
+def _normalized(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+
+def _top_k(queries: np.ndarray, documents: np.ndarray, k: int) -> np.ndarray:
+    scores = _normalized(queries) @ _normalized(documents).T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def compare(
+    reference: Dict[str, Any], result: Dict[str, Any], k: int
+) -> Dict[str, Optional[float]]:
+    """Similarity and recall@k of a backend's vectors against the reference's"""
+    if result["documents"].shape != reference["documents"].shape:
+        return {"similarity": None, "recall": None}  # Different dimension
+
+    similarity = np.sum(
+        _normalized(reference["documents"]) * _normalized(result["documents"]), axis=1
+    )
+    expected = _top_k(reference["queries"], reference["documents"], k)
+    actual = _top_k(result["queries"], result["documents"], k)
+    recall = np.mean(
+        [len(set(want) & set(got)) / len(want) for want, got in zip(expected, actual)]
+    )
+    return {"similarity": float(similarity.mean()), "recall": float(recall)}
+
+
+def load_corpus(folder: str) -> Dict[str, List[str]]:
+    """Chunk texts and lesson-title queries from a folder of course documents"""
+    processor = DocumentProcessor(config.CHUNK_SIZE, config.CHUNK_OVERLAP)
+    documents: List[str] = []
+    queries: List[str] = []
+    for file_path in list_course_files(folder):
+        course, chunks = processor.process_course_document(file_path)
+        documents.extend(chunk.content for chunk in chunks)
+        queries.extend(lesson.title for lesson in course.lessons)
+    return {"documents": documents, "queries": queries}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m backend.benchmark_embeddings",
+        description="Compare latency, memory and recall of embedding backends",
+    )
+    parser.add_argument("folder", nargs="?", default="docs")
+    parser.add_argument(
+        "--backends",
+        default=",".join(EMBEDDING_BACKENDS),
+        help="Comma-separated backends; the first is the reference",
+    )
+    parser.add_argument("-k", type=int, default=config.MAX_RESULTS)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    backends = [backend.strip() for backend in args.backends.split(",") if backend]
+    corpus = load_corpus(args.folder)
+    if not corpus["documents"] or not corpus["queries"]:
+        print(f"No course documents with lessons in {args.folder}")
+        return 1
+    print(
+        f"{config.EMBEDDING_MODEL}: {len(corpus['documents'])} chunks,"
+        f" {len(corpus['queries'])} queries"
+    )
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for backend in backends:
+        # A fresh process per backend, so memory is not shared between them
+        with ProcessPoolExecutor(1, mp_context=get_context("spawn")) as pool:
+            try:
+                results[backend] = pool.submit(
+                    _run_backend,
+                    config.EMBEDDING_MODEL,
+                    backend,
+                    corpus["documents"],
+                    corpus["queries"],
+                    args.repeats,
+                    config.EMBEDDING_BATCH_SIZE,
+                ).result()
+            except Exception as e:
+                print(f"{backend}: failed ({e})")
+
+    if backends[0] not in results:
+        print(f"Reference backend {backends[0]} failed")
+        return 1
+    reference = results[backends[0]]
+
+    print(
+        f"{'backend':<12} {'load s':>7} {'rss MB':>7} {'model MB':>8}"
+        f" {'p50 ms':>7} {'p95 ms':>7} {'docs/s':>8} {'similarity':>10}"
+        f" {f'recall@{args.k}':>9}"
+    )
+    for backend, result in results.items():
+        quality = compare(reference, result, args.k)
+        similarity = quality["similarity"]
+        recall = quality["recall"]
+        print(
+            f"{backend:<12} {result['load_seconds']:>7.2f} {result['rss_mb']:>7.0f}"
+            f" {result['model_rss_mb']:>8.0f} {result['p50_ms']:>7.2f}"
+            f" {result['p95_ms']:>7.2f} {result['docs_per_second']:>8.1f}"
+            f" {'-' if similarity is None else f'{similarity:.4f}':>10}"
+            f" {'-' if recall is None else f'{recall:.3f}':>9}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
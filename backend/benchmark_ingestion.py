@@ -0,0 +1,122 @@
+"""
+Measure ingestion throughput on a folder of course documents.
+
+    python -m backend.benchmark_ingestion [folder] [--page-workers 1,4] [--embed]
+
+For each --page-workers setting, every document is read and chunked
+(PDF pages extracted by that many processes), and throughput is reported per
+file type: files, megabytes and chunks per second. With --embed the folder
+is also ingested end to end, embedding included, into a temporary store.
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+from .config import config
+from .document_processor import DocumentProcessor
+from .embedding_service import create_embedder
+from .ingestion import IngestionPipeline, list_course_files
+from .vector_store import VectorStore
+
+
+def benchmark_parsing(
+    file_paths: List[str], page_workers: int
+) -> Dict[str, Dict[str, float]]:
+    """Per file type: files, bytes, chunks and seconds spent reading and chunking"""
+    processor = DocumentProcessor(config.CHUNK_SIZE, config.CHUNK_OVERLAP, page_workers)
+    totals: Dict[str, Dict[str, float]] = {}
+    for file_path in file_paths:
+        extension = os.path.splitext(file_path)[1].lower()
+        entry = totals.setdefault(
+            extension, {"files": 0, "bytes": 0, "chunks": 0, "seconds": 0.0}
+        )
+        start = time.perf_counter()
+        try:
+            _, chunks = processor.process_course_document(file_path)
+        except Exception as e:
+            print(f"{os.path.basename(file_path)}: {e}")
+            continue
+        entry["seconds"] += time.perf_counter() - start
+        entry["files"] += 1
+        entry["bytes"] += os.path.getsize(file_path)
+        entry["chunks"] += len(chunks)
+    return totals
+
+
+def _rate(count: float, seconds: float) -> str:
+    return f"{count / seconds:.1f}" if seconds else "-"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m backend.benchmark_ingestion",
+        description="Measure document parsing and ingestion throughput",
+    )
+    parser.add_argument("folder", nargs="?", default="docs")
+    parser.add_argument(
+        "--page-workers",
+        default=f"1,{config.PDF_PAGE_WORKERS}",
+        help="Comma-separated PDF page worker counts to compare",
+    )
+    parser.add_argument(
+        "--embed", action="store_true", help="Also ingest with embedding"
+    )
+    args = parser.parse_args(argv)
+
+    file_paths = list_course_files(args.folder)
+    if not file_paths:
+        print(f"No course documents in {args.folder}")
+        return 1
+
+    print(
+        f"{'workers':>7} {'type':<6} {'files':>5} {'MB':>8} {'chunks':>7}"
+        f" {'seconds':>8} {'files/s':>8} {'MB/s':>7} {'chunks/s':>9}"
+    )
+    for page_workers in dict.fromkeys(int(n) for n in args.page_workers.split(",")):
+        for extension, entry in sorted(
+            benchmark_parsing(file_paths, page_workers).items()
+        ):
+            megabytes = entry["bytes"] / 1e6
+            seconds = entry["seconds"]
+            print(
+                f"{page_workers:>7} {extension:<6} {entry['files']:>5}"
+                f" {megabytes:>8.2f} {entry['chunks']:>7} {seconds:>8.2f}"
+                f" {_rate(entry['files'], seconds):>8}"
+                f" {_rate(megabytes, seconds):>7}"
+                f" {_rate(entry['chunks'], seconds):>9}"
+            )
+
+    if args.embed:
+        chroma_path = tempfile.mkdtemp()
+        try:
+            pipeline = IngestionPipeline(
+                DocumentProcessor(
+                    config.CHUNK_SIZE, config.CHUNK_OVERLAP, config.PDF_PAGE_WORKERS
+                ),
+                VectorStore(
+                    chroma_path,
+                    config.EMBEDDING_MODEL,
+                    embedder=create_embedder(config),
+                    chunk_context=config.CHUNK_CONTEXT_MODE,
+                ),
+                batch_size=config.EMBEDDING_BATCH_SIZE,
+                workers=config.INGESTION_WORKERS,
+            )
+            stats = pipeline.ingest(file_paths)
+            print(stats.summary())
+            print(
+                f"End to end: {_rate(stats.chunks_added, stats.total_seconds)}"
+                " chunks/s"
+            )
+        finally:
+            shutil.rmtree(chroma_path, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
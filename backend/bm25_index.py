@@ -0,0 +1,231 @@
+import math
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Word characters, so identifiers like get_lesson_link stay one token
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens used for both documents and queries"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """
+    In-process inverted index with Okapi BM25 scoring.
+
+    Each document occupies a slot; postings map a term to the slots containing
+    it and the term frequency in each. Postings are appended to Python lists as
+    documents arrive and packed into numpy arrays the first time a term is
+    queried afterwards, so incremental updates stay cheap and queries are
+    vectorized. Removed documents leave a dead slot behind until enough of them
+    accumulate to make compacting worthwhile.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._ids: List[Optional[str]] = []  # slot -> chunk ID (None when removed)
+        self._slots: Dict[str, int] = {}  # chunk ID -> slot
+        self._documents: List[Optional[str]] = []
+        self._metadata: List[Optional[Dict[str, Any]]] = []
+        self._lengths: List[int] = []
+        self._alive: List[bool] = []
+        self._postings: Dict[str, Tuple[List[int], List[int]]] = {}
+        self._packed: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._arrays: Optional[Tuple[np.ndarray, np.ndarray]] = None  # alive, lengths
+        self._live_count = 0
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return self._live_count
+
+    def add(
+        self, ids: List[str], documents: List[str], metadatas: List[Dict[str, Any]]
+    ):
+        """Index documents; an ID that is already indexed is replaced"""
+        with self._lock:
+            for chunk_id, document, metadata in zip(ids, documents, metadatas):
+                self._remove(chunk_id)
+                self._insert(chunk_id, document, dict(metadata))
+            # Replacing an ID leaves its old slot dead, like remove()
+            self._compact_if_sparse()
+
+    def remove(self, ids: List[str]):
+        """Remove documents by ID; unknown IDs are ignored"""
+        with self._lock:
+            for chunk_id in ids:
+                self._remove(chunk_id)
+            self._compact_if_sparse()
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+
+    def _insert(self, chunk_id: str, document: str, metadata: Dict[str, Any]):
+        """Append a document in a new slot and extend its terms' postings"""
+        slot = len(self._ids)
+        terms = Counter(tokenize(document))
+        self._ids.append(chunk_id)
+        self._slots[chunk_id] = slot
+        self._documents.append(document)
+        self._metadata.append(metadata)
+        self._lengths.append(sum(terms.values()))
+        self._alive.append(True)
+        self._live_count += 1
+        self._total_length += self._lengths[slot]
+
+        for term, frequency in terms.items():
+            slots, frequencies = self._postings.setdefault(term, ([], []))
+            slots.append(slot)
+            frequencies.append(frequency)
+            self._packed.pop(term, None)
+        self._arrays = None
+
+    def _remove(self, chunk_id: str):
+        slot = self._slots.pop(chunk_id, None)
+        if slot is None:
+            return
+        self._alive[slot] = False
+        self._ids[slot] = None
+        self._documents[slot] = None
+        self._metadata[slot] = None
+        self._live_count -= 1
+        self._total_length -= self._lengths[slot]
+        self._arrays = None
+
+    def _compact_if_sparse(self):
+        """Compact once dead slots outnumber live ones"""
+        if len(self._ids) > 2 * self._live_count + 64:
+            self._compact()
+
+    def _compact(self):
+        """Rebuild the index from its live documents"""
+        live = [
+            (chunk_id, self._documents[slot], self._metadata[slot])
+            for slot, chunk_id in enumerate(self._ids)
+            if chunk_id is not None
+        ]
+        self._reset()
+        for chunk_id, document, metadata in live:
+            self._insert(chunk_id, document, metadata)
+
+    def _posting(self, term: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Packed (slots, term frequencies) for a term"""
+        packed = self._packed.get(term)
+        if packed is None:
+            posting = self._postings.get(term)
+            if posting is None:
+                return None
+            packed = (
+                np.asarray(posting[0], dtype=np.int64),
+                np.asarray(posting[1], dtype=np.float32),
+            )
+            self._packed[term] = packed
+        return packed
+
+    def search(
+        self,
+        query: str,
+        limit: int,
+        course_title: Optional[str] = None,
+        lesson_number: Optional[int] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        Get the top documents for a query by BM25 score.
+
+        Args:
+            query: Free-text query
+            limit: Maximum number of results
+            course_title: Only match chunks of this course
+            lesson_number: Only match chunks of this lesson
+
+        Returns:
+            List of (chunk ID, score) pairs, best first; documents sharing no
+            term with the query are not returned
+        """
+        terms = set(tokenize(query))
+        with self._lock:
+            if not terms or not self._live_count or limit <= 0:
+                return []
+
+            if self._arrays is None:
+                self._arrays = (
+                    np.asarray(self._alive, dtype=bool),
+                    np.asarray(self._lengths, dtype=np.float32),
+                )
+            alive, lengths = self._arrays
+            average_length = self._total_length / self._live_count
+            length_norm = self.k1 * (1 - self.b + self.b * lengths / average_length)
+
+            scores = np.zeros(len(self._ids), dtype=np.float32)
+            for term in terms:
+                posting = self._posting(term)
+                if posting is None:
+                    continue
+                slots, frequencies = posting
+                document_frequency = int(alive[slots].sum())
+                if not document_frequency:
+                    continue
+                idf = math.log(
+                    1
+                    + (self._live_count - document_frequency + 0.5)
+                    / (document_frequency + 0.5)
+                )
+                # Each slot appears once per posting, so fancy-index += is safe
+                scores[slots] += (
+                    idf
+                    * frequencies
+                    * (self.k1 + 1)
+                    / (frequencies + length_norm[slots])
+                )
+
+            candidates = alive & (scores > 0)  # A fresh array, safe to modify
+            if course_title is not None or lesson_number is not None:
+                for slot in np.flatnonzero(candidates):
+                    metadata = self._metadata[slot]
+                    if (
+                        course_title is not None
+                        and metadata.get("course_title") != course_title
+                    ) or (
+                        lesson_number is not None
+                        and metadata.get("lesson_number") != lesson_number
+                    ):
+                        candidates[slot] = False
+
+            matches = np.flatnonzero(candidates)
+            if len(matches) > limit:
+                top = np.argpartition(-scores[matches], limit - 1)[:limit]
+                matches = matches[top]
+            matches = matches[np.argsort(-scores[matches], kind="stable")]
+            return [(self._ids[slot], float(scores[slot])) for slot in matches]
+
+    def get(self, chunk_id: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Get the (document, metadata) indexed under an ID"""
+        with self._lock:
+            slot = self._slots.get(chunk_id)
+            if slot is None:
+                return None
+            return self._documents[slot], dict(self._metadata[slot])
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[str]:
+    """
+    Fuse ranked ID lists by reciprocal rank: score(d) = sum of 1 / (k + rank).
+
+    Ties keep the order in which IDs were first seen.
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, chunk_id in enumerate(ranking, start=1):
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=lambda chunk_id: -scores[chunk_id])
@@ -10,15 +10,70 @@ class Config:
 
     # Embedding model settings
     EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"
+    EMBEDDING_CACHE_SIZE: int = 1024  # Query embeddings kept in the LRU cache
+    # "torch", "torch-int8", "onnx" or "onnx-int8" (onnx needs optimum[onnxruntime])
+    EMBEDDING_BACKEND: str = "torch"
+    # Startup refuses a store whose vectors have a lower mean cosine similarity
+    # to the same texts embedded by the configured backend
+    EMBEDDING_MIN_SIMILARITY: float = 0.95
+    # "local" batches in-process; "socket" uses `python -m backend.embedding_service`
+    EMBEDDING_SERVICE: str = "local"
+    EMBEDDING_SOCKET_PATH: str = "./embedding.sock"  # Embedding sidecar socket
+    EMBEDDING_MAX_BATCH_SIZE: int = 64  # Texts per micro-batched model call
+    EMBEDDING_MAX_WAIT_MS: float = 2.0  # Max wait for more texts to join a batch
 
     # Document processing settings
     CHUNK_SIZE: int = 800  # Size of text chunks for vector storage
     CHUNK_OVERLAP: int = 100  # Characters to overlap between chunks
     MAX_RESULTS: int = 5  # Maximum search results to return
     MAX_HISTORY: int = 2  # Number of conversation messages to remember
+    SEARCH_MODE: str = "hybrid"  # "hybrid" (BM25 + vector), "dense" or "lexical"
+    # Course and lesson context of a chunk: "prefix" embeds it as text before
+    # the chunk, "metadata" keeps it in metadata only (fewer tokens per chunk);
+    # after switching run `python -m backend.ingest --migrate-context`
+    CHUNK_CONTEXT_MODE: str = "prefix"
+    # Max squared L2 distance (2 - 2 * cosine) for embedding-matched course names
+    COURSE_NAME_MAX_DISTANCE: float = 1.3
+
+    # Query routing settings
+    PRE_ROUTING: bool = False  # Route locally and answer in one LLM call
+    ROUTER_COURSE_MAX_DISTANCE: float = 0.9  # Question-to-title match cutoff
+
+    # Session settings
+    SESSION_BACKEND: str = "memory"  # "memory" or "sqlite" (shared by workers)
+    SESSION_DB_PATH: str = "./sessions.db"  # SQLite session database location
+    MAX_SESSIONS: int = 10000  # Least recently used sessions beyond this are dropped
+    SESSION_TTL_SECONDS: float = 86400.0  # Idle time before a session expires
+    SESSION_EVICTION_INTERVAL: float = 300.0  # Seconds between SQLite sweeps
+
+    # Concurrency settings
+    RETRIEVAL_WORKERS: int = 4  # Threads for blocking embedding/ChromaDB work
+    BATCH_CONCURRENCY: int = 8  # Concurrent LLM calls per batch query
+    MAX_BATCH_QUERIES: int = 256  # Largest batch accepted by /api/query/batch
+    STARTUP_WAIT_SECONDS: float = 10.0  # Max wait for startup before a 503
+    TOOL_TIMEOUT_SECONDS: float = 10.0  # Max time for one tool call in a turn
+    TOOL_WORKERS: int = 4  # Threads for tool calls, apart from retrieval
+
+    # Deployment settings
+    # "standalone" ingests docs at startup; "serve" opens the store read-only
+    # and leaves ingestion to `python -m backend.ingest`
+    SERVER_ROLE: str = "standalone"
+    INDEX_REFRESH_INTERVAL: float = 30.0  # Seconds between checks for new ingestions
+
+    # Response cache settings
+    RESPONSE_CACHE_SIZE: int = 512  # Cached answers to standalone questions
+    RESPONSE_CACHE_TTL: float = 3600.0  # Seconds before a cached answer expires
+    SEMANTIC_CACHE_SIZE: int = 1024  # Answers matched by query similarity
+    SEMANTIC_CACHE_THRESHOLD: float = 0.95  # Min cosine similarity for a hit
+
+    # Ingestion settings
+    INGESTION_WORKERS: int = 4  # Processes for parsing and chunking documents
+    PDF_PAGE_WORKERS: int = 4  # Processes extracting the pages of one large PDF
+    EMBEDDING_BATCH_SIZE: int = 64  # Chunks embedded and written per batch
 
     # Database paths
     CHROMA_PATH: str = "./chroma_db"  # ChromaDB storage location
+    INGESTION_LOCK_PATH: str = "./chroma_db.lock"  # Held while a process ingests
 
 
 config = Config()
@@ -1,19 +1,135 @@
+import itertools
 import os
 import re
-from typing import List, Tuple
+from contextlib import closing
+from typing import ContextManager, Iterable, Iterator, List, Optional, Tuple
+
+from .document_readers import get_reader, read_text_lines
+from .models import ChunkBatch, Course, Lesson
+
+_COURSE_TITLE_PATTERN = re.compile(r"^Course Title:\s*(.+)$", re.IGNORECASE)
+_COURSE_LINK_PATTERN = re.compile(r"^Course Link:\s*(.+)$", re.IGNORECASE)
+_INSTRUCTOR_PATTERN = re.compile(r"^Course Instructor:\s*(.+)$", re.IGNORECASE)
+_LESSON_PATTERN = re.compile(r"^Lesson\s+(\d+):\s*(.+)$", re.IGNORECASE)
+_LESSON_LINK_PATTERN = re.compile(r"^Lesson Link:\s*(.+)$", re.IGNORECASE)
+
+# Whitespace after sentence-ending punctuation and before a capital letter
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+(?=[A-Z])")
+_WORD_CHAR = re.compile(r"\w")
+
+
+def _normalized_tail(text: str, end: int) -> str:
+    """The last four characters of text[:end] once whitespace runs are collapsed"""
+    size = 8
+    while True:
+        begin = max(0, end - size)
+        tail = " ".join(text[begin:end].split())[-4:]
+        if len(tail) == 4 or begin == 0:
+            return tail
+        size *= 2
+
+
+def _ends_with_abbreviation(tail: str) -> bool:
+    """Whether text ending in tail ends like "e.g." or "Dr." rather than a sentence"""
+    if (
+        len(tail) == 4
+        and _WORD_CHAR.match(tail[0])
+        and tail[1] == "."
+        and _WORD_CHAR.match(tail[2])
+    ):
+        return True
+    return (
+        len(tail) >= 3
+        and "A" <= tail[-3] <= "Z"
+        and "a" <= tail[-2] <= "z"
+        and tail[-1] == "."
+    )
+
+
+def _iter_sentences(text: str) -> Iterator[str]:
+    """
+    Split text into whitespace-normalized sentences, in one pass.
+
+    Sentences end at whitespace between ".", "!" or "?" and a capital
+    letter, unless the text before it ends in an abbreviation.
+    """
+    start = 0
+    for match in _SENTENCE_BREAK.finditer(text):
+        if _ends_with_abbreviation(_normalized_tail(text, match.start())):
+            continue
+        yield " ".join(text[start : match.start()].split())
+        start = match.end()
+    sentence = " ".join(text[start:].split())
+    if sentence:
+        yield sentence
+
+
+def _pack_sentences(
+    sentences: Iterable[str], chunk_size: int, chunk_overlap: int
+) -> Iterator[str]:
+    """
+    Pack sentences into chunks of at most chunk_size characters.
+
+    A chunk takes sentences while their joined length fits (its first
+    sentence always does). The next chunk starts with the longest run of
+    the chunk's last sentences that fits in chunk_overlap, but at least one
+    sentence after the previous start. The chunk end and the overlap start
+    only move forward, and joined lengths come from prefix sums, so each
+    sentence is measured once.
+    """
+    source = iter(sentences)
+    window: List[str] = []  # Sentences from index start on
+    prefix = [0]  # Running sums of len + 1, prefix[k] up to window[k]
+    # Absolute sentence indices: the chunk is [start, end), its overlap [tail, end)
+    start = end = tail = 0
+    exhausted = False
+
+    def joined(first: int, last: int) -> int:
+        return prefix[last - start] - prefix[first - start] - 1
+
+    while True:
+        while True:
+            if end - start == len(window):
+                sentence = None if exhausted else next(source, None)
+                if sentence is None:
+                    exhausted = True
+                    break
+                window.append(sentence)
+                prefix.append(prefix[-1] + len(sentence) + 1)
+            if end > start and joined(start, end + 1) > chunk_size:
+                break
+            end += 1
+        if end == start:
+            return
+
+        yield " ".join(window[: end - start])
+
+        next_start = end
+        if chunk_overlap > 0:
+            tail = max(tail, start)
+            while tail < end and joined(tail, end) > chunk_overlap:
+                tail += 1
+            next_start = tail
+        next_start = max(next_start, start + 1)
 
-from .models import Course, CourseChunk, Lesson
+        del window[: next_start - start]
+        del prefix[: next_start - start]
+        start = next_start
 
 
 class DocumentProcessor:
     """Processes course documents and extracts structured information"""
 
-    def __init__(self, chunk_size: int, chunk_overlap: int):
+    def __init__(self, chunk_size: int, chunk_overlap: int, page_workers: int = 1):
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        self.page_workers = page_workers  # Processes extracting pages of large PDFs
 
     def read_file(self, file_path: str) -> str:
-        """Read content from file with UTF-8 encoding"""
+        """Read content from file with UTF-8 encoding (PDF and DOCX are extracted)"""
+        reader = get_reader(file_path)
+        if reader is not read_text_lines:
+            return "".join(reader(file_path, self.page_workers))
         try:
             with open(file_path, "r", encoding="utf-8") as file:
                 return file.read()
@@ -22,81 +138,56 @@ class DocumentProcessor:
             with open(file_path, "r", encoding="utf-8", errors="ignore") as file:
                 return file.read()
 
-    def chunk_text(self, text: str) -> List[str]:
-        """Split text into sentence-based chunks with overlap using config settings"""
-
-        # Clean up the text
-        text = re.sub(r"\s+", " ", text.strip())  # Normalize whitespace
-
-        # Better sentence splitting that handles abbreviations
-        # This regex looks for periods followed by whitespace and capital letters
-        # but ignores common abbreviations
-        sentence_endings = re.compile(
-            r"(?<!\w\.\w.)(?<![A-Z][a-z]\.)(?<=\.|\!|\?)\s+(?=[A-Z])"
-        )
-        sentences = sentence_endings.split(text)
-
-        # Clean sentences
-        sentences = [s.strip() for s in sentences if s.strip()]
+    def open_document(self, file_path: str) -> ContextManager[Iterator[str]]:
+        """
+        Open a document as a stream of text lines, using the reader registered
+        for its file type (see document_readers)
+        """
+        return closing(get_reader(file_path)(file_path, self.page_workers))
 
-        chunks = []
-        i = 0
+    def _parse_course_title(self, first_line: str, filename: str) -> str:
+        """Extract the course title from a document's first line"""
+        first_line = first_line.strip()
+        if not first_line:
+            return filename
 
-        while i < len(sentences):
-            current_chunk = []
-            current_size = 0
+        title_match = _COURSE_TITLE_PATTERN.match(first_line)
+        if title_match:
+            return title_match.group(1).strip()
+        return first_line
 
-            # Build chunk starting from sentence i
-            for j in range(i, len(sentences)):
-                sentence = sentences[j]
+    def read_course_title(self, file_path: str) -> str:
+        """
+        Read only the course title of a document.
 
-                # Calculate size with space
-                space_size = 1 if current_chunk else 0
-                total_addition = len(sentence) + space_size
+        Stops at the first non-blank line, so callers can check whether a course
+        is already known without reading and chunking the whole file.
+        """
+        filename = os.path.basename(file_path)
+        with self.open_document(file_path) as lines:
+            for line in lines:
+                if line.strip():
+                    return self._parse_course_title(line, filename)
+        return filename
 
-                # Check if adding this sentence would exceed chunk size
-                if current_size + total_addition > self.chunk_size and current_chunk:
-                    break
+    def iter_chunks(self, text: str) -> Iterator[str]:
+        """
+        Split text into sentence-based chunks with overlap, lazily.
 
-                current_chunk.append(sentence)
-                current_size += total_addition
-
-            # Add chunk if we have content
-            if current_chunk:
-                chunks.append(" ".join(current_chunk))
-
-                # Calculate overlap for next chunk
-                if hasattr(self, "chunk_overlap") and self.chunk_overlap > 0:
-                    # Find how many sentences to overlap
-                    overlap_size = 0
-                    overlap_sentences = 0
-
-                    # Count backwards from end of current chunk
-                    for k in range(len(current_chunk) - 1, -1, -1):
-                        sentence_len = len(current_chunk[k]) + (
-                            1 if k < len(current_chunk) - 1 else 0
-                        )
-                        if overlap_size + sentence_len <= self.chunk_overlap:
-                            overlap_size += sentence_len
-                            overlap_sentences += 1
-                        else:
-                            break
-
-                    # Move start position considering overlap
-                    next_start = i + len(current_chunk) - overlap_sentences
-                    i = max(next_start, i + 1)  # Ensure we make progress
-                else:
-                    # No overlap - move to next sentence after current chunk
-                    i += len(current_chunk)
-            else:
-                # No sentences fit, move to next
-                i += 1
+        Whitespace runs count as single spaces, and sentences end at ".", "!"
+        or "?" before a capital letter (abbreviations excepted). Sentences are
+        found and packed in one streaming pass, so long transcripts take time
+        linear in their length.
+        """
+        return _pack_sentences(
+            _iter_sentences(text), self.chunk_size, self.chunk_overlap
+        )
 
-        return chunks
+    def chunk_text(self, text: str) -> List[str]:
+        """Split text into sentence-based chunks with overlap using config settings"""
+        return list(self.iter_chunks(text))
 
-    def process_course_document(
-        self, file_path: str
-    ) -> Tuple[Course, List[CourseChunk]]:
+    def process_course_document(self, file_path: str) -> Tuple[Course, ChunkBatch]:
         """
         Process a course document with expected format:
         Line 1: Course Title: [title]
@@ -104,163 +195,139 @@ class DocumentProcessor:
         Line 3: Course Instructor: [instructor]
         Following lines: Lesson markers and content
         """
-        content = self.read_file(file_path)
-        filename = os.path.basename(file_path)
+        with self.open_document(file_path) as lines:
+            course, events = self.stream_course_document(
+                lines, os.path.basename(file_path)
+            )
+            course_chunks = ChunkBatch()
+            for _, lesson_chunks in events:
+                course_chunks.extend(lesson_chunks)
+        return course, course_chunks
 
-        lines = content.strip().split("\n")
+    def stream_course_document(
+        self, lines: Iterable[str], filename: str
+    ) -> Tuple[Course, Iterator[Tuple[Optional[Lesson], ChunkBatch]]]:
+        """
+        Parse a course document line by line.
+
+        Only the header lines are read up front, to build the Course. The
+        returned iterator then yields a (lesson, chunks) event as each lesson
+        closes, appending the lesson to course.lessons, so its chunks can be
+        embedded while the rest of the document is still being read; only
+        the open lesson's lines are held in memory. A document without
+        lessons is chunked as a whole, with lesson None.
+
+        Args:
+            lines: Lines of the document, e.g. an open text file
+            filename: Course title to use if the document has none
+        """
+        lines = iter(lines)
+
+        # The header: first four lines, ignoring leading blank lines
+        header: List[str] = []
+        for line in lines:
+            if header or line.strip():
+                header.append(line.rstrip("\n"))
+                if len(header) == 4:
+                    break
 
-        # Extract course metadata from first three lines
-        course_title = filename  # Default fallback
+        course_title = (
+            self._parse_course_title(header[0], filename) if header else filename
+        )
         course_link = None
-        instructor_name = "Unknown"
-
-        # Parse course title from first line
-        if len(lines) >= 1 and lines[0].strip():
-            title_match = re.match(
-                r"^Course Title:\s*(.+)$", lines[0].strip(), re.IGNORECASE
-            )
-            if title_match:
-                course_title = title_match.group(1).strip()
-            else:
-                course_title = lines[0].strip()
-
-        # Parse remaining lines for course metadata
-        for i in range(1, min(len(lines), 4)):  # Check first 4 lines for metadata
-            line = lines[i].strip()
+        instructor_name = None
+        for line in header[1:]:
+            line = line.strip()
             if not line:
                 continue
-
-            # Try to match course link
-            link_match = re.match(r"^Course Link:\s*(.+)$", line, re.IGNORECASE)
+            link_match = _COURSE_LINK_PATTERN.match(line)
             if link_match:
                 course_link = link_match.group(1).strip()
                 continue
-
-            # Try to match instructor
-            instructor_match = re.match(
-                r"^Course Instructor:\s*(.+)$", line, re.IGNORECASE
-            )
+            instructor_match = _INSTRUCTOR_PATTERN.match(line)
             if instructor_match:
                 instructor_name = instructor_match.group(1).strip()
-                continue
 
-        # Create course object with title as ID
         course = Course(
             title=course_title,
             course_link=course_link,
             instructor=instructor_name if instructor_name != "Unknown" else None,
         )
 
-        # Process lessons and create chunks
-        course_chunks = []
-        current_lesson = None
-        lesson_title = None
-        lesson_link = None
-        lesson_content = []
-        chunk_counter = 0
-
-        # Start processing from line 4 (after metadata)
-        start_index = 3
-        if len(lines) > 3 and not lines[3].strip():
-            start_index = 4  # Skip empty line after instructor
-
-        i = start_index
-        while i < len(lines):
-            line = lines[i]
-
-            # Check for lesson markers (e.g., "Lesson 0: Introduction")
-            lesson_match = re.match(
-                r"^Lesson\s+(\d+):\s*(.+)$", line.strip(), re.IGNORECASE
+        # Lessons start after the header, or on its fourth line if that is not
+        # blank (so that line is also read as lesson content)
+        start_index = 4 if len(header) > 3 and not header[3].strip() else 3
+        body = itertools.chain(
+            header[start_index:], (line.rstrip("\n") for line in lines)
+        )
+        return course, self._lesson_events(course, body)
+
+    def _lesson_events(
+        self, course: Course, body: Iterator[str]
+    ) -> Iterator[Tuple[Optional[Lesson], ChunkBatch]]:
+        chunk_index = 0
+        # Body lines, kept only until a lesson produces chunks: a document
+        # without any is chunked as a whole
+        whole_document: Optional[List[str]] = []
+
+        lesson_number: Optional[int] = None
+        lesson_title = ""
+        lesson_link: Optional[str] = None
+        lesson_content: List[str] = []
+        link_expected = False
+
+        def close_lesson() -> Iterator[Tuple[Lesson, ChunkBatch]]:
+            nonlocal chunk_index, whole_document
+            if lesson_number is None or not lesson_content:
+                return
+            lesson_text = "\n".join(lesson_content).strip()
+            if not lesson_text:
+                return
+            lesson = Lesson(
+                lesson_number=lesson_number, title=lesson_title, lesson_link=lesson_link
             )
-
+            course.lessons.append(lesson)
+            chunks = ChunkBatch()
+            for chunk in self.iter_chunks(lesson_text):
+                # Every chunk carries its course and lesson as context
+                chunks.append(
+                    chunk, course.title, lesson_number, chunk_index, prefixed=True
+                )
+                chunk_index += 1
+            if chunks:
+                whole_document = None
+                yield lesson, chunks
+
+        for line in body:
+            if whole_document is not None:
+                whole_document.append(line)
+            stripped = line.strip()
+
+            # A lesson link directly after its lesson marker
+            if link_expected:
+                link_expected = False
+                link_match = _LESSON_LINK_PATTERN.match(stripped)
+                if link_match:
+                    lesson_link = link_match.group(1).strip()
+                    continue
+
+            lesson_match = _LESSON_PATTERN.match(stripped)
             if lesson_match:
-                # Process previous lesson if it exists
-                if current_lesson is not None and lesson_content:
-                    lesson_text = "\n".join(lesson_content).strip()
-                    if lesson_text:
-                        # Add lesson to course
-                        lesson = Lesson(
-                            lesson_number=current_lesson,
-                            title=lesson_title,
-                            lesson_link=lesson_link,
-                        )
-                        course.lessons.append(lesson)
-
-                        # Create chunks for this lesson
-                        chunks = self.chunk_text(lesson_text)
-                        for idx, chunk in enumerate(chunks):
-                            # For the first chunk of each lesson, add lesson context
-                            chunk_with_context = f"Course {course.title} Lesson {current_lesson} content: {chunk}"
-
-                            course_chunk = CourseChunk(
-                                content=chunk_with_context,
-                                course_title=course.title,
-                                lesson_number=current_lesson,
-                                chunk_index=chunk_counter,
-                            )
-                            course_chunks.append(course_chunk)
-                            chunk_counter += 1
-
-                # Start new lesson
-                current_lesson = int(lesson_match.group(1))
+                yield from close_lesson()
+                lesson_number = int(lesson_match.group(1))
                 lesson_title = lesson_match.group(2).strip()
                 lesson_link = None
-
-                # Check if next line is a lesson link
-                if i + 1 < len(lines):
-                    next_line = lines[i + 1].strip()
-                    link_match = re.match(
-                        r"^Lesson Link:\s*(.+)$", next_line, re.IGNORECASE
-                    )
-                    if link_match:
-                        lesson_link = link_match.group(1).strip()
-                        i += 1  # Skip the link line so it's not added to content
-
                 lesson_content = []
+                link_expected = True
             else:
-                # Add line to current lesson content
                 lesson_content.append(line)
 
-            i += 1
+        yield from close_lesson()
 
-        # Process the last lesson
-        if current_lesson is not None and lesson_content:
-            lesson_text = "\n".join(lesson_content).strip()
-            if lesson_text:
-                lesson = Lesson(
-                    lesson_number=current_lesson,
-                    title=lesson_title,
-                    lesson_link=lesson_link,
-                )
-                course.lessons.append(lesson)
-
-                chunks = self.chunk_text(lesson_text)
-                for idx, chunk in enumerate(chunks):
-                    # For any chunk of each lesson, add lesson context & course title
-
-                    chunk_with_context = f"Course {course_title} Lesson {current_lesson} content: {chunk}"
-
-                    course_chunk = CourseChunk(
-                        content=chunk_with_context,
-                        course_title=course.title,
-                        lesson_number=current_lesson,
-                        chunk_index=chunk_counter,
-                    )
-                    course_chunks.append(course_chunk)
-                    chunk_counter += 1
-
-        # If no lessons found, treat entire content as one document
-        if not course_chunks and len(lines) > 2:
-            remaining_content = "\n".join(lines[start_index:]).strip()
-            if remaining_content:
-                chunks = self.chunk_text(remaining_content)
-                for chunk in chunks:
-                    course_chunk = CourseChunk(
-                        content=chunk,
-                        course_title=course.title,
-                        chunk_index=chunk_counter,
-                    )
-                    course_chunks.append(course_chunk)
-                    chunk_counter += 1
-
-        return course, course_chunks
+        if whole_document:
+            chunks = ChunkBatch()
+            for chunk in self.iter_chunks("\n".join(whole_document).strip()):
+                chunks.append(chunk, course.title, None, chunk_index)
+                chunk_index += 1
+            if chunks:
+                yield None, chunks
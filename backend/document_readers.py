@@ -0,0 +1,142 @@
+"""
+Readers that turn course documents into a stream of text lines.
+
+DocumentProcessor parses course documents line by line; a reader supplies
+those lines for one file type. Readers are registered per file extension,
+and files of unknown types are read as UTF-8 text:
+
+    register_reader(".md", read_text_lines)
+
+Every reader is a generator, so a document is read only as far as it is
+consumed (reading a course title touches the first page only).
+"""
+
+import multiprocessing
+import os
+import xml.etree.ElementTree as ElementTree
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterator, List, Tuple
+
+# PDFs with at least this many pages have them extracted by a process pool
+PARALLEL_PDF_MIN_PAGES = 32
+
+# Pages extracted per pool task
+PDF_PAGES_PER_TASK = 8
+
+# Reader signature: (file path, worker processes it may use) -> lines
+DocumentReader = Callable[[str, int], Iterator[str]]
+
+_WORD_NAMESPACE = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+def read_text_lines(file_path: str, workers: int = 1) -> Iterator[str]:
+    """Lines of a UTF-8 text file; undecodable bytes are dropped"""
+    with open(file_path, "r", encoding="utf-8", errors="ignore") as file:
+        yield from file
+
+
+def read_docx_lines(file_path: str, workers: int = 1) -> Iterator[str]:
+    """
+    One line per paragraph of a Word document, in document order.
+
+    The document XML is parsed incrementally, discarding each paragraph once
+    its text is out, so memory does not grow with the document.
+    """
+    with zipfile.ZipFile(file_path) as archive, archive.open(
+        "word/document.xml"
+    ) as document:
+        for _, element in ElementTree.iterparse(document, events=("end",)):
+            if element.tag != f"{_WORD_NAMESPACE}p":
+                continue
+            parts = []
+            for node in element.iter():
+                if node.tag == f"{_WORD_NAMESPACE}t" and node.text:
+                    parts.append(node.text)
+                elif node.tag == f"{_WORD_NAMESPACE}tab":
+                    parts.append("\t")
+                elif node.tag in (f"{_WORD_NAMESPACE}br", f"{_WORD_NAMESPACE}cr"):
+                    parts.append("\n")
+            element.clear()
+            for line in "".join(parts).split("\n"):
+                yield line + "\n"
+
+
+def _pdf_reader(file_path: str):
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise ImportError("Reading PDF documents requires pypdf: pip install pypdf")
+    return PdfReader(file_path)
+
+
+def _extract_pdf_pages(file_path: str, start: int, stop: int) -> List[str]:
+    """Text of pages [start, stop) of a PDF; runs inside a worker process"""
+    reader = _pdf_reader(file_path)
+    return [reader.pages[index].extract_text() or "" for index in range(start, stop)]
+
+
+def _page_lines(text: str) -> Iterator[str]:
+    for line in text.splitlines():
+        yield line + "\n"
+
+
+def read_pdf_lines(file_path: str, workers: int = 1) -> Iterator[str]:
+    """
+    Lines of the text of a PDF, page by page.
+
+    The first page is extracted here, so reading only the title stays cheap.
+    For large PDFs the remaining pages are then extracted by a pool of worker
+    processes in page ranges, and yielded in order as each range completes.
+    """
+    reader = _pdf_reader(file_path)
+    page_count = len(reader.pages)
+    if not page_count:
+        return
+    yield from _page_lines(reader.pages[0].extract_text() or "")
+
+    if workers <= 1 or page_count < PARALLEL_PDF_MIN_PAGES:
+        for index in range(1, page_count):
+            yield from _page_lines(reader.pages[index].extract_text() or "")
+        return
+
+    ranges: List[Tuple[int, int]] = [
+        (start, min(start + PDF_PAGES_PER_TASK, page_count))
+        for start in range(1, page_count, PDF_PAGES_PER_TASK)
+    ]
+    # Spawn rather than fork: the server process holds model weights and threads
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(ranges)),
+        mp_context=multiprocessing.get_context("spawn"),
+    ) as pool:
+        for pages in pool.map(
+            _extract_pdf_pages,
+            [file_path] * len(ranges),
+            [start for start, _ in ranges],
+            [stop for _, stop in ranges],
+        ):
+            for text in pages:
+                yield from _page_lines(text)
+
+
+_READERS: Dict[str, DocumentReader] = {
+    ".txt": read_text_lines,
+    ".docx": read_docx_lines,
+    ".pdf": read_pdf_lines,
+}
+
+
+def register_reader(extension: str, reader: DocumentReader):
+    """Read files with this extension (e.g. ".md") with reader"""
+    _READERS[extension.lower()] = reader
+
+
+def supported_extensions() -> Tuple[str, ...]:
+    """Extensions of the file types with a registered reader"""
+    return tuple(_READERS)
+
+
+def get_reader(file_path: str) -> DocumentReader:
+    """The reader for a file, by extension; text for unknown types"""
+    extension = os.path.splitext(file_path)[1].lower()
+    return _READERS.get(extension, read_text_lines)
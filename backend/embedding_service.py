@@ -0,0 +1,380 @@
+"""
+Embedding service with dynamic micro-batching.
+
+Concurrent embed requests (queries, course names, ingestion batches) are
+collected into micro-batches and run through one model call, which on CPU is
+several times faster per text than encoding them one at a time.
+
+The batcher runs in-process by default. For several serving processes it can
+run as a local sidecar instead, so all of them share one model and one batch
+queue:
+
+    python -m backend.embedding_service [--socket PATH]
+
+with EMBEDDING_SERVICE = "socket" in the config of the processes using it.
+"""
+
+import argparse
+import json
+import os
+import platform
+import queue
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .config import config
+
+# Request: payload length, then UTF-8 JSON list of texts
+_REQUEST_HEADER = struct.Struct("!I")
+# Response: status, rows and dim (for an error, dim is the message length),
+# then rows * dim float32 values or the UTF-8 error message
+_RESPONSE_HEADER = struct.Struct("!BII")
+_STATUS_OK = 0
+_STATUS_ERROR = 1
+
+# How the embedding model runs: full-precision PyTorch, PyTorch with int8
+# dynamically quantized linear layers, or ONNX Runtime with fp32 or int8 weights
+EMBEDDING_BACKENDS = ("torch", "torch-int8", "onnx", "onnx-int8")
+
+# Loaded models per (model name, backend), shared by every embedder in the
+# process and, through fork, by the workers of backend.serve
+_models: Dict[Tuple[str, str], Any] = {}
+_models_lock = threading.Lock()
+
+
+class MicroBatchEmbedder:
+    """
+    Embedding function that batches concurrent calls into one model call.
+
+    Calls are queued for a single worker thread. The worker takes the oldest
+    call, then keeps collecting queued calls until the batch holds
+    max_batch_size texts or max_wait_ms has passed, encodes the batch with one
+    encode() call and hands each caller its own slice. A call larger than
+    max_batch_size (e.g. an ingestion batch) is encoded on its own.
+    """
+
+    def __init__(
+        self,
+        encode: Callable[[List[str]], Sequence],
+        max_batch_size: int = 64,
+        max_wait_ms: float = 2.0,
+    ):
+        self.encode = encode
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue: "queue.Queue[Optional[Tuple[List[str], Future]]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+        self.batches = 0
+        self.texts = 0
+
+    def __call__(self, texts: Sequence[str]) -> List[np.ndarray]:
+        """Embed texts, sharing a model call with concurrent callers"""
+        texts = list(texts)
+        if not texts:
+            return []
+        self._start()
+        future: Future = Future()
+        self._queue.put((texts, future))
+        return future.result()
+
+    def _start(self):
+        # Started lazily, so a process that forks after building the embedder
+        # (see backend.serve) starts its own worker
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, name="embedding-batcher", daemon=True
+                )
+                self._worker.start()
+
+    def _run(self):
+        carry = None
+        while True:
+            request = carry if carry is not None else self._queue.get()
+            carry = None
+            if request is None:
+                return
+
+            batch = [request]
+            size = len(request[0])
+            deadline = time.monotonic() + self.max_wait
+            while size < self.max_batch_size:
+                try:
+                    request = self._queue.get(
+                        timeout=max(0.0, deadline - time.monotonic())
+                    )
+                except queue.Empty:
+                    break
+                if request is None or size + len(request[0]) > self.max_batch_size:
+                    # Shutdown or an overfull batch: handle it next round
+                    carry = request
+                    break
+                batch.append(request)
+                size += len(request[0])
+
+            self._encode_batch(batch)
+
+    def _encode_batch(self, batch: List[Tuple[List[str], Future]]):
+        texts = [text for request_texts, _ in batch for text in request_texts]
+        try:
+            embeddings = self.encode(texts)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.texts += len(texts)
+        offset = 0
+        for request_texts, future in batch:
+            future.set_result(list(embeddings[offset : offset + len(request_texts)]))
+            offset += len(request_texts)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "texts": self.texts,
+            "mean_batch_size": (
+                round(self.texts / self.batches, 2) if self.batches else 0.0
+            ),
+        }
+
+    def close(self):
+        """Stop the worker once queued calls are done"""
+        with self._lock:
+            worker = self._worker
+            self._worker = None
+        if worker is not None and worker.is_alive():
+            self._queue.put(None)
+            worker.join()
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("Embedding service connection closed")
+        data.extend(chunk)
+    return bytes(data)
+
+
+class _EmbeddingRequestHandler(socketserver.BaseRequestHandler):
+    """Serves embed requests on one client connection until it closes"""
+
+    def handle(self):
+        while True:
+            try:
+                (length,) = _REQUEST_HEADER.unpack(
+                    _recv_exactly(self.request, _REQUEST_HEADER.size)
+                )
+                texts = json.loads(_recv_exactly(self.request, length))
+            except ConnectionError:
+                return
+
+            try:
+                embeddings = np.asarray(
+                    self.server.embedder(texts), dtype=np.float32
+                ).reshape(len(texts), -1)
+                response = _RESPONSE_HEADER.pack(
+                    _STATUS_OK, *embeddings.shape
+                ) + embeddings.tobytes(order="C")
+            except Exception as e:
+                message = str(e).encode("utf-8")
+                response = (
+                    _RESPONSE_HEADER.pack(_STATUS_ERROR, 0, len(message)) + message
+                )
+            try:
+                self.request.sendall(response)
+            except OSError:
+                return  # The client gave up on this reply and disconnected
+
+
+class EmbeddingServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Unix-socket server exposing an embedder to other local processes.
+
+    Each connection is served by its own thread, and all threads call the same
+    MicroBatchEmbedder, so requests from different processes share batches.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, embedder: Callable[[List[str]], Sequence], socket_path: str):
+        self.embedder = embedder
+        self.socket_path = socket_path
+        if os.path.exists(socket_path):
+            os.remove(socket_path)  # Left behind by a server that died
+        super().__init__(socket_path, _EmbeddingRequestHandler)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+
+class RemoteEmbedder:
+    """Embedding function that calls an EmbeddingServer over its Unix socket"""
+
+    def __init__(self, socket_path: str, timeout: float = 30.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()  # One connection per thread
+
+    def _connection(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            self._local.sock = sock
+        return sock
+
+    def _disconnect(self):
+        sock = getattr(self._local, "sock", None)
+        self._local.sock = None
+        if sock is not None:
+            sock.close()
+
+    def __call__(self, texts: Sequence[str]) -> List[np.ndarray]:
+        texts = list(texts)
+        if not texts:
+            return []
+        payload = json.dumps(texts).encode("utf-8")
+        request = _REQUEST_HEADER.pack(len(payload)) + payload
+
+        # Retry once on a fresh connection (e.g. after the server restarted),
+        # but only while nothing of the reply has been received
+        for attempt in range(2):
+            received = False
+            try:
+                sock = self._connection()
+                sock.sendall(request)
+                status, rows, dim = _RESPONSE_HEADER.unpack(
+                    _recv_exactly(sock, _RESPONSE_HEADER.size)
+                )
+                received = True
+                body = _recv_exactly(
+                    sock, dim if status != _STATUS_OK else rows * dim * 4
+                )
+                break
+            except (ConnectionError, BrokenPipeError, FileNotFoundError):
+                self._disconnect()
+                if attempt or received:
+                    raise
+            except BaseException:
+                # E.g. a timeout: a late reply would be read as the answer to
+                # the next request, so the connection cannot be reused
+                self._disconnect()
+                raise
+
+        if status != _STATUS_OK:
+            raise RuntimeError(f"Embedding service error: {body.decode('utf-8')}")
+        return list(np.frombuffer(body, dtype=np.float32).reshape(rows, dim))
+
+    def close(self):
+        self._disconnect()
+
+
+def _onnx_int8_file() -> str:
+    """The pre-quantized ONNX export published with sentence-transformers models"""
+    if platform.machine().lower() in ("arm64", "aarch64"):
+        return "onnx/model_qint8_arm64.onnx"
+    return "onnx/model_quint8_avx2.onnx"
+
+
+def _load_model(model_name: str, backend: str):
+    from sentence_transformers import SentenceTransformer
+
+    if backend == "torch":
+        return SentenceTransformer(model_name, device="cpu")
+    if backend == "torch-int8":
+        import torch
+
+        model = SentenceTransformer(model_name, device="cpu")
+        # Linear layers hold nearly all of the weights; their int8 versions
+        # quantize activations on the fly, so no calibration data is needed
+        return torch.ao.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+        )
+    # ONNX Runtime needs `pip install optimum[onnxruntime]`
+    model_kwargs = {"file_name": _onnx_int8_file()} if backend == "onnx-int8" else None
+    return SentenceTransformer(
+        model_name, device="cpu", backend="onnx", model_kwargs=model_kwargs
+    )
+
+
+class ModelEmbedder:
+    """Embedding function running a sentence-transformers model on one backend"""
+
+    def __init__(self, model_name: str, backend: str = "torch"):
+        if backend not in EMBEDDING_BACKENDS:
+            raise ValueError(f"Unknown embedding backend: {backend}")
+        self.model_name = model_name
+        self.backend = backend
+        with _models_lock:
+            if (model_name, backend) not in _models:
+                _models[(model_name, backend)] = _load_model(model_name, backend)
+            self.model = _models[(model_name, backend)]
+
+    def __call__(self, texts: Sequence[str]) -> List[np.ndarray]:
+        embeddings = self.model.encode(list(texts), convert_to_numpy=True)
+        return [np.asarray(embedding, dtype=np.float32) for embedding in embeddings]
+
+
+def load_model_embedder(
+    model_name: str, backend: str = "torch"
+) -> Callable[[List[str]], Sequence]:
+    """The embedding model, run on the given backend, as a plain embedding function"""
+    return ModelEmbedder(model_name, backend)
+
+
+def create_embedder(config) -> Callable[[List[str]], Sequence]:
+    """Build the embedder selected by config.EMBEDDING_SERVICE"""
+    if config.EMBEDDING_SERVICE == "socket":
+        return RemoteEmbedder(config.EMBEDDING_SOCKET_PATH)
+    if config.EMBEDDING_SERVICE == "local":
+        return MicroBatchEmbedder(
+            load_model_embedder(config.EMBEDDING_MODEL, config.EMBEDDING_BACKEND),
+            config.EMBEDDING_MAX_BATCH_SIZE,
+            config.EMBEDDING_MAX_WAIT_MS,
+        )
+    raise ValueError(f"Unknown embedding service: {config.EMBEDDING_SERVICE}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m backend.embedding_service",
+        description="Serve micro-batched embeddings over a Unix socket",
+    )
+    parser.add_argument("--socket", default=config.EMBEDDING_SOCKET_PATH)
+    args = parser.parse_args(argv)
+
+    embedder = MicroBatchEmbedder(
+        load_model_embedder(config.EMBEDDING_MODEL, config.EMBEDDING_BACKEND),
+        config.EMBEDDING_MAX_BATCH_SIZE,
+        config.EMBEDDING_MAX_WAIT_MS,
+    )
+    with EmbeddingServer(embedder, args.socket) as server:
+        print(
+            f"Embedding {config.EMBEDDING_MODEL} ({config.EMBEDDING_BACKEND})"
+            f" on {args.socket}"
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
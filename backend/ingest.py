@@ -0,0 +1,108 @@
+"""
+Ingest course documents into the vector store shared by serving processes.
+
+In a multi-worker deployment (SERVER_ROLE = "serve", see backend/serve.py)
+serving processes open the store read-only and this command is the only
+writer. Run it after adding, changing or removing documents; serving
+processes reload the store within INDEX_REFRESH_INTERVAL seconds.
+
+    python -m backend.ingest [folder] [--clear] [--wait] [--migrate-context]
+"""
+
+import argparse
+import os
+import sys
+from typing import List, Optional
+
+from .config import config
+from .document_processor import DocumentProcessor
+from .embedding_service import create_embedder
+from .ingestion import IngestionPipeline
+from .ingestion_lock import IngestionInProgress, IngestionLock
+from .ingestion_manifest import IngestionManifest
+from .vector_store import EmbeddingMismatch, VectorStore
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m backend.ingest",
+        description="Ingest course documents into the shared vector store",
+    )
+    parser.add_argument(
+        "folder", nargs="?", default="docs", help="Folder of course documents"
+    )
+    parser.add_argument(
+        "--clear", action="store_true", help="Clear the store and rebuild it"
+    )
+    parser.add_argument(
+        "--wait",
+        action="store_true",
+        help="Wait for a running ingestion to finish instead of exiting",
+    )
+    parser.add_argument(
+        "--migrate-context",
+        action="store_true",
+        help="First re-embed stored chunks in the configured CHUNK_CONTEXT_MODE",
+    )
+    args = parser.parse_args(argv)
+
+    vector_store = VectorStore(
+        config.CHROMA_PATH,
+        config.EMBEDDING_MODEL,
+        config.MAX_RESULTS,
+        config.EMBEDDING_CACHE_SIZE,
+        config.SEARCH_MODE,
+        config.COURSE_NAME_MAX_DISTANCE,
+        embedder=create_embedder(config),
+        chunk_context=config.CHUNK_CONTEXT_MODE,
+    )
+    lock = IngestionLock(config.INGESTION_LOCK_PATH)
+    if args.migrate_context and not args.clear:
+        if not lock.acquire(blocking=args.wait):
+            print(f"Another ingestion is running ({lock.path}); use --wait")
+            return 1
+        try:
+            migrated = vector_store.migrate_chunk_context(config.EMBEDDING_BATCH_SIZE)
+            if migrated:
+                lock.publish()
+        finally:
+            lock.release()
+        print(f"Migrated {migrated} chunks to {config.CHUNK_CONTEXT_MODE!r} context")
+    if not args.clear:
+        # New chunks must be comparable with the ones already stored
+        try:
+            vector_store.verify_embeddings(config.EMBEDDING_MIN_SIMILARITY)
+        except EmbeddingMismatch as e:
+            print(e)
+            return 1
+
+    pipeline = IngestionPipeline(
+        DocumentProcessor(
+            config.CHUNK_SIZE, config.CHUNK_OVERLAP, config.PDF_PAGE_WORKERS
+        ),
+        vector_store,
+        batch_size=config.EMBEDDING_BATCH_SIZE,
+        workers=config.INGESTION_WORKERS,
+    )
+    manifest = IngestionManifest(
+        os.path.join(config.CHROMA_PATH, "ingestion_manifest.json")
+    )
+
+    try:
+        stats = pipeline.ingest_folder(
+            args.folder,
+            manifest,
+            lock=lock,
+            clear_existing=args.clear,
+            wait=args.wait,
+        )
+    except IngestionInProgress as e:
+        print(f"Another ingestion is running ({e}); use --wait to queue behind it")
+        return 1
+
+    print(stats.summary())
+    return 1 if stats.files_failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
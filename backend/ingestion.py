@@ -0,0 +1,527 @@
+import copy
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .document_processor import DocumentProcessor
+from .document_readers import supported_extensions
+from .ingestion_lock import IngestionInProgress, IngestionLock
+from .ingestion_manifest import IngestionManifest, ManifestEntry
+from .models import ChunkBatch, Course
+
+# Below this many files, process-pool startup costs more than it saves
+PARALLEL_PARSE_MIN_FILES = 8
+
+
+@dataclass
+class IngestionStats:
+    """Counters and per-stage timings for one ingestion run"""
+
+    files_seen: int = 0
+    files_skipped: int = 0
+    files_failed: int = 0
+    files_removed: int = 0
+    courses_added: int = 0  # New or updated courses
+    chunks_added: int = 0  # Chunks embedded and written
+    chunks_reused: int = 0  # Of those, written with an already computed embedding
+    chunks_removed: int = 0
+    parse_seconds: float = 0.0  # Summed across parser processes
+    embed_seconds: float = 0.0
+    write_seconds: float = 0.0
+    total_seconds: float = 0.0
+
+    @property
+    def changed(self) -> bool:
+        """Whether the run wrote to or deleted from the store"""
+        return bool(
+            self.courses_added
+            or self.chunks_added
+            or self.files_removed
+            or self.chunks_removed
+        )
+
+    def summary(self) -> str:
+        """One-line human readable report"""
+        return (
+            f"Ingested {self.courses_added} courses ({self.chunks_added} chunks, "
+            f"{self.chunks_reused} reused embeddings) "
+            f"from {self.files_seen} files, {self.files_skipped} skipped, "
+            f"{self.files_failed} failed, {self.files_removed} removed "
+            f"({self.chunks_removed} chunks) | parse {self.parse_seconds:.2f}s, "
+            f"embed {self.embed_seconds:.2f}s, write {self.write_seconds:.2f}s, "
+            f"total {self.total_seconds:.2f}s"
+        )
+
+
+def list_course_files(folder_path: str) -> List[str]:
+    """Get the course documents (files with a reader) in a folder, sorted by name"""
+    return [
+        os.path.join(folder_path, file_name)
+        for file_name in sorted(os.listdir(folder_path))
+        if os.path.isfile(os.path.join(folder_path, file_name))
+        and file_name.lower().endswith(supported_extensions())
+    ]
+
+
+def _parse_document(
+    processor: DocumentProcessor, file_path: str
+) -> Tuple[str, Optional[Course], ChunkBatch, float, Optional[str]]:
+    """Parse and chunk one document; runs inside a worker process"""
+    start = time.perf_counter()
+    try:
+        course, chunks = processor.process_course_document(file_path)
+        return file_path, course, chunks, time.perf_counter() - start, None
+    except Exception as e:
+        return file_path, None, ChunkBatch(), time.perf_counter() - start, str(e)
+
+
+class IngestionPipeline:
+    """
+    Pipelined ingestion of course documents.
+
+    Documents are parsed and chunked in a process pool, while the calling
+    thread embeds the resulting chunks in fixed-size batches and writes each
+    batch to the vector store in one bulk call. Chunks from consecutive
+    courses share batches, so small courses don't produce small writes.
+    """
+
+    def __init__(
+        self,
+        document_processor: DocumentProcessor,
+        vector_store,
+        batch_size: int = 64,
+        workers: int = 4,
+    ):
+        self.document_processor = document_processor
+        self.vector_store = vector_store
+        self.batch_size = max(1, batch_size)
+        self.workers = workers
+
+    def ingest(
+        self,
+        file_paths: Iterable[str],
+        existing_titles: Optional[Set[str]] = None,
+        manifest: Optional[IngestionManifest] = None,
+        folder_path: Optional[str] = None,
+        progress: Optional[Callable[[int, int], None]] = None,
+    ) -> IngestionStats:
+        """
+        Ingest course documents.
+
+        Without a manifest, documents whose course title is already known are
+        skipped and everything else is ingested in full. With a manifest the
+        run is incremental: see _plan_incremental and _prepare_incremental.
+        Files recorded in the manifest for the ingested folder but no longer
+        present are removed from the store. A file fails on its own, whether
+        it fails to parse or a batch holding its chunks fails to embed or
+        write; the other files are still ingested.
+
+        Args:
+            file_paths: Paths of course documents to ingest
+            existing_titles: Course titles already in the vector store
+            manifest: Ingestion manifest for incremental runs; saved on success
+            folder_path: Folder the files were listed from (defaults to their
+                parent folders); used to detect deleted files
+            progress: Called as progress(files_done, files_total) as files
+                are skipped or processed
+
+        Returns:
+            IngestionStats for the run
+        """
+        stats = IngestionStats()
+        run_start = time.perf_counter()
+        file_paths = list(file_paths)
+
+        if manifest is None:
+            to_parse = self._plan_by_title(file_paths, existing_titles, stats)
+            failed = self._run(
+                to_parse, stats, self._prepare_full, progress, len(file_paths)
+            )
+            for course_title in failed.values():
+                # Drop what was written, or the next run would skip it by title
+                try:
+                    self.vector_store.delete_course(course_title)
+                except Exception as e:
+                    print(f"Error removing partly written {course_title}: {e}")
+        else:
+            to_parse = self._plan_incremental(file_paths, manifest, stats)
+            failed = self._run(
+                to_parse,
+                stats,
+                lambda path, course, chunks: self._prepare_incremental(
+                    path, course, chunks, manifest, stats
+                ),
+                progress,
+                len(file_paths),
+            )
+            # Forget files whose chunks were not all written, so the next run
+            # ingests them again
+            for file_path in failed:
+                manifest.remove(file_path)
+            self._remove_missing(file_paths, manifest, stats, folder_path)
+            manifest.save()
+
+        stats.total_seconds = time.perf_counter() - run_start
+        return stats
+
+    def ingest_folder(
+        self,
+        folder_path: str,
+        manifest: IngestionManifest,
+        lock: Optional[IngestionLock] = None,
+        clear_existing: bool = False,
+        progress: Optional[Callable[[int, int], None]] = None,
+        wait: bool = False,
+    ) -> IngestionStats:
+        """
+        Incrementally ingest a course folder, holding the ingestion lock.
+
+        Only one process at a time may write to a store shared by several
+        processes. Once the run finishes a new generation is published, so
+        read-only processes know to reload.
+
+        Args:
+            folder_path: Folder containing course documents
+            manifest: Ingestion manifest of the store
+            lock: Lock shared by all processes using the store
+            clear_existing: Whether to clear the store first
+            progress: Called as progress(files_done, files_total)
+            wait: Wait for the lock instead of raising IngestionInProgress
+
+        Returns:
+            IngestionStats for the run
+        """
+        if lock is not None and not lock.acquire(blocking=wait):
+            raise IngestionInProgress(f"Ingestion lock {lock.path} is held")
+
+        changed = clear_existing
+        try:
+            if lock is not None:
+                # Another process may have ingested since the manifest was read
+                manifest.reload()
+            if clear_existing:
+                print("Clearing existing data for fresh rebuild...")
+                self.vector_store.clear_all_data()
+                manifest.clear()
+
+            if not os.path.exists(folder_path):
+                print(f"Folder {folder_path} does not exist")
+                return IngestionStats()
+
+            # Unchanged files are skipped using the manifest; changed files only
+            # re-embed the chunks that differ, and deleted files are removed
+            changed = True  # Until the run reports otherwise
+            stats = self.ingest(
+                list_course_files(folder_path),
+                manifest=manifest,
+                folder_path=folder_path,
+                progress=progress,
+            )
+            changed = clear_existing or stats.changed
+            return stats
+        finally:
+            if lock is not None:
+                # A failed run may have written part of its changes
+                if changed:
+                    lock.publish()
+                lock.release()
+
+    def _plan_by_title(
+        self,
+        file_paths: List[str],
+        existing_titles: Optional[Set[str]],
+        stats: IngestionStats,
+    ) -> List[str]:
+        """Skip known courses by title before paying for a full parse"""
+        known_titles = set(existing_titles or ())
+        to_parse = []
+        for file_path in file_paths:
+            stats.files_seen += 1
+            try:
+                title = self.document_processor.read_course_title(file_path)
+            except Exception as e:
+                print(f"Error processing {os.path.basename(file_path)}: {e}")
+                stats.files_failed += 1
+                continue
+
+            if title in known_titles:
+                print(f"Course already exists: {title} - skipping")
+                stats.files_skipped += 1
+                continue
+            known_titles.add(title)
+            to_parse.append(file_path)
+        return to_parse
+
+    def _plan_incremental(
+        self, file_paths: List[str], manifest: IngestionManifest, stats: IngestionStats
+    ) -> List[str]:
+        """
+        Select files that need parsing.
+
+        A file whose mtime and size match its manifest entry is skipped after a
+        single stat call; one whose bytes hash to the recorded content hash is
+        skipped after hashing. Everything else is parsed.
+        """
+        live_paths = {manifest.key(file_path) for file_path in file_paths}
+        claimed_titles = set()
+        to_parse = []
+        for file_path in file_paths:
+            stats.files_seen += 1
+            try:
+                stat = os.stat(file_path)
+                entry = manifest.get(file_path)
+                if entry and entry.matches_stat(stat):
+                    stats.files_skipped += 1
+                    continue
+
+                content_hash = manifest.hash_file(file_path)
+                if entry and entry.content_hash == content_hash:
+                    # Touched but not edited: remember the new stat and move on
+                    manifest.set(
+                        file_path,
+                        replace(entry, mtime=stat.st_mtime, size=stat.st_size),
+                    )
+                    stats.files_skipped += 1
+                    continue
+
+                title = self.document_processor.read_course_title(file_path)
+            except Exception as e:
+                print(f"Error processing {os.path.basename(file_path)}: {e}")
+                stats.files_failed += 1
+                continue
+
+            owner = manifest.title_owner(title)
+            duplicate = (
+                owner is not None
+                and owner != manifest.key(file_path)
+                and owner in live_paths
+            )
+            if duplicate or title in claimed_titles:
+                print(f"Course already exists: {title} - skipping")
+                stats.files_skipped += 1
+                continue
+            claimed_titles.add(title)
+            to_parse.append(file_path)
+        return to_parse
+
+    def _prepare_full(
+        self, file_path: str, course: Course, chunks: ChunkBatch
+    ) -> ChunkBatch:
+        """Chunks to write for a course ingested from scratch"""
+        return chunks
+
+    def _prepare_incremental(
+        self,
+        file_path: str,
+        course: Course,
+        chunks: ChunkBatch,
+        manifest: IngestionManifest,
+        stats: IngestionStats,
+    ) -> ChunkBatch:
+        """
+        Reconcile a changed file with what is stored for it.
+
+        Stale chunks (stored before but not produced now) are deleted, and only
+        chunks that are new or moved (e.g. to another lesson) are returned to
+        be written. Chunk IDs are content-addressed, so unchanged text keeps
+        its ID wherever it ends up in the file.
+        """
+        ids, documents, metadatas = self.vector_store.chunk_records(chunks)
+        # Position of the first chunk with each ID
+        first: Dict[str, int] = {}
+        for index, chunk_id in enumerate(ids):
+            first.setdefault(chunk_id, index)
+        new_ids = list(first)
+        entry = manifest.get(file_path)
+
+        if entry and entry.course_title != course.title:
+            # The course was renamed: drop everything stored under the old title
+            stats.chunks_removed += len(entry.chunk_ids)
+            self.vector_store.delete_course(entry.course_title)
+            old_ids = self.vector_store.get_course_chunk_ids(course.title)
+        elif entry:
+            old_ids = entry.chunk_ids
+        else:
+            old_ids = self.vector_store.get_course_chunk_ids(course.title)
+
+        stale_ids = sorted(set(old_ids) - set(new_ids))
+        self.vector_store.delete_course_content(stale_ids)
+        stats.chunks_removed += len(stale_ids)
+
+        stored = self.vector_store.get_chunks(new_ids)
+        changed = chunks.select(
+            index
+            for chunk_id, index in first.items()
+            if stored.get(chunk_id) != (documents[index], metadatas[index])
+        )
+
+        stat = os.stat(file_path)
+        manifest.set(
+            file_path,
+            ManifestEntry(
+                mtime=stat.st_mtime,
+                size=stat.st_size,
+                content_hash=manifest.hash_file(file_path),
+                course_title=course.title,
+                chunk_ids=new_ids,
+            ),
+        )
+        return changed
+
+    def _remove_missing(
+        self,
+        file_paths: List[str],
+        manifest: IngestionManifest,
+        stats: IngestionStats,
+        folder_path: Optional[str] = None,
+    ):
+        """Remove stored data for manifest files that no longer exist"""
+        live_paths = {manifest.key(file_path) for file_path in file_paths}
+        if folder_path is not None:
+            folders = {manifest.key(folder_path)}
+        else:
+            folders = {os.path.dirname(path) for path in live_paths}
+
+        for folder in folders:
+            for path in manifest.paths_in(folder):
+                if path in live_paths:
+                    continue
+                entry = manifest.entries[path]
+                manifest.remove(path)
+
+                owner = manifest.title_owner(entry.course_title)
+                if owner is None:
+                    self.vector_store.delete_course(entry.course_title)
+                    removed = len(entry.chunk_ids)
+                    print(f"Removed course: {entry.course_title} (file deleted)")
+                else:
+                    # Another file (e.g. the renamed original) now provides the course
+                    kept = set(manifest.entries[owner].chunk_ids)
+                    stale_ids = [i for i in entry.chunk_ids if i not in kept]
+                    self.vector_store.delete_course_content(stale_ids)
+                    removed = len(stale_ids)
+
+                stats.files_removed += 1
+                stats.chunks_removed += removed
+
+    def _run(
+        self,
+        file_paths: List[str],
+        stats: IngestionStats,
+        prepare: Callable[[str, Course, ChunkBatch], ChunkBatch],
+        progress: Optional[Callable[[int, int], None]] = None,
+        files_total: Optional[int] = None,
+    ) -> Dict[str, str]:
+        """
+        Parse files, then embed and write the chunks prepare() selects.
+
+        Returns:
+            Course title by file path of the files prepared but with chunks in
+            a batch that failed to embed or write
+        """
+        if files_total is None:
+            files_total = len(file_paths)
+        # Files dropped while planning (skipped or unreadable) are already done
+        files_done = files_total - len(file_paths)
+        if progress:
+            progress(files_done, files_total)
+
+        # File path by course title, to tell which files a failed batch hits
+        file_paths_by_title: Dict[str, str] = {}
+        failed: Dict[str, str] = {}
+
+        def write(batch: ChunkBatch):
+            try:
+                self._write_batch(batch, stats)
+            except Exception as e:
+                for course_title in dict.fromkeys(batch.course_titles):
+                    file_path = file_paths_by_title[course_title]
+                    if file_path in failed:
+                        continue
+                    print(f"Error writing {os.path.basename(file_path)}: {e}")
+                    failed[file_path] = course_title
+                    stats.files_failed += 1
+                    stats.courses_added -= 1
+
+        pending = ChunkBatch()
+        for file_path, course, chunks, parse_seconds, error in self._parse_all(
+            file_paths
+        ):
+            files_done += 1
+            if progress:
+                progress(files_done, files_total)
+            stats.parse_seconds += parse_seconds
+            if error is not None:
+                print(f"Error processing {os.path.basename(file_path)}: {error}")
+                stats.files_failed += 1
+                continue
+
+            try:
+                to_write = prepare(file_path, course, chunks)
+                self.vector_store.add_course_metadata(course)
+            except Exception as e:
+                print(f"Error processing {os.path.basename(file_path)}: {e}")
+                stats.files_failed += 1
+                continue
+
+            stats.courses_added += 1
+            if len(to_write) == len(chunks):
+                print(f"Added new course: {course.title} ({len(chunks)} chunks)")
+            else:
+                print(
+                    f"Updated course: {course.title} "
+                    f"({len(to_write)} of {len(chunks)} chunks changed)"
+                )
+
+            file_paths_by_title[course.title] = file_path
+            pending.extend(to_write)
+            if len(pending) >= self.batch_size:
+                written = 0
+                while len(pending) - written >= self.batch_size:
+                    write(pending[written : written + self.batch_size])
+                    written += self.batch_size
+                pending = pending[written:]
+
+        if pending:
+            write(pending)
+        return failed
+
+    def _parse_all(self, file_paths: List[str]) -> Iterator[Tuple]:
+        """
+        Yield parse results in input order, in parallel when worthwhile.
+
+        Pages of large PDFs are extracted in parallel only when files are
+        parsed one at a time; a page pool inside each parse worker would
+        oversubscribe the cores and pay process startup for every PDF.
+        """
+        if self.workers <= 1 or len(file_paths) < PARALLEL_PARSE_MIN_FILES:
+            for file_path in file_paths:
+                yield _parse_document(self.document_processor, file_path)
+            return
+
+        processor = copy.copy(self.document_processor)
+        processor.page_workers = 1
+        # Spawn rather than fork: the server process holds model weights and threads
+        with ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+        ) as pool:
+            yield from pool.map(
+                _parse_document,
+                [processor] * len(file_paths),
+                file_paths,
+            )
+
+    def _write_batch(self, chunks: ChunkBatch, stats: IngestionStats):
+        """Embed one batch's new text in a single model call and write it in bulk"""
+        start = time.perf_counter()
+        embeddings, reused = self.vector_store.embed_chunks(chunks)
+        embedded = time.perf_counter()
+        self.vector_store.add_course_content(chunks, embeddings=embeddings)
+
+        stats.embed_seconds += embedded - start
+        stats.write_seconds += time.perf_counter() - embedded
+        stats.chunks_added += len(chunks)
+        stats.chunks_reused += reused
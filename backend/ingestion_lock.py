@@ -0,0 +1,95 @@
+import os
+import uuid
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class IngestionInProgress(RuntimeError):
+    """Raised when another process holds the ingestion lock"""
+
+
+class IngestionLock:
+    """
+    Cross-process lock that lets one process at a time write to the vector
+    store, plus a generation marker that tells readers when the store changed.
+
+    The lock is an OS file lock (released automatically if the holder dies).
+    After each ingestion that changed the store the writer publishes a new
+    generation; read-only processes poll it and reload their view of the store
+    when it differs from the one they loaded.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.generation_path = f"{path}.generation"
+        self.last_published: Optional[str] = None  # By this process
+        self._file = None
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def acquire(self, blocking: bool = True) -> bool:
+        """Take the lock; without blocking, return False if another process has it"""
+        if self._file is not None:
+            return True
+
+        file = open(self.path, "a+")
+        try:
+            if fcntl is not None:
+                flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+                fcntl.flock(file.fileno(), flags)
+            else:
+                mode = msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK
+                msvcrt.locking(file.fileno(), mode, 1)
+        except OSError:
+            file.close()
+            if blocking:
+                raise
+            return False
+
+        self._file = file
+        return True
+
+    def release(self):
+        if self._file is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "IngestionLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+    def read_generation(self) -> Optional[str]:
+        """Get the last published generation, or None if nothing was published"""
+        try:
+            with open(self.generation_path, "r", encoding="utf-8") as file:
+                return file.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def publish(self) -> str:
+        """Record that the store changed; returns the new generation"""
+        generation = uuid.uuid4().hex
+        temp_path = f"{self.generation_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            file.write(generation)
+        os.replace(temp_path, self.generation_path)
+        self.last_published = generation
+        return generation
@@ -0,0 +1,95 @@
+import hashlib
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional
+
+
+@dataclass
+class ManifestEntry:
+    """What was ingested from one source file"""
+
+    mtime: float
+    size: int
+    content_hash: str  # SHA-256 of the file bytes
+    course_title: str
+    chunk_ids: List[str] = field(default_factory=list)
+
+    def matches_stat(self, stat: os.stat_result) -> bool:
+        """Check whether a file's stat still matches this entry"""
+        return self.mtime == stat.st_mtime and self.size == stat.st_size
+
+
+class IngestionManifest:
+    """Persisted map of source file path -> ManifestEntry, stored as JSON"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, ManifestEntry] = self._load()
+
+    def _load(self) -> Dict[str, ManifestEntry]:
+        """Load entries from disk; a missing or unreadable manifest is empty"""
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                raw = json.load(file)
+            return {path: ManifestEntry(**entry) for path, entry in raw.items()}
+        except Exception as e:
+            print(f"Error loading ingestion manifest {self.path}: {e}")
+            return {}
+
+    def reload(self):
+        """Re-read the manifest, e.g. after another process ingested"""
+        self.entries = self._load()
+
+    def save(self):
+        """Write the manifest atomically so a crash never leaves a partial file"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(
+                {path: asdict(entry) for path, entry in self.entries.items()}, file
+            )
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        """Forget all entries, e.g. after the vector store was wiped"""
+        self.entries = {}
+        self.save()
+
+    def get(self, file_path: str) -> Optional[ManifestEntry]:
+        return self.entries.get(self.key(file_path))
+
+    def set(self, file_path: str, entry: ManifestEntry):
+        self.entries[self.key(file_path)] = entry
+
+    def remove(self, file_path: str):
+        self.entries.pop(self.key(file_path), None)
+
+    def paths_in(self, folder_path: str) -> List[str]:
+        """Get manifest paths of files that lived directly in a folder"""
+        folder = self.key(folder_path)
+        return [path for path in self.entries if os.path.dirname(path) == folder]
+
+    def title_owner(self, course_title: str) -> Optional[str]:
+        """Get the manifest path of the file a course title was ingested from"""
+        for path, entry in self.entries.items():
+            if entry.course_title == course_title:
+                return path
+        return None
+
+    @staticmethod
+    def key(file_path: str) -> str:
+        return os.path.abspath(file_path)
+
+    @staticmethod
+    def hash_file(file_path: str) -> str:
+        """SHA-256 of a file's bytes, read in blocks"""
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as file:
+            for block in iter(lambda: file.read(1 << 20), b""):
+                digest.update(block)
+        return digest.hexdigest()
@@ -1,4 +1,6 @@
-from typing import List, Optional
+import sys
+from array import array
+from typing import Iterable, Iterator, List, Optional, Union, overload
 
 from pydantic import BaseModel
 
@@ -27,3 +29,160 @@ class CourseChunk(BaseModel):
     course_title: str  # Which course this chunk belongs to
     lesson_number: Optional[int] = None  # Which lesson this chunk is from
     chunk_index: int  # Position of this chunk in the document
+
+
+# Lesson number column value of chunks outside any lesson
+_NO_LESSON = -1
+
+
+class ChunkBatch:
+    """
+    Text chunks from courses, stored column by column.
+
+    Ingestion produces chunks by the hundred thousand, and a CourseChunk per
+    chunk means a validated pydantic object holding its own copy of the
+    "Course ... Lesson ... content:" prefix. A batch instead keeps parallel
+    columns: chunk texts without the prefix, course titles interned so all
+    chunks of a course share one string, and lesson numbers, chunk indices
+    and prefix flags in arrays. The full text of a chunk is built on demand
+    by content().
+
+    A batch reads like a sequence of CourseChunk: len(), iteration and
+    integer indexing build CourseChunk objects, slicing returns a batch.
+    """
+
+    __slots__ = (
+        "texts",
+        "course_titles",
+        "lesson_numbers",
+        "chunk_indices",
+        "prefixed",
+    )
+
+    def __init__(self):
+        self.texts: List[str] = []
+        self.course_titles: List[str] = []
+        self.lesson_numbers = array("q")  # _NO_LESSON outside lessons
+        self.chunk_indices = array("q")
+        self.prefixed = bytearray()  # 1 where content() prepends the prefix
+
+    @staticmethod
+    def prefix(course_title: str, lesson_number: int) -> str:
+        """Context prepended to the text of a chunk from a lesson"""
+        return f"Course {course_title} Lesson {lesson_number} content: "
+
+    @classmethod
+    def of(cls, chunks: Union["ChunkBatch", Iterable[CourseChunk]]) -> "ChunkBatch":
+        """The chunks as a batch; a batch is returned as is"""
+        if isinstance(chunks, ChunkBatch):
+            return chunks
+        batch = cls()
+        for chunk in chunks:
+            text = chunk.content
+            prefixed = False
+            if chunk.lesson_number is not None:
+                prefix = cls.prefix(chunk.course_title, chunk.lesson_number)
+                prefixed = text.startswith(prefix)
+                if prefixed:
+                    text = text[len(prefix) :]
+            batch.append(
+                text,
+                chunk.course_title,
+                chunk.lesson_number,
+                chunk.chunk_index,
+                prefixed,
+            )
+        return batch
+
+    def append(
+        self,
+        text: str,
+        course_title: str,
+        lesson_number: Optional[int],
+        chunk_index: int,
+        prefixed: bool = False,
+    ):
+        """Add a chunk; with prefixed, its content is text after the lesson prefix"""
+        self.texts.append(text)
+        self.course_titles.append(sys.intern(course_title))
+        self.lesson_numbers.append(
+            _NO_LESSON if lesson_number is None else lesson_number
+        )
+        self.chunk_indices.append(chunk_index)
+        self.prefixed.append(bool(prefixed and lesson_number is not None))
+
+    def extend(self, other: "ChunkBatch"):
+        """Add the chunks of another batch"""
+        self.texts.extend(other.texts)
+        self.course_titles.extend(other.course_titles)
+        self.lesson_numbers.extend(other.lesson_numbers)
+        self.chunk_indices.extend(other.chunk_indices)
+        self.prefixed.extend(other.prefixed)
+
+    def select(self, indices: Iterable[int]) -> "ChunkBatch":
+        """A batch of the chunks at these positions, in the given order"""
+        batch = ChunkBatch()
+        for index in indices:
+            batch.texts.append(self.texts[index])
+            batch.course_titles.append(self.course_titles[index])
+            batch.lesson_numbers.append(self.lesson_numbers[index])
+            batch.chunk_indices.append(self.chunk_indices[index])
+            batch.prefixed.append(self.prefixed[index])
+        return batch
+
+    def lesson_number(self, index: int) -> Optional[int]:
+        number = self.lesson_numbers[index]
+        return None if number == _NO_LESSON else number
+
+    def content(self, index: int, prefix: bool = True) -> str:
+        """Full text of a chunk; without prefix, its text after the lesson prefix"""
+        if prefix and self.prefixed[index]:
+            return (
+                self.prefix(self.course_titles[index], self.lesson_numbers[index])
+                + self.texts[index]
+            )
+        return self.texts[index]
+
+    def contents(self, prefix: bool = True) -> List[str]:
+        """Full texts of all chunks (see content)"""
+        return [self.content(index, prefix) for index in range(len(self.texts))]
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    @overload
+    def __getitem__(self, index: int) -> CourseChunk: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "ChunkBatch": ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            batch = ChunkBatch()
+            batch.texts = self.texts[index]
+            batch.course_titles = self.course_titles[index]
+            batch.lesson_numbers = self.lesson_numbers[index]
+            batch.chunk_indices = self.chunk_indices[index]
+            batch.prefixed = self.prefixed[index]
+            return batch
+        index = range(len(self.texts))[index]  # Negative indices, IndexError
+        return CourseChunk(
+            content=self.content(index),
+            course_title=self.course_titles[index],
+            lesson_number=self.lesson_number(index),
+            chunk_index=self.chunk_indices[index],
+        )
+
+    def __iter__(self) -> Iterator[CourseChunk]:
+        for index in range(len(self.texts)):
+            yield self[index]
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, ChunkBatch):
+            return NotImplemented
+        return all(
+            getattr(self, column) == getattr(other, column) for column in self.__slots__
+        )
+
+    def __repr__(self) -> str:
+        return f"ChunkBatch({len(self.texts)} chunks)"
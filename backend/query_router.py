@@ -0,0 +1,143 @@
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+_LESSON_PATTERN = re.compile(r"\blesson\s+(\d+)\b", re.IGNORECASE)
+_ACRONYM_PATTERN = re.compile(r"\b[A-Z]{2,}\b")
+
+# Words that say the question is about the course materials themselves
+CONTENT_KEYWORDS = {
+    "course",
+    "courses",
+    "lesson",
+    "lessons",
+    "instructor",
+    "taught",
+    "teach",
+    "teaches",
+    "covered",
+    "covers",
+    "cover",
+}
+
+# Function words, which never identify a course
+STOPWORDS = {
+    "a",
+    "an",
+    "and",
+    "the",
+    "of",
+    "for",
+    "with",
+    "to",
+    "in",
+    "on",
+}
+
+# A title word shared by at least this fraction of the catalog titles (and by
+# more than one) does not tell courses apart either
+COMMON_TITLE_WORD_SHARE = 0.5
+
+
+def _tokens(text: str) -> List[str]:
+    return _TOKEN_PATTERN.findall(text.casefold())
+
+
+def common_title_words(titles: List[str]) -> FrozenSet[str]:
+    """Words in so many catalog titles that they identify no course"""
+    counts = Counter(word for title in titles for word in set(_tokens(title)))
+    return frozenset(
+        word
+        for word, count in counts.items()
+        if count > 1 and count >= COMMON_TITLE_WORD_SHARE * len(titles)
+    )
+
+
+@dataclass
+class Route:
+    """Up-front retrieval decision for a query"""
+
+    course_name: Optional[str] = None
+    lesson_number: Optional[int] = None
+
+    def tool_args(self, query: str) -> Dict[str, Any]:
+        """Arguments for search_course_content"""
+        args: Dict[str, Any] = {"query": query}
+        if self.course_name:
+            args["course_name"] = self.course_name
+        if self.lesson_number is not None:
+            args["lesson_number"] = self.lesson_number
+        return args
+
+
+class QueryRouter:
+    """
+    Decides locally whether a question needs course retrieval, and with which
+    filters, so the answer can be generated in a single LLM call.
+
+    A course is recognised from the question by a catalog title (or one of
+    its acronyms) appearing in it, by enough of a title's distinctive words,
+    or failing that by embedding similarity to the catalog titles within
+    max_title_distance. A "lesson N" mention sets the lesson filter. Questions
+    naming no course but using course vocabulary ("lesson", "instructor", ...)
+    are searched unfiltered. Anything else is ambiguous: route() returns None
+    and the caller falls back to LLM tool calling.
+    """
+
+    def __init__(self, vector_store, max_title_distance: float = 0.9):
+        self.vector_store = vector_store
+        self.max_title_distance = max_title_distance
+        # common_title_words of the last catalog seen, recomputed when it changes
+        self._common_words: Tuple[Tuple[str, ...], FrozenSet[str]] = ((), frozenset())
+
+    def route(self, query: str) -> Optional[Route]:
+        """Get the retrieval route for a query, or None if it is ambiguous"""
+        tokens = set(_tokens(query))
+        lesson_match = _LESSON_PATTERN.search(query)
+        lesson_number = int(lesson_match.group(1)) if lesson_match else None
+
+        course_title = self._match_title(query, tokens)
+        if course_title is None:
+            nearest = self.vector_store.nearest_course_title(query)
+            if nearest is not None and nearest[1] <= self.max_title_distance:
+                course_title = nearest[0]
+
+        if course_title is not None:
+            return Route(course_name=course_title, lesson_number=lesson_number)
+        if lesson_number is None and tokens & CONTENT_KEYWORDS:
+            return Route()
+        # A lesson number without a course, or no sign of course content
+        return None
+
+    def _match_title(self, query: str, tokens: set) -> Optional[str]:
+        """Find the one catalog title a query clearly names, if any"""
+        folded = " ".join(query.casefold().split())
+        scores = {}
+        titles = self.vector_store.get_existing_course_titles()
+        non_distinctive = STOPWORDS | self._common_title_words(titles)
+        for title in titles:
+            if title.casefold() in folded:
+                return title
+
+            acronyms = {word.casefold() for word in _ACRONYM_PATTERN.findall(title)}
+            distinctive = set(_tokens(title)) - non_distinctive
+            matched = len(distinctive & tokens)
+            if acronyms & tokens:
+                scores[title] = 1.0
+            elif distinctive and (matched >= 2 or matched / len(distinctive) >= 0.5):
+                scores[title] = matched / len(distinctive)
+
+        if not scores:
+            return None
+        ranked = sorted(scores.items(), key=lambda item: -item[1])
+        if len(ranked) > 1 and ranked[0][1] == ranked[1][1]:
+            return None  # Equally good matches: leave it to the LLM
+        return ranked[0][0]
+
+    def _common_title_words(self, titles: List[str]) -> FrozenSet[str]:
+        key = tuple(titles)
+        if self._common_words[0] != key:
+            self._common_words = (key, common_title_words(titles))
+        return self._common_words[1]
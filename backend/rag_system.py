@@ -1,12 +1,26 @@
+import asyncio
 import os
-from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
 
 from .ai_generator import AIGenerator
 from .document_processor import DocumentProcessor
+from .embedding_service import create_embedder
+from .ingestion import IngestionPipeline
+from .ingestion_lock import IngestionLock
+from .ingestion_manifest import IngestionManifest
 from .models import Course
-from .search_tools import CourseSearchTool, ToolManager
-from .session_manager import SessionManager
-from .vector_store import VectorStore
+from .query_router import QueryRouter
+from .response_cache import CachedResponse, ResponseCache
+from .search_tools import CourseSearchTool, RequestContext, ToolManager
+from .semantic_cache import SemanticCache
+from .session_manager import (
+    InMemorySessionStore,
+    SessionManager,
+    SessionStore,
+    SQLiteSessionStore,
+)
+from .vector_store import SearchResults, VectorStore
 
 
 class RAGSystem:
@@ -17,19 +31,87 @@ class RAGSystem:
 
         # Initialize core components
         self.document_processor = DocumentProcessor(
-            config.CHUNK_SIZE, config.CHUNK_OVERLAP
+            config.CHUNK_SIZE, config.CHUNK_OVERLAP, config.PDF_PAGE_WORKERS
         )
         self.vector_store = VectorStore(
-            config.CHROMA_PATH, config.EMBEDDING_MODEL, config.MAX_RESULTS
+            config.CHROMA_PATH,
+            config.EMBEDDING_MODEL,
+            config.MAX_RESULTS,
+            config.EMBEDDING_CACHE_SIZE,
+            config.SEARCH_MODE,
+            config.COURSE_NAME_MAX_DISTANCE,
+            read_only=config.SERVER_ROLE == "serve",
+            embedder=create_embedder(config),
+            chunk_context=config.CHUNK_CONTEXT_MODE,
+        )
+        self.ai_generator = AIGenerator(
+            config.PERPLEXITY_MODEL, tool_timeout=config.TOOL_TIMEOUT_SECONDS
+        )
+        self.session_manager = SessionManager(
+            config.MAX_HISTORY, self._create_session_store(config)
         )
-        self.ai_generator = AIGenerator(config.PERPLEXITY_MODEL)
-        self.session_manager = SessionManager(config.MAX_HISTORY)
 
         # Initialize search tools
         self.tool_manager = ToolManager()
         self.search_tool = CourseSearchTool(self.vector_store)
         self.tool_manager.register_tool(self.search_tool)
 
+        # Optional up-front routing that answers course questions in one LLM call
+        self.query_router = QueryRouter(
+            self.vector_store, config.ROUTER_COURSE_MAX_DISTANCE
+        )
+
+        self.ingestion_pipeline = IngestionPipeline(
+            self.document_processor,
+            self.vector_store,
+            batch_size=config.EMBEDDING_BATCH_SIZE,
+            workers=config.INGESTION_WORKERS,
+        )
+        # Tracks which files were ingested so folder reloads are incremental
+        self.ingestion_manifest = IngestionManifest(
+            os.path.join(config.CHROMA_PATH, "ingestion_manifest.json")
+        )
+        # Serializes ingestion across processes sharing CHROMA_PATH; the
+        # generation it publishes tells this process when to reload the store
+        self.ingestion_lock = IngestionLock(config.INGESTION_LOCK_PATH)
+        self.index_generation = self.ingestion_lock.read_generation()
+
+        # Answers to standalone questions, invalidated by any corpus change
+        self.response_cache = ResponseCache(
+            config.RESPONSE_CACHE_SIZE, config.RESPONSE_CACHE_TTL
+        )
+        # Paraphrases of cached questions, matched on query-embedding similarity
+        self.semantic_cache = SemanticCache(
+            config.SEMANTIC_CACHE_SIZE,
+            config.SEMANTIC_CACHE_THRESHOLD,
+            config.RESPONSE_CACHE_TTL,
+        )
+
+        # Bounded pool for blocking retrieval work (embedding + ChromaDB) so the
+        # async query path never runs it on the event loop
+        self.executor = ThreadPoolExecutor(
+            max_workers=config.RETRIEVAL_WORKERS, thread_name_prefix="rag-retrieval"
+        )
+        # Tool calls get their own pool: a timed-out call keeps its thread until
+        # it returns, and must not starve retrieval while it does
+        self.tool_executor = ThreadPoolExecutor(
+            max_workers=config.TOOL_WORKERS, thread_name_prefix="rag-tools"
+        )
+
+    @staticmethod
+    def _create_session_store(config) -> SessionStore:
+        """Build the session store selected by config.SESSION_BACKEND"""
+        if config.SESSION_BACKEND == "sqlite":
+            return SQLiteSessionStore(
+                config.SESSION_DB_PATH,
+                config.MAX_SESSIONS,
+                config.SESSION_TTL_SECONDS,
+                config.SESSION_EVICTION_INTERVAL,
+            )
+        if config.SESSION_BACKEND == "memory":
+            return InMemorySessionStore(config.MAX_SESSIONS, config.SESSION_TTL_SECONDS)
+        raise ValueError(f"Unknown session backend: {config.SESSION_BACKEND}")
+
     def add_course_document(self, file_path: str) -> Tuple[Course, int]:
         """
         Add a single course document to the knowledge base.
@@ -41,24 +123,30 @@ class RAGSystem:
             Tuple of (Course object, number of chunks created)
         """
         try:
-            # Process the document
-            course, course_chunks = self.document_processor.process_course_document(
-                file_path
-            )
+            chunk_count = 0
+            with self.document_processor.open_document(file_path) as lines:
+                course, events = self.document_processor.stream_course_document(
+                    lines, os.path.basename(file_path)
+                )
+                # Embed each lesson's chunks as soon as the lesson is parsed
+                for _, lesson_chunks in events:
+                    self.vector_store.add_course_content(lesson_chunks)
+                    chunk_count += len(lesson_chunks)
 
-            # Add course metadata to vector store for semantic search
+            # Add course metadata (complete once all lessons are parsed) to
+            # vector store for semantic search
             self.vector_store.add_course_metadata(course)
 
-            # Add course content chunks to vector store
-            self.vector_store.add_course_content(course_chunks)
-
-            return course, len(course_chunks)
+            return course, chunk_count
         except Exception as e:
             print(f"Error processing course document {file_path}: {e}")
             raise e
 
     def add_course_folder(
-        self, folder_path: str, clear_existing: bool = False
+        self,
+        folder_path: str,
+        clear_existing: bool = False,
+        progress: Optional[Callable[[int, int], None]] = None,
     ) -> Tuple[int, int]:
         """
         Add all course documents from a folder.
@@ -66,64 +154,132 @@ class RAGSystem:
         Args:
             folder_path: Path to folder containing course documents
             clear_existing: Whether to clear existing data first
+            progress: Optional callback receiving (files_done, files_total)
 
         Returns:
-            Tuple of (total courses added, total chunks created)
-        """
-        total_courses = 0
-        total_chunks = 0
-
-        # Clear existing data if requested
-        if clear_existing:
-            print("Clearing existing data for fresh rebuild...")
-            self.vector_store.clear_all_data()
-
-        if not os.path.exists(folder_path):
-            print(f"Folder {folder_path} does not exist")
-            return 0, 0
-
-        # Get existing course titles to avoid re-processing
-        existing_course_titles = set(self.vector_store.get_existing_course_titles())
-
-        # Process each file in the folder
-        for file_name in os.listdir(folder_path):
-            file_path = os.path.join(folder_path, file_name)
-            if os.path.isfile(file_path) and file_name.lower().endswith(
-                (".pdf", ".docx", ".txt")
-            ):
-                try:
-                    # Check if this course might already exist
-                    # We'll process the document to get the course ID, but only add if new
-                    course, course_chunks = (
-                        self.document_processor.process_course_document(file_path)
-                    )
+            Tuple of (courses added or updated, chunks embedded)
+
+        Raises:
+            IngestionInProgress: If another process is ingesting into the store
+            RuntimeError: If the store is open read-only (SERVER_ROLE "serve")
+        """
+        if self.vector_store.read_only:
+            raise RuntimeError(
+                "Vector store is open read-only; ingest with `python -m backend.ingest`"
+            )
+
+        stats = self.ingestion_pipeline.ingest_folder(
+            folder_path,
+            self.ingestion_manifest,
+            lock=self.ingestion_lock,
+            clear_existing=clear_existing,
+            progress=progress,
+        )
+        # This process already sees its own writes
+        if self.ingestion_lock.last_published is not None:
+            self.index_generation = self.ingestion_lock.last_published
+        print(stats.summary())
+
+        return stats.courses_added, stats.chunks_added
 
-                    if course and course.title not in existing_course_titles:
-                        # This is a new course - add it to the vector store
-                        self.vector_store.add_course_metadata(course)
-                        self.vector_store.add_course_content(course_chunks)
-                        total_courses += 1
-                        total_chunks += len(course_chunks)
-                        print(
-                            f"Added new course: {course.title} ({len(course_chunks)} chunks)"
-                        )
-                        existing_course_titles.add(course.title)
-                    elif course:
-                        print(f"Course already exists: {course.title} - skipping")
-                except Exception as e:
-                    print(f"Error processing {file_name}: {e}")
-
-        return total_courses, total_chunks
+    def refresh_index(self) -> bool:
+        """
+        Reload the vector store if another process ingested since it was loaded.
+
+        Returns:
+            Whether the store was reloaded
+        """
+        generation = self.ingestion_lock.read_generation()
+        if generation == self.index_generation:
+            return False
+        self.vector_store.reload()
+        self.index_generation = generation
+        return True
+
+    def _cache_key(
+        self, query: str, history: Optional[str], use_cache: bool
+    ) -> Optional[Tuple[str, int]]:
+        """Response cache key for a query, or None if it must not be cached"""
+        # Follow-up questions depend on the conversation, so only standalone
+        # questions are answered from (and stored in) the cache
+        if not use_cache or history:
+            return None
+        return self.response_cache.key(query, self.vector_store.corpus_version)
+
+    def _lookup_cache(
+        self, query: str, history: Optional[str], use_cache: bool
+    ) -> Tuple[Optional[Tuple[str, int]], Optional[CachedResponse]]:
+        """
+        Look a query up in the exact, then the semantic answer cache.
+
+        Returns:
+            Tuple of (cache key or None if not cacheable, cached response or None)
+        """
+        cache_key = self._cache_key(query, history, use_cache)
+        if cache_key is None:
+            return None, None
+
+        cached = self.response_cache.get(cache_key)
+        if cached is None and self.semantic_cache.enabled:
+            cached = self.semantic_cache.get(
+                query, self.vector_store.embed_query(query), cache_key[1]
+            )
+        return cache_key, cached
+
+    def _store_cache(
+        self,
+        cache_key: Tuple[str, int],
+        query: str,
+        answer: str,
+        sources: List,
+        tool_calls: List,
+    ):
+        """Store an answer in both answer caches"""
+        self.response_cache.put(cache_key, answer, sources, tool_calls)
+        if self.semantic_cache.enabled:
+            self.semantic_cache.put(
+                query,
+                self.vector_store.embed_query(query),
+                cache_key[1],
+                answer,
+                sources,
+                tool_calls,
+            )
+
+    def _routed_search(
+        self, query: str, history: Optional[str], request_context: RequestContext
+    ) -> Optional[str]:
+        """
+        Retrieve for a query chosen by the local router when PRE_ROUTING is on.
+
+        Returns:
+            The search tool's output to answer from, or None when the query
+            should go through LLM tool calling instead
+        """
+        # Follow-ups may refer to a course named only earlier in the conversation
+        if not self.config.PRE_ROUTING or history:
+            return None
+        route = self.query_router.route(query)
+        if route is None:
+            return None
+        return self.tool_manager.execute_tool(
+            "search_course_content", context=request_context, **route.tool_args(query)
+        )
 
     def query(
-        self, query: str, session_id: Optional[str] = None
+        self, query: str, session_id: Optional[str] = None, use_cache: bool = True
     ) -> Tuple[str, List[str]]:
         """
         Process a user query using the RAG system with tool-based search.
 
+        Reentrant: tool calls and sources are tracked per query, so one
+        RAGSystem can serve concurrent queries from several threads.
+
         Args:
             query: User's question
             session_id: Optional session ID for conversation context
+            use_cache: Whether a standalone question may be answered from the
+                response cache
 
         Returns:
             Tuple of (response, sources list - empty for tool-based approach)
@@ -136,19 +292,32 @@ class RAGSystem:
         if session_id:
             history = self.session_manager.get_conversation_history(session_id)
 
-        # Generate response using AI with tools
-        response = self.ai_generator.generate_response(
-            query=prompt,
-            conversation_history=history,
-            tools=self.tool_manager.get_tool_definitions(),
-            tool_manager=self.tool_manager,
-        )
+        cache_key, cached = self._lookup_cache(query, history, use_cache)
+        if cached:
+            if session_id:
+                self.session_manager.add_exchange(session_id, query, cached.answer)
+            return cached.answer, cached.sources
 
-        # Get sources from the search tool
-        sources = self.tool_manager.get_last_sources()
+        # Tool outputs of this query only, so concurrent queries can't mix them
+        request_context = RequestContext()
+        context = self._routed_search(query, history, request_context)
+        if context is not None:
+            # Retrieval already happened: answer in a single LLM call
+            response = self.ai_generator.generate_with_context(prompt, context)
+        else:
+            # Generate response using AI with tools
+            response = self.ai_generator.generate_response(
+                query=prompt,
+                conversation_history=history,
+                tools=self.tool_manager.get_tool_definitions(),
+                tool_manager=self.tool_manager.for_request(request_context),
+                executor=self.tool_executor,
+            )
 
-        # Reset sources after retrieving them
-        self.tool_manager.reset_sources()
+        # Sources from this query's tool searches
+        sources, tool_calls = request_context.sources, request_context.tool_calls
+        if cache_key:
+            self._store_cache(cache_key, query, response, sources, tool_calls)
 
         # Update conversation history
         if session_id:
@@ -157,6 +326,296 @@ class RAGSystem:
         # Return response with sources from tool searches
         return response, sources
 
+    async def aquery(
+        self, query: str, session_id: Optional[str] = None, use_cache: bool = True
+    ) -> Tuple[str, List[str]]:
+        """
+        Async variant of query for use from the FastAPI event loop.
+
+        LLM calls are awaited through the client's async API and tool execution
+        is dispatched to the tool executor.
+
+        Args:
+            query: User's question
+            session_id: Optional session ID for conversation context
+            use_cache: Whether a standalone question may be answered from the
+                response cache
+
+        Returns:
+            Tuple of (response, sources list)
+        """
+        prompt = f"""Answer this question about course materials: {query}"""
+
+        loop = asyncio.get_running_loop()
+        # Session stores may block on disk (SQLite), so keep them off the loop
+        history = None
+        if session_id:
+            history = await loop.run_in_executor(
+                self.executor, self.session_manager.get_conversation_history, session_id
+            )
+
+        # The semantic lookup embeds the query, so keep it off the event loop
+        cache_key, cached = await loop.run_in_executor(
+            self.executor, self._lookup_cache, query, history, use_cache
+        )
+        if cached:
+            if session_id:
+                await loop.run_in_executor(
+                    self.executor,
+                    self.session_manager.add_exchange,
+                    session_id,
+                    query,
+                    cached.answer,
+                )
+            return cached.answer, cached.sources
+
+        request_context = RequestContext()
+        context = await loop.run_in_executor(
+            self.executor, self._routed_search, query, history, request_context
+        )
+        if context is not None:
+            response = await self.ai_generator.agenerate_with_context(prompt, context)
+        else:
+            response = await self.ai_generator.agenerate_response(
+                query=prompt,
+                conversation_history=history,
+                tools=self.tool_manager.get_tool_definitions(),
+                tool_manager=self.tool_manager.for_request(request_context),
+                executor=self.tool_executor,
+            )
+
+        sources, tool_calls = request_context.sources, request_context.tool_calls
+        if cache_key:
+            await loop.run_in_executor(
+                self.executor,
+                self._store_cache,
+                cache_key,
+                query,
+                response,
+                sources,
+                tool_calls,
+            )
+
+        if session_id:
+            await loop.run_in_executor(
+                self.executor,
+                self.session_manager.add_exchange,
+                session_id,
+                query,
+                response,
+            )
+
+        return response, sources
+
+    async def astream_query(
+        self, query: str, session_id: Optional[str] = None, use_cache: bool = True
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Stream a query's answer as (event, data) pairs.
+
+        Yields ("token", text) for each piece of the answer as it arrives, then
+        ("sources", sources list) and finally ("done", None) once the exchange
+        has been written to the session history. A cached answer is yielded as a
+        single token.
+
+        Args:
+            query: User's question
+            session_id: Optional session ID for conversation context
+            use_cache: Whether a standalone question may be answered from the
+                response cache
+        """
+        prompt = f"""Answer this question about course materials: {query}"""
+
+        loop = asyncio.get_running_loop()
+        # Session stores may block on disk (SQLite), so keep them off the loop
+        history = None
+        if session_id:
+            history = await loop.run_in_executor(
+                self.executor, self.session_manager.get_conversation_history, session_id
+            )
+
+        cache_key, cached = await loop.run_in_executor(
+            self.executor, self._lookup_cache, query, history, use_cache
+        )
+        if cached:
+            yield "token", cached.answer
+            yield "sources", cached.sources
+            if session_id:
+                await loop.run_in_executor(
+                    self.executor,
+                    self.session_manager.add_exchange,
+                    session_id,
+                    query,
+                    cached.answer,
+                )
+            yield "done", None
+            return
+
+        request_context = RequestContext()
+        context = await loop.run_in_executor(
+            self.executor, self._routed_search, query, history, request_context
+        )
+        if context is not None:
+            stream = self.ai_generator.astream_with_context(prompt, context)
+        else:
+            stream = self.ai_generator.astream_response(
+                query=prompt,
+                conversation_history=history,
+                tools=self.tool_manager.get_tool_definitions(),
+                tool_manager=self.tool_manager.for_request(request_context),
+                executor=self.tool_executor,
+            )
+
+        tokens = []
+        async for token in stream:
+            tokens.append(token)
+            yield "token", token
+
+        sources, tool_calls = request_context.sources, request_context.tool_calls
+        yield "sources", sources
+
+        answer = "".join(tokens)
+        if cache_key:
+            await loop.run_in_executor(
+                self.executor,
+                self._store_cache,
+                cache_key,
+                query,
+                answer,
+                sources,
+                tool_calls,
+            )
+
+        if session_id:
+            await loop.run_in_executor(
+                self.executor,
+                self.session_manager.add_exchange,
+                session_id,
+                query,
+                answer,
+            )
+
+        yield "done", None
+
+    async def aquery_batch(
+        self, queries: List[str], use_cache: bool = True
+    ) -> List[Dict[str, Any]]:
+        """
+        Answer many standalone questions with one shared retrieval pass.
+
+        All queries are embedded in one model call and searched with a single
+        multi-query ChromaDB request. Each question then gets one LLM call
+        grounded in its own results, with at most BATCH_CONCURRENCY calls in
+        flight. Cached answers are returned without retrieval or LLM calls. If
+        the shared retrieval fails, queries are retrieved one at a time so a
+        bad query only fails itself.
+
+        Args:
+            queries: Standalone questions (no session context)
+            use_cache: Whether questions may be answered from the response cache
+
+        Returns:
+            One dict per query, in order, with "answer", "sources" and "error"
+            (None unless that query failed)
+        """
+        loop = asyncio.get_running_loop()
+
+        def retrieve_one(query: str):
+            """Cache lookup and search for one query, or its error"""
+            try:
+                cache_key, cached = self._lookup_cache(query, None, use_cache)
+                if cached:
+                    return (cache_key, cached), None
+                return (cache_key, None), self.vector_store.search(query)
+            except Exception as e:
+                return (None, None), SearchResults.empty(f"Search error: {str(e)}")
+
+        def retrieve():
+            try:
+                # Fills the embedding cache, so cache lookups and search reuse it
+                self.vector_store.embed_queries(queries)
+                lookups = [
+                    self._lookup_cache(query, None, use_cache) for query in queries
+                ]
+                pending = [
+                    index for index, (_, cached) in enumerate(lookups) if not cached
+                ]
+                searches = self.vector_store.search_batch([queries[i] for i in pending])
+                if not any(results.error for results in searches):
+                    return lookups, dict(zip(pending, searches))
+            except Exception:
+                pass
+            # The shared pass fails as a whole, e.g. on one text the embedder
+            # rejects: retry query by query so only the culprits get an error
+            outcomes = [retrieve_one(query) for query in queries]
+            lookups = [lookup for lookup, _ in outcomes]
+            searches = {
+                index: results
+                for index, (_, results) in enumerate(outcomes)
+                if results is not None
+            }
+            return lookups, searches
+
+        lookups, searches = await loop.run_in_executor(self.executor, retrieve)
+        semaphore = asyncio.Semaphore(self.config.BATCH_CONCURRENCY)
+
+        async def answer(index: int) -> Dict[str, Any]:
+            query = queries[index]
+            cache_key, cached = lookups[index]
+            if cached:
+                return {
+                    "answer": cached.answer,
+                    "sources": cached.sources,
+                    "error": None,
+                }
+
+            results = searches[index]
+            if results.error:
+                return {"answer": None, "sources": [], "error": results.error}
+
+            context, sources = self.search_tool.format_context(results)
+            prompt = f"""Answer this question about course materials: {query}"""
+            try:
+                async with semaphore:
+                    response = await self.ai_generator.agenerate_with_context(
+                        prompt, context
+                    )
+            except Exception as e:
+                return {"answer": None, "sources": [], "error": str(e)}
+
+            if cache_key:
+                tool_calls = [("search_course_content", {"query": query})]
+                await loop.run_in_executor(
+                    self.executor,
+                    self._store_cache,
+                    cache_key,
+                    query,
+                    response,
+                    sources,
+                    tool_calls,
+                )
+            return {"answer": response, "sources": sources, "error": None}
+
+        return await asyncio.gather(*(answer(i) for i in range(len(queries))))
+
+    def query_batch(
+        self, queries: List[str], use_cache: bool = True
+    ) -> List[Dict[str, Any]]:
+        """
+        Blocking variant of aquery_batch for scripts and evaluation jobs.
+
+        Must not be called from a running event loop.
+        """
+        return asyncio.run(self.aquery_batch(queries, use_cache))
+
+    def get_cache_stats(self) -> Dict:
+        """Get hit-rate metrics of the answer and embedding caches"""
+        return {
+            "response_cache": self.response_cache.stats(),
+            "semantic_cache": self.semantic_cache.stats(),
+            "embedding_cache": self.vector_store.embedding_cache.stats(),
+        }
+
     def get_course_analytics(self) -> Dict:
         """Get analytics about the course catalog"""
         return {
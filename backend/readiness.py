@@ -0,0 +1,74 @@
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+class Readiness:
+    """Tracks background startup of the RAG system for readiness checks"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started_at = time.monotonic()
+        self.stage = "starting"  # starting -> loading -> ready | failed
+        self.detail: Optional[str] = None
+        self.error: Optional[str] = None
+        self.ready_after: Optional[float] = None  # Seconds from start to ready
+
+        # Ingestion keeps running in the background after the system is ready
+        # pending -> running -> done | failed, or skipped if another process ingests
+        self.ingestion_state = "pending"
+        self.files_done = 0
+        self.files_total = 0
+
+    @property
+    def is_ready(self) -> bool:
+        return self.stage == "ready"
+
+    @property
+    def has_failed(self) -> bool:
+        return self.stage == "failed"
+
+    def set_stage(self, stage: str, detail: Optional[str] = None):
+        with self._lock:
+            self.stage = stage
+            self.detail = detail
+
+    def mark_ready(self):
+        with self._lock:
+            self.stage = "ready"
+            self.detail = None
+            self.ready_after = time.monotonic() - self._started_at
+
+    def mark_failed(self, error: str):
+        with self._lock:
+            self.stage = "failed"
+            self.error = error
+
+    def set_ingestion(self, state: str):
+        with self._lock:
+            self.ingestion_state = state
+
+    def update_ingestion(self, files_done: int, files_total: int):
+        """Progress callback for the ingestion pipeline"""
+        with self._lock:
+            self.files_done = files_done
+            self.files_total = files_total
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current state as a JSON-serializable dict"""
+        with self._lock:
+            return {
+                "ready": self.stage == "ready",
+                "stage": self.stage,
+                "detail": self.detail,
+                "error": self.error,
+                "uptime_seconds": round(time.monotonic() - self._started_at, 3),
+                "ready_after_seconds": (
+                    round(self.ready_after, 3) if self.ready_after is not None else None
+                ),
+                "ingestion": {
+                    "state": self.ingestion_state,
+                    "files_done": self.files_done,
+                    "files_total": self.files_total,
+                },
+            }
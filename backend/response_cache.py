@@ -0,0 +1,106 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+
+@dataclass
+class CachedResponse:
+    """A cached answer together with what produced it"""
+
+    answer: str
+    sources: List[Any]
+    tool_calls: List[Tuple[str, Dict[str, Any]]] = field(default_factory=list)
+    expires_at: float = 0.0
+
+
+class ResponseCache:
+    """
+    TTL + LRU cache of final answers to standalone questions.
+
+    Entries are keyed on the normalized question and the vector store's corpus
+    version, so any ingestion or deletion invalidates every answer that might
+    have been retrieved from the old corpus.
+    """
+
+    def __init__(self, max_size: int = 512, ttl_seconds: float = 3600.0):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple[str, int], CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        """Case-fold, collapse whitespace and drop trailing punctuation"""
+        return " ".join(query.casefold().split()).rstrip("?!. ")
+
+    @classmethod
+    def key(cls, query: str, corpus_version: int) -> Tuple[str, int]:
+        return cls.normalize(query), corpus_version
+
+    def get(self, key: Tuple[str, int]) -> Optional[CachedResponse]:
+        """Return a live entry for the key, or None on a miss or expiry"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires_at <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+        # Callers may mutate the sources they get back (e.g. when serializing)
+        return CachedResponse(
+            answer=entry.answer,
+            sources=copy.deepcopy(entry.sources),
+            tool_calls=entry.tool_calls,
+            expires_at=entry.expires_at,
+        )
+
+    def put(
+        self,
+        key: Tuple[str, int],
+        answer: str,
+        sources: List[Any],
+        tool_calls: Optional[List[Tuple[str, Dict[str, Any]]]] = None,
+    ):
+        """Store an answer, evicting the least recently used entry when full"""
+        if self.max_size <= 0 or self.ttl_seconds <= 0:
+            return
+
+        entry = CachedResponse(
+            answer=answer,
+            sources=copy.deepcopy(sources),
+            tool_calls=list(tool_calls or []),
+            expires_at=time.monotonic() + self.ttl_seconds,
+        )
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop all cached answers and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
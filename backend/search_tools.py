@@ -1,9 +1,44 @@
+import threading
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple, Union
 
+from .ai_generator import current_tool_call
 from .vector_store import SearchResults, VectorStore
 
 
+@dataclass
+class ToolResult:
+    """Output of one tool invocation"""
+
+    text: str  # What the LLM sees
+    sources: List[Dict] = field(default_factory=list)  # Sources for the UI
+
+
+class RequestContext:
+    """
+    Tool calls and sources gathered while answering one request.
+
+    Each query creates its own context, so concurrent queries never see each
+    other's sources. Tool calls of one turn may finish on several threads at
+    once, hence the lock. A call that already timed out records nothing, since
+    the model was told it failed.
+    """
+
+    def __init__(self):
+        self.sources: List[Dict] = []
+        self.tool_calls: List[Tuple[str, Dict[str, Any]]] = []
+        self._lock = threading.Lock()
+
+    def record(self, tool_name: str, arguments: Dict[str, Any], result: ToolResult):
+        tool_call = current_tool_call.get()
+        with self._lock:
+            if tool_call is not None and not tool_call.claim():
+                return
+            self.tool_calls.append((tool_name, dict(arguments)))
+            self.sources.extend(result.sources)
+
+
 class Tool(ABC):
     """Abstract base class for all tools"""
 
@@ -13,8 +48,14 @@ class Tool(ABC):
         pass
 
     @abstractmethod
-    def execute(self, **kwargs) -> str:
-        """Execute the tool with given parameters"""
+    def execute(self, **kwargs) -> Union[ToolResult, str]:
+        """
+        Execute the tool with given parameters.
+
+        Tools must not keep per-call state: everything a caller needs from the
+        invocation goes into the returned ToolResult (a plain string is
+        treated as a result without sources).
+        """
         pass
 
 
@@ -23,7 +64,6 @@ class CourseSearchTool(Tool):
 
     def __init__(self, vector_store: VectorStore):
         self.store = vector_store
-        self.last_sources = []  # Track sources from last search
 
     def get_tool_definition(self) -> Dict[str, Any]:
         """Return Anthropic tool definition for this tool"""
@@ -55,7 +95,7 @@ class CourseSearchTool(Tool):
         query: str,
         course_name: Optional[str] = None,
         lesson_number: Optional[int] = None,
-    ) -> str:
+    ) -> ToolResult:
         """
         Execute the search tool with given parameters.
 
@@ -65,7 +105,7 @@ class CourseSearchTool(Tool):
             lesson_number: Optional lesson filter
 
         Returns:
-            Formatted search results or error message
+            Formatted search results and their sources, or an error message
         """
 
         # Use the vector store's unified search interface
@@ -75,7 +115,7 @@ class CourseSearchTool(Tool):
 
         # Handle errors
         if results.error:
-            return results.error
+            return ToolResult(results.error)
 
         # Handle empty results
         if results.is_empty():
@@ -84,13 +124,18 @@ class CourseSearchTool(Tool):
                 filter_info += f" in course '{course_name}'"
             if lesson_number:
                 filter_info += f" in lesson {lesson_number}"
-            return f"No relevant content found{filter_info}."
+            return ToolResult(f"No relevant content found{filter_info}.")
 
         # Format and return results
-        return self._format_results(results)
+        return ToolResult(*self.format_context(results))
+
+    def format_context(self, results: SearchResults) -> Tuple[str, List[Dict]]:
+        """
+        Format search results with course and lesson context.
 
-    def _format_results(self, results: SearchResults) -> str:
-        """Format search results with course and lesson context"""
+        Returns:
+            Tuple of (formatted results, sources for the UI)
+        """
         formatted = []
         sources = []  # Track sources for the UI
 
@@ -121,10 +166,7 @@ class CourseSearchTool(Tool):
 
             formatted.append(f"{header}\n{doc}")
 
-        # Store sources for retrieval
-        self.last_sources = sources
-
-        return "\n\n".join(formatted)
+        return "\n\n".join(formatted), sources
 
 
 class ToolManager:
@@ -145,23 +187,39 @@ class ToolManager:
         """Get all tool definitions for Anthropic tool calling"""
         return [tool.get_tool_definition() for tool in self.tools.values()]
 
-    def execute_tool(self, tool_name: str, **kwargs) -> str:
-        """Execute a tool by name with given parameters"""
+    def execute_tool(
+        self, tool_name: str, context: Optional[RequestContext] = None, **kwargs
+    ) -> str:
+        """
+        Execute a tool by name with given parameters.
+
+        The call and its sources are recorded in the context, if one is given;
+        the returned text is what the LLM sees.
+        """
         if tool_name not in self.tools:
             return f"Tool '{tool_name}' not found"
 
-        return self.tools[tool_name].execute(**kwargs)
-
-    def get_last_sources(self) -> list:
-        """Get sources from the last search operation"""
-        # Check all tools for last_sources attribute
-        for tool in self.tools.values():
-            if hasattr(tool, "last_sources") and tool.last_sources:
-                return tool.last_sources
-        return []
-
-    def reset_sources(self):
-        """Reset sources from all tools that track sources"""
-        for tool in self.tools.values():
-            if hasattr(tool, "last_sources"):
-                tool.last_sources = []
+        result = self.tools[tool_name].execute(**kwargs)
+        if not isinstance(result, ToolResult):
+            result = ToolResult(str(result))
+        if context is not None:
+            context.record(tool_name, kwargs, result)
+        return result.text
+
+    def for_request(self, context: RequestContext) -> "RequestTools":
+        """Get a view of these tools that records into one request's context"""
+        return RequestTools(self, context)
+
+
+class RequestTools:
+    """ToolManager bound to a RequestContext, handed to the AI generator"""
+
+    def __init__(self, manager: ToolManager, context: RequestContext):
+        self.manager = manager
+        self.context = context
+
+    def get_tool_definitions(self) -> list:
+        return self.manager.get_tool_definitions()
+
+    def execute_tool(self, tool_name: str, **kwargs) -> str:
+        return self.manager.execute_tool(tool_name, context=self.context, **kwargs)
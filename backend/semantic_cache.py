@@ -0,0 +1,161 @@
+import copy
+import re
+import threading
+import time
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+import numpy as np
+
+from .response_cache import CachedResponse
+
+
+class SemanticCache:
+    """
+    Answer cache matched on query-embedding similarity.
+
+    Past queries are kept as unit vectors in a fixed-size in-memory matrix, so a
+    lookup is one matrix-vector product. A cached answer is returned when the
+    cosine similarity reaches the threshold, the entry was stored for the
+    current corpus version and it has not expired. Queries that mention
+    different numbers ("lesson 2" vs "lesson 3") embed almost identically, so
+    the numbers must match as well. When full, stale entries are reclaimed
+    first and then the least recently used one.
+    """
+
+    def __init__(
+        self, max_size: int = 1024, threshold: float = 0.95, ttl_seconds: float = 3600.0
+    ):
+        self.max_size = max_size
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+
+        self._matrix: Optional[np.ndarray] = None  # (max_size, dim), created on put
+        self._entries: List[Optional[CachedResponse]] = [None] * max_size
+        self._numbers: List[FrozenSet[str]] = [frozenset()] * max_size
+        self._versions = np.full(max_size, -1, dtype=np.int64)
+        self._expires = np.zeros(max_size)
+        self._last_used = np.zeros(max_size)
+
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl_seconds > 0
+
+    @staticmethod
+    def _numbers_in(query: str) -> FrozenSet[str]:
+        return frozenset(re.findall(r"\d+", query))
+
+    @staticmethod
+    def _unit(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _live_mask(self, corpus_version: int, now: float) -> np.ndarray:
+        """Slots holding an unexpired entry stored for the given corpus version"""
+        return (self._versions == corpus_version) & (self._expires > now)
+
+    def get(
+        self, query: str, embedding, corpus_version: int
+    ) -> Optional[CachedResponse]:
+        """Return the closest live entry above the threshold, or None"""
+        if not self.enabled:
+            return None
+
+        vector = self._unit(embedding)
+        numbers = self._numbers_in(query)
+        with self._lock:
+            match = None
+            if self._matrix is not None and self._matrix.shape[1] == vector.shape[0]:
+                now = time.monotonic()
+                similarities = self._matrix @ vector
+                similarities[~self._live_mask(corpus_version, now)] = -np.inf
+
+                candidates = np.flatnonzero(similarities >= self.threshold)
+                for slot in candidates[np.argsort(-similarities[candidates])]:
+                    if self._numbers[slot] == numbers:
+                        match = slot
+                        break
+
+            if match is None:
+                self.misses += 1
+                return None
+
+            self._last_used[match] = now
+            self.hits += 1
+            entry = self._entries[match]
+
+        return CachedResponse(
+            answer=entry.answer,
+            sources=copy.deepcopy(entry.sources),
+            tool_calls=entry.tool_calls,
+            expires_at=entry.expires_at,
+        )
+
+    def put(
+        self,
+        query: str,
+        embedding,
+        corpus_version: int,
+        answer: str,
+        sources: List[Any],
+        tool_calls: Optional[List[Tuple[str, Dict[str, Any]]]] = None,
+    ):
+        """Store an answer in a free, stale or least recently used slot"""
+        if not self.enabled:
+            return
+
+        vector = self._unit(embedding)
+        now = time.monotonic()
+        entry = CachedResponse(
+            answer=answer,
+            sources=copy.deepcopy(sources),
+            tool_calls=list(tool_calls or []),
+            expires_at=now + self.ttl_seconds,
+        )
+        with self._lock:
+            if self._matrix is None or self._matrix.shape[1] != vector.shape[0]:
+                # First entry, or the embedding model changed: start over
+                self._matrix = np.zeros((self.max_size, vector.shape[0]), np.float32)
+                self._entries = [None] * self.max_size
+                self._versions.fill(-1)
+                self._expires.fill(0.0)
+
+            # Reclaimable slots sort first, then the least recently used
+            priority = np.where(
+                self._live_mask(corpus_version, now), self._last_used, -np.inf
+            )
+            slot = int(np.argmin(priority))
+
+            self._matrix[slot] = vector
+            self._entries[slot] = entry
+            self._numbers[slot] = self._numbers_in(query)
+            self._versions[slot] = corpus_version
+            self._expires[slot] = entry.expires_at
+            self._last_used[slot] = now
+
+    def clear(self):
+        """Drop all cached answers and reset the counters"""
+        with self._lock:
+            self._matrix = None
+            self._entries = [None] * self.max_size
+            self._versions.fill(-1)
+            self._expires.fill(0.0)
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": sum(entry is not None for entry in self._entries),
+                "max_size": self.max_size,
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,208 @@
+"""
+Serve the app from several worker processes that share one embedding model.
+
+    python -m backend.serve [--workers N] [--host H] [--port P] [--ingest [FOLDER]]
+                            [--embedding-server]
+
+`uvicorn --workers` starts each worker as a fresh interpreter, so every worker
+loads its own copy of the embedding model and runs startup ingestion against
+the same ChromaDB path. Here the parent process loads the model and binds the
+listening socket, then forks the workers: model weights are shared
+copy-on-write and the kernel balances connections across workers.
+
+Workers run with SERVER_ROLE = "serve": they open the vector store read-only
+and never ingest. Documents are loaded by `python -m backend.ingest`, which
+--ingest also starts alongside the workers; workers reload the store once it
+publishes changes. With --embedding-server the model is instead loaded only
+by an embedding sidecar (backend.embedding_service) that micro-batches the
+requests of all workers together. Requires os.fork (Linux, macOS).
+"""
+
+import argparse
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import traceback
+from typing import List, Optional, Set
+
+from .config import config
+
+# Pause before replacing a crashed worker, so a worker that fails on startup
+# does not turn into a fork loop
+RESTART_DELAY_SECONDS = 1.0
+
+
+def _preload_embedding_model():
+    """Load the embedding model in the parent so forked workers share it"""
+    from .embedding_service import load_model_embedder
+
+    # Models are cached per process, so each worker's embedder reuses this
+    # instance instead of loading its own
+    load_model_embedder(config.EMBEDDING_MODEL, config.EMBEDDING_BACKEND)
+
+
+def _start_embedding_server() -> subprocess.Popen:
+    """Start the embedding sidecar and wait until its socket accepts requests"""
+    if os.path.exists(config.EMBEDDING_SOCKET_PATH):
+        os.remove(config.EMBEDDING_SOCKET_PATH)  # Left behind by an earlier run
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "backend.embedding_service",
+            "--socket",
+            config.EMBEDDING_SOCKET_PATH,
+        ]
+    )
+    while not os.path.exists(config.EMBEDDING_SOCKET_PATH):
+        if server.poll() is not None:
+            raise RuntimeError("Embedding server failed to start")
+        time.sleep(0.1)
+    return server
+
+
+def _bind(host: str, port: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _spawn_worker(sock: socket.socket, log_level: str) -> int:
+    """Fork a worker serving the app on the shared socket; returns its PID"""
+    pid = os.fork()
+    if pid:
+        return pid
+
+    # Worker process: uvicorn installs its own shutdown handlers
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    exit_code = 0
+    try:
+        import uvicorn
+
+        from .app import app
+
+        uvicorn.Server(uvicorn.Config(app, log_level=log_level)).run(sockets=[sock])
+    except BaseException:
+        traceback.print_exc()
+        exit_code = 1
+    finally:
+        os._exit(exit_code)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m backend.serve",
+        description="Serve the app from forked workers sharing one model",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count() or 1, help="Worker processes"
+    )
+    parser.add_argument(
+        "--ingest",
+        nargs="?",
+        const="docs",
+        metavar="FOLDER",
+        help="Also ingest a folder (default: docs) in a separate process",
+    )
+    parser.add_argument(
+        "--embedding-server",
+        action="store_true",
+        help="Embed in one sidecar process so workers share its batches",
+    )
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+
+    if not hasattr(os, "fork"):
+        print("backend.serve needs os.fork; use uvicorn directly on this platform")
+        return 1
+
+    # Tokenizer thread pools do not survive fork
+    os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+    # Inherited by the forked workers
+    config.SERVER_ROLE = "serve"
+
+    sock = _bind(args.host, args.port)
+    ingestion = None
+    if args.ingest is not None:
+        ingestion = subprocess.Popen(
+            [sys.executable, "-m", "backend.ingest", args.ingest, "--wait"]
+        )
+
+    embedding_server = None
+    if args.embedding_server:
+        print(f"Starting embedding server on {config.EMBEDDING_SOCKET_PATH}...")
+        embedding_server = _start_embedding_server()
+        config.EMBEDDING_SERVICE = "socket"
+    else:
+        print(f"Loading embedding model {config.EMBEDDING_MODEL}...")
+        _preload_embedding_model()
+    # Import the app before forking so workers share the loaded modules too
+    from . import app  # noqa: F401
+
+    workers: Set[int] = set()
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for _ in range(max(1, args.workers)):
+        workers.add(_spawn_worker(sock, args.log_level))
+    print(
+        f"Serving on http://{args.host}:{args.port} with {len(workers)} workers"
+        f" (PIDs {', '.join(map(str, workers))})"
+    )
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        exit_code = os.waitstatus_to_exitcode(status)
+
+        if ingestion is not None and pid == ingestion.pid:
+            # Reaped here rather than by Popen, so record the result on it
+            ingestion.returncode = exit_code
+            print(f"Ingestion finished with exit code {exit_code}")
+            continue
+        if embedding_server is not None and pid == embedding_server.pid:
+            embedding_server.returncode = exit_code
+            print(f"Embedding server exited with code {exit_code}; shutting down")
+            stop(signal.SIGTERM, None)
+            continue
+
+        workers.discard(pid)
+        if not stopping:
+            print(f"Worker {pid} exited with code {exit_code}; restarting")
+            time.sleep(RESTART_DELAY_SECONDS)
+            if not stopping:
+                workers.add(_spawn_worker(sock, args.log_level))
+
+    for process in (ingestion, embedding_server):
+        if process is not None and process.returncode is None:
+            process.terminate()
+            process.wait()
+    sock.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,13 @@
-from dataclasses import dataclass
-from typing import Dict, List, Optional
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import List, Optional, Tuple
 
 
 @dataclass
@@ -10,46 +18,306 @@ class Message:
     content: str  # The message content
 
 
+def new_session_id() -> str:
+    """Generate an unguessable session ID"""
+    return f"session_{secrets.token_urlsafe(16)}"
+
+
+class SessionStore(ABC):
+    """Abstract storage backend for conversation sessions"""
+
+    @abstractmethod
+    def create_session(self) -> str:
+        """Create an empty session and return its ID"""
+        pass
+
+    @abstractmethod
+    def get_messages(self, session_id: str) -> List[Message]:
+        """Get a session's messages; unknown or expired sessions have none"""
+        pass
+
+    @abstractmethod
+    def append_messages(
+        self, session_id: str, messages: List[Message], max_messages: int
+    ):
+        """
+        Append messages to a session, creating it if needed, and keep only the
+        last max_messages. The update is atomic with respect to other callers.
+        """
+        pass
+
+    @abstractmethod
+    def clear_session(self, session_id: str):
+        """Remove all messages from a session"""
+        pass
+
+    def close(self):
+        """Release any resources held by the store"""
+        pass
+
+
+class InMemorySessionStore(SessionStore):
+    """
+    Process-local session store with LRU and idle-TTL eviction.
+
+    Sessions are kept in access order, so the least recently used session is
+    dropped when max_sessions is reached, and idle sessions are swept from the
+    front whenever a session is created.
+    """
+
+    def __init__(self, max_sessions: int = 10000, ttl_seconds: float = 86400.0):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        # session_id -> (messages, last access time), least recently used first
+        self._sessions: "OrderedDict[str, Tuple[List[Message], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+    def _evict(self, now: float):
+        """Drop idle sessions, then the least recently used over the cap"""
+        while self._sessions:
+            _, last_access = next(iter(self._sessions.values()))
+            if now - last_access <= self.ttl_seconds:
+                break
+            self._sessions.popitem(last=False)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    def _touch(self, session_id: str, now: float) -> Optional[List[Message]]:
+        """Get a live session's messages and mark it as recently used"""
+        session = self._sessions.get(session_id)
+        if session is None:
+            return None
+        messages, last_access = session
+        if now - last_access > self.ttl_seconds:
+            del self._sessions[session_id]
+            return None
+        self._sessions[session_id] = (messages, now)
+        self._sessions.move_to_end(session_id)
+        return messages
+
+    def create_session(self) -> str:
+        session_id = new_session_id()
+        now = time.monotonic()
+        with self._lock:
+            self._sessions[session_id] = ([], now)
+            self._evict(now)
+        return session_id
+
+    def get_messages(self, session_id: str) -> List[Message]:
+        with self._lock:
+            return list(self._touch(session_id, time.monotonic()) or [])
+
+    def append_messages(
+        self, session_id: str, messages: List[Message], max_messages: int
+    ):
+        now = time.monotonic()
+        with self._lock:
+            history = self._touch(session_id, now) or []
+            history = (history + list(messages))[-max_messages:]
+            self._sessions[session_id] = (history, now)
+            self._sessions.move_to_end(session_id)
+            self._evict(now)
+
+    def clear_session(self, session_id: str):
+        with self._lock:
+            if session_id in self._sessions:
+                self._sessions[session_id] = ([], time.monotonic())
+                self._sessions.move_to_end(session_id)
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Session store backed by a SQLite database in WAL mode.
+
+    The database file can be shared by several server processes (e.g. uvicorn
+    workers) and survives restarts. Each thread uses its own connection, and
+    read-modify-write updates run in IMMEDIATE transactions. A daemon thread
+    periodically deletes sessions idle for longer than ttl_seconds and, if
+    there are more than max_sessions, the least recently used ones.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        max_sessions: int = 10000,
+        ttl_seconds: float = 86400.0,
+        eviction_interval: float = 300.0,
+    ):
+        self.db_path = db_path
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._local = threading.local()
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            " id TEXT PRIMARY KEY,"
+            " messages TEXT NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        connection.execute(
+            "CREATE INDEX IF NOT EXISTS sessions_last_access"
+            " ON sessions (last_access)"
+        )
+
+        self._stop = threading.Event()
+        self._evictor = None
+        if eviction_interval > 0:
+            self._evictor = threading.Thread(
+                target=self._evict_periodically,
+                args=(eviction_interval,),
+                name="session-eviction",
+                daemon=True,
+            )
+            self._evictor.start()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get this thread's connection, opening it on first use"""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            # Autocommit mode; multi-statement updates use explicit transactions
+            connection = sqlite3.connect(
+                self.db_path, timeout=5.0, isolation_level=None
+            )
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    @staticmethod
+    def _dump(messages: List[Message]) -> str:
+        return json.dumps([asdict(message) for message in messages])
+
+    @staticmethod
+    def _load(raw: str) -> List[Message]:
+        return [Message(**message) for message in json.loads(raw)]
+
+    def create_session(self) -> str:
+        session_id = new_session_id()
+        self._connection().execute(
+            "INSERT INTO sessions (id, messages, last_access) VALUES (?, ?, ?)",
+            (session_id, "[]", time.time()),
+        )
+        return session_id
+
+    def get_messages(self, session_id: str) -> List[Message]:
+        now = time.time()
+        connection = self._connection()
+        row = connection.execute(
+            "SELECT messages, last_access FROM sessions WHERE id = ?", (session_id,)
+        ).fetchone()
+        if row is None or now - row[1] > self.ttl_seconds:
+            return []
+        connection.execute(
+            "UPDATE sessions SET last_access = ? WHERE id = ?", (now, session_id)
+        )
+        return self._load(row[0])
+
+    def append_messages(
+        self, session_id: str, messages: List[Message], max_messages: int
+    ):
+        now = time.time()
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute(
+                "SELECT messages, last_access FROM sessions WHERE id = ?",
+                (session_id,),
+            ).fetchone()
+            history = []
+            if row is not None and now - row[1] <= self.ttl_seconds:
+                history = self._load(row[0])
+            history = (history + list(messages))[-max_messages:]
+            connection.execute(
+                "INSERT OR REPLACE INTO sessions (id, messages, last_access)"
+                " VALUES (?, ?, ?)",
+                (session_id, self._dump(history), now),
+            )
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+    def clear_session(self, session_id: str):
+        self._connection().execute(
+            "UPDATE sessions SET messages = '[]', last_access = ? WHERE id = ?",
+            (time.time(), session_id),
+        )
+
+    def evict(self) -> int:
+        """Delete idle and excess sessions; returns how many were removed"""
+        connection = self._connection()
+        expired = connection.execute(
+            "DELETE FROM sessions WHERE last_access < ?",
+            (time.time() - self.ttl_seconds,),
+        ).rowcount
+        excess = connection.execute(
+            "DELETE FROM sessions WHERE id IN ("
+            " SELECT id FROM sessions ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+            (self.max_sessions,),
+        ).rowcount
+        return expired + excess
+
+    def _evict_periodically(self, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                self.evict()
+            except Exception as e:
+                print(f"Error evicting sessions: {e}")
+
+    def close(self):
+        """Stop background eviction and close this thread's connection"""
+        self._stop.set()
+        if self._evictor is not None:
+            self._evictor.join()
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+
 class SessionManager:
     """Manages conversation sessions and message history"""
 
-    def __init__(self, max_history: int = 5):
+    def __init__(self, max_history: int = 5, store: Optional[SessionStore] = None):
         self.max_history = max_history
-        self.sessions: Dict[str, List[Message]] = {}
-        self.session_counter = 0
+        self.store = store if store is not None else InMemorySessionStore()
 
     def create_session(self) -> str:
         """Create a new conversation session"""
-        self.session_counter += 1
-        session_id = f"session_{self.session_counter}"
-        self.sessions[session_id] = []
-        return session_id
+        return self.store.create_session()
 
     def add_message(self, session_id: str, role: str, content: str):
         """Add a message to the conversation history"""
-        if session_id not in self.sessions:
-            self.sessions[session_id] = []
-
-        message = Message(role=role, content=content)
-        self.sessions[session_id].append(message)
-
-        # Keep conversation history within limits
-        if len(self.sessions[session_id]) > self.max_history * 2:
-            self.sessions[session_id] = self.sessions[session_id][
-                -self.max_history * 2 :
-            ]
+        self.store.append_messages(
+            session_id, [Message(role=role, content=content)], self.max_history * 2
+        )
 
     def add_exchange(self, session_id: str, user_message: str, assistant_message: str):
         """Add a complete question-answer exchange"""
-        self.add_message(session_id, "user", user_message)
-        self.add_message(session_id, "assistant", assistant_message)
+        self.store.append_messages(
+            session_id,
+            [
+                Message(role="user", content=user_message),
+                Message(role="assistant", content=assistant_message),
+            ],
+            self.max_history * 2,
+        )
 
     def get_conversation_history(self, session_id: Optional[str]) -> Optional[str]:
         """Get formatted conversation history for a session"""
-        if not session_id or session_id not in self.sessions:
+        if not session_id:
             return None
 
-        messages = self.sessions[session_id]
+        messages = self.store.get_messages(session_id)
         if not messages:
             return None
 
@@ -62,5 +330,4 @@ class SessionManager:
 
     def clear_session(self, session_id: str):
         """Clear all messages from a session"""
-        if session_id in self.sessions:
-            self.sessions[session_id] = []
+        self.store.clear_session(session_id)
@@ -1,7 +1,7 @@
 import pytest
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock
 
 # Import the global app instance to access its routes
 from backend.app import app
@@ -31,6 +31,7 @@ def mock_rag_system(monkeypatch):
     """
     mock = MagicMock()
     mock.session_manager = MagicMock()
+    mock.aquery = AsyncMock()
     # The API endpoints in backend/app.py use a global `rag_system` instance.
     # We use monkeypatch to replace this instance with our mock for the duration of a test.
     monkeypatch.setattr("backend.app.rag_system", mock)
@@ -1,5 +1,9 @@
+import asyncio
+import threading
+import time
 import unittest
-from unittest.mock import MagicMock, patch
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import AsyncMock, MagicMock, patch
 
 from ai_generator import AIGenerator
 from langchain_core.messages import AIMessage
@@ -69,6 +73,188 @@ class TestAIGenerator(unittest.TestCase):
         self.mock_tool_manager.execute_tool.assert_not_called()
         self.assertEqual(response, "Direct answer")
 
+    def test_agenerate_response_with_tool_call(self):
+        mock_tool_call = {
+            "name": "search_course_content",
+            "args": {"query": "test"},
+            "id": "tool_123",
+        }
+        self.mock_llm.bind_tools.return_value.ainvoke = AsyncMock(
+            return_value=AIMessage(content="", tool_calls=[mock_tool_call])
+        )
+        self.mock_llm.ainvoke = AsyncMock(
+            return_value=AIMessage(content="Async answer")
+        )
+        self.mock_tool_manager.execute_tool.return_value = "Tool search result"
+
+        response = asyncio.run(
+            self.ai_generator.agenerate_response(
+                query="test query",
+                tools=[{"name": "search_course_content"}],
+                tool_manager=self.mock_tool_manager,
+            )
+        )
+
+        # Tool runs off the event loop, and no blocking invoke is used
+        self.mock_tool_manager.execute_tool.assert_called_once_with(
+            "search_course_content", query="test"
+        )
+        self.mock_llm.invoke.assert_not_called()
+        self.assertEqual(response, "Async answer")
+
+    def test_astream_response_streams_final_call(self):
+        mock_tool_call = {
+            "name": "search_course_content",
+            "args": {"query": "test"},
+            "id": "tool_123",
+        }
+        self.mock_llm.bind_tools.return_value.ainvoke = AsyncMock(
+            return_value=AIMessage(content="", tool_calls=[mock_tool_call])
+        )
+
+        async def fake_astream(messages):
+            for token in ["Final", " ", "answer"]:
+                yield AIMessage(content=token)
+
+        self.mock_llm.astream = fake_astream
+        self.mock_tool_manager.execute_tool.return_value = "Tool search result"
+
+        async def collect():
+            return [
+                token
+                async for token in self.ai_generator.astream_response(
+                    query="test query",
+                    tools=[{"name": "search_course_content"}],
+                    tool_manager=self.mock_tool_manager,
+                )
+            ]
+
+        tokens = asyncio.run(collect())
+
+        self.mock_tool_manager.execute_tool.assert_called_once_with(
+            "search_course_content", query="test"
+        )
+        self.assertEqual(tokens, ["Final", " ", "answer"])
+
+
+class TestToolCallExecution(unittest.TestCase):
+    """Several tool calls from one model turn"""
+
+    def setUp(self):
+        with patch("os.getenv", return_value="fake_api_key"):
+            self.ai_generator = AIGenerator(model="test_model", tool_timeout=0.5)
+        self.executor = ThreadPoolExecutor(max_workers=4)
+        self.response = AIMessage(
+            content="",
+            tool_calls=[
+                {"name": "search", "args": {"query": query}, "id": f"call_{query}"}
+                for query in ("slow", "boom", "fast")
+            ],
+        )
+
+    def tearDown(self):
+        self.executor.shutdown(wait=True)
+
+    def make_tool_manager(self, slow_seconds=0.1):
+        def execute_tool(name, query):
+            if query == "slow":
+                time.sleep(slow_seconds)
+            if query == "boom":
+                raise RuntimeError("search backend down")
+            return f"result for {query}"
+
+        tool_manager = MagicMock()
+        tool_manager.execute_tool.side_effect = execute_tool
+        return tool_manager
+
+    def assert_results(self, results, slow_content):
+        self.assertEqual(
+            [result["tool_call_id"] for result in results],
+            ["call_slow", "call_boom", "call_fast"],
+        )
+        self.assertEqual(
+            [result["content"] for result in results],
+            [
+                slow_content,
+                "Tool 'search' failed: search backend down",
+                "result for fast",
+            ],
+        )
+
+    def test_results_keep_call_order_and_failures_are_isolated(self):
+        for executor in (None, self.executor):
+            results = self.ai_generator._execute_tool_calls(
+                self.response, self.make_tool_manager(), executor
+            )
+            self.assert_results(results, "result for slow")
+
+    def test_async_results_keep_call_order_and_failures_are_isolated(self):
+        results = asyncio.run(
+            self.ai_generator._aexecute_tool_calls(
+                self.response, self.make_tool_manager(), self.executor
+            )
+        )
+        self.assert_results(results, "result for slow")
+
+    def test_slow_call_times_out(self):
+        tool_manager = self.make_tool_manager(slow_seconds=2.0)
+        results = self.ai_generator._execute_tool_calls(
+            self.response, tool_manager, self.executor
+        )
+        self.assert_results(results, "Tool 'search' timed out after 0.5s")
+
+        results = asyncio.run(
+            self.ai_generator._aexecute_tool_calls(
+                self.response, tool_manager, self.executor
+            )
+        )
+        self.assert_results(results, "Tool 'search' timed out after 0.5s")
+
+    def test_each_call_gets_its_own_timeout(self):
+        # One worker: the second call only starts once the first is done, past
+        # a deadline shared from submission
+        executor = ThreadPoolExecutor(max_workers=1)
+        tool_manager = MagicMock()
+        tool_manager.execute_tool.side_effect = lambda name, query: (
+            time.sleep(0.3) or f"result for {query}"
+        )
+        response = AIMessage(
+            content="",
+            tool_calls=[
+                {"name": "search", "args": {"query": query}, "id": f"call_{query}"}
+                for query in ("first", "second")
+            ],
+        )
+        try:
+            results = self.ai_generator._execute_tool_calls(
+                response, tool_manager, executor
+            )
+            async_results = asyncio.run(
+                self.ai_generator._aexecute_tool_calls(response, tool_manager, executor)
+            )
+        finally:
+            executor.shutdown(wait=True)
+
+        for outcome in (results, async_results):
+            self.assertEqual(
+                [result["content"] for result in outcome],
+                ["result for first", "result for second"],
+            )
+
+    def test_calls_run_concurrently(self):
+        barrier = threading.Barrier(3, timeout=1.0)
+        tool_manager = MagicMock()
+        # Only passes if all three calls are in flight at once
+        tool_manager.execute_tool.side_effect = lambda name, query: str(barrier.wait())
+
+        results = self.ai_generator._execute_tool_calls(
+            self.response, tool_manager, self.executor
+        )
+
+        self.assertEqual(
+            sorted(result["content"] for result in results), ["0", "1", "2"]
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
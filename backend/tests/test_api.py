@@ -1,5 +1,5 @@
 from fastapi.testclient import TestClient
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock
 
 def test_root_endpoint(client: TestClient):
     """Test the root endpoint to ensure the API is running."""
@@ -26,7 +26,7 @@ def test_query_documents_new_session(client: TestClient, mock_rag_system: MagicM
     """Test the /api/query endpoint when no session ID is provided."""
     # Configure mock for session creation and query processing
     mock_rag_system.session_manager.create_session.return_value = "new_session_123"
-    mock_rag_system.query.return_value = ("Test answer", [{"text": "source1"}])
+    mock_rag_system.aquery.return_value = ("Test answer", [{"text": "source1"}])
 
     response = client.post("/api/query", json={"query": "What is Python?"})
 
@@ -38,12 +38,14 @@ def test_query_documents_new_session(client: TestClient, mock_rag_system: MagicM
 
     # Verify that a new session was created and the query was processed
     mock_rag_system.session_manager.create_session.assert_called_once()
-    mock_rag_system.query.assert_called_once_with("What is Python?", "new_session_123")
+    mock_rag_system.aquery.assert_called_once_with(
+        "What is Python?", "new_session_123", use_cache=True
+    )
 
 def test_query_documents_existing_session(client: TestClient, mock_rag_system: MagicMock):
     """Test the /api/query endpoint with an existing session ID."""
     # Configure mock for query processing
-    mock_rag_system.query.return_value = ("Another answer", [{"text": "source2"}])
+    mock_rag_system.aquery.return_value = ("Another answer", [{"text": "source2"}])
 
     response = client.post(
         "/api/query",
@@ -58,16 +60,101 @@ def test_query_documents_existing_session(client: TestClient, mock_rag_system: M
 
     # Verify that no new session was created and the query was processed with the existing session
     mock_rag_system.session_manager.create_session.assert_not_called()
-    mock_rag_system.query.assert_called_once_with(
-        "Tell me about FastAPI", "existing_session_456"
+    mock_rag_system.aquery.assert_called_once_with(
+        "Tell me about FastAPI", "existing_session_456", use_cache=True
     )
 
 def test_query_endpoint_error_handling(client: TestClient, mock_rag_system: MagicMock):
     """Test that the /api/query endpoint handles exceptions gracefully."""
     # Configure the mock to raise an exception
-    mock_rag_system.query.side_effect = Exception("Something went wrong")
+    mock_rag_system.aquery.side_effect = Exception("Something went wrong")
 
     response = client.post("/api/query", json={"query": "This will fail"})
 
     assert response.status_code == 500
     assert response.json() == {"detail": "Something went wrong"}
+
+def test_query_stream_emits_sse_events(client: TestClient, mock_rag_system: MagicMock):
+    """Test that /api/query/stream streams tokens, sources and completion as SSE."""
+    mock_rag_system.session_manager.create_session.return_value = "stream_session"
+
+    async def fake_stream(query, session_id, use_cache=True):
+        yield "token", "Hello"
+        yield "token", " world"
+        yield "sources", [{"text": "Test Course - Lesson 1", "link": None}]
+        yield "done", None
+
+    mock_rag_system.astream_query = fake_stream
+
+    response = client.post("/api/query/stream", json={"query": "Hi"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    frames = [frame for frame in response.text.split("\n\n") if frame]
+    assert frames == [
+        'event: session\ndata: {"session_id": "stream_session"}',
+        'event: token\ndata: {"text": "Hello"}',
+        'event: token\ndata: {"text": " world"}',
+        'event: sources\ndata: [{"text": "Test Course - Lesson 1", "link": null}]',
+        "event: done\ndata: null",
+    ]
+
+def test_query_returns_503_while_starting(client: TestClient, monkeypatch):
+    """Test that queries fail fast with 503 until the RAG system is loaded."""
+    monkeypatch.setattr("backend.app.rag_system", None)
+    monkeypatch.setattr("backend.app.config.STARTUP_WAIT_SECONDS", 0.1)
+
+    response = client.post("/api/query", json={"query": "Too early"})
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "5"
+
+def test_ready_endpoint_reports_startup_state(client: TestClient, monkeypatch):
+    """Test that /api/ready returns 503 while loading and 200 once ready."""
+    from backend.readiness import Readiness
+
+    readiness = Readiness()
+    monkeypatch.setattr("backend.app.readiness", readiness)
+
+    readiness.set_stage("loading", "Loading embedding model")
+    response = client.get("/api/ready")
+    assert response.status_code == 503
+    assert response.json()["stage"] == "loading"
+
+    readiness.mark_ready()
+    readiness.set_ingestion("running")
+    readiness.update_ingestion(2, 4)
+    response = client.get("/api/ready")
+    assert response.status_code == 200
+    assert response.json()["ready"] is True
+    assert response.json()["ingestion"] == {
+        "state": "running",
+        "files_done": 2,
+        "files_total": 4,
+    }
+
+def test_query_batch_returns_results_in_order(client: TestClient, mock_rag_system: MagicMock):
+    """Test that /api/query/batch passes all queries through and keeps per-item errors."""
+    mock_rag_system.aquery_batch = AsyncMock(
+        return_value=[
+            {"answer": "First", "sources": [{"text": "Course A"}], "error": None},
+            {"answer": None, "sources": [], "error": "LLM timeout"},
+        ]
+    )
+
+    response = client.post("/api/query/batch", json={"queries": ["one", "two"]})
+
+    assert response.status_code == 200
+    assert response.json()["results"] == [
+        {"answer": "First", "sources": [{"text": "Course A"}], "error": None},
+        {"answer": None, "sources": [], "error": "LLM timeout"},
+    ]
+    mock_rag_system.aquery_batch.assert_awaited_once_with(["one", "two"], use_cache=True)
+
+def test_query_batch_rejects_oversized_batches(client: TestClient, mock_rag_system: MagicMock, monkeypatch):
+    """Test that batches above MAX_BATCH_QUERIES are refused."""
+    monkeypatch.setattr("backend.app.config.MAX_BATCH_QUERIES", 2)
+
+    response = client.post("/api/query/batch", json={"queries": ["a", "b", "c"]})
+
+    assert response.status_code == 413
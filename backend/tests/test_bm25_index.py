@@ -0,0 +1,81 @@
+import unittest
+
+from backend.bm25_index import BM25Index, reciprocal_rank_fusion, tokenize
+
+
+class TestBM25Index(unittest.TestCase):
+
+    def setUp(self):
+        self.index = BM25Index()
+        self.index.add(
+            ["a", "b", "c"],
+            [
+                "Use the get_lesson_link helper",
+                "Lesson links and course links",
+                "Vector search with embeddings",
+            ],
+            [
+                {"course_title": "Course A", "lesson_number": 1},
+                {"course_title": "Course A", "lesson_number": 2},
+                {"course_title": "Course B", "lesson_number": 1},
+            ],
+        )
+
+    def test_tokenize_keeps_identifiers(self):
+        self.assertEqual(
+            tokenize("Call get_lesson_link()"), ["call", "get_lesson_link"]
+        )
+
+    def test_ranks_by_bm25_score(self):
+        results = self.index.search("lesson links", limit=3)
+        self.assertEqual([chunk_id for chunk_id, _ in results], ["b"])
+
+        results = self.index.search("get_lesson_link", limit=3)
+        self.assertEqual(results[0][0], "a")
+        self.assertGreater(results[0][1], 0)
+
+    def test_rarer_terms_weigh_more(self):
+        self.index.add(["d"], ["vector lesson"], [{}])
+        results = self.index.search("vector lesson", limit=1)
+        self.assertEqual(results[0][0], "d")
+
+    def test_filters(self):
+        self.assertEqual(self.index.search("links", 3, course_title="Course B"), [])
+        self.assertEqual(self.index.search("links", 3, lesson_number=2)[0][0], "b")
+
+    def test_replace_and_remove(self):
+        self.index.add(["c"], ["Lexical search"], [{"course_title": "Course B"}])
+        self.assertEqual(self.index.search("embeddings", 3), [])
+        self.assertEqual(self.index.get("c")[0], "Lexical search")
+
+        self.index.remove(["c"])
+        self.assertEqual(self.index.search("search", 3), [])
+        self.assertIsNone(self.index.get("c"))
+        self.assertEqual(len(self.index), 2)
+
+    def test_compaction_keeps_results(self):
+        ids = [f"tmp{i}" for i in range(100)]
+        self.index.add(ids, ["filler text"] * 100, [{}] * 100)
+        self.index.remove(ids)
+
+        self.assertEqual(len(self.index._ids), 3)
+        self.assertEqual(self.index.search("get_lesson_link", 3)[0][0], "a")
+
+    def test_replacing_documents_compacts(self):
+        for _ in range(100):
+            self.index.add(["c"], ["Vector search with embeddings"], [{}])
+
+        self.assertLess(len(self.index._ids), 100)
+        self.assertEqual(len(self.index), 3)
+        self.assertEqual(self.index.search("embeddings", 3)[0][0], "c")
+
+
+class TestReciprocalRankFusion(unittest.TestCase):
+
+    def test_documents_ranked_well_by_both_win(self):
+        fused = reciprocal_rank_fusion([["a", "b"], ["c", "b", "d"]])
+        self.assertEqual(fused, ["b", "a", "c", "d"])
+
+
+if __name__ == "__main__":
+    unittest.main()
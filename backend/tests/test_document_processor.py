@@ -0,0 +1,342 @@
+import os
+import random
+import re
+import shutil
+import tempfile
+import unittest
+
+from backend.document_processor import DocumentProcessor
+from backend.models import Course, CourseChunk, Lesson
+
+
+def legacy_chunk_text(text, chunk_size, chunk_overlap):
+    """The quadratic chunker chunk_text replaced, kept as the reference"""
+    text = re.sub(r"\s+", " ", text.strip())
+    sentence_endings = re.compile(
+        r"(?<!\w\.\w.)(?<![A-Z][a-z]\.)(?<=\.|\!|\?)\s+(?=[A-Z])"
+    )
+    sentences = [s.strip() for s in sentence_endings.split(text) if s.strip()]
+
+    chunks = []
+    i = 0
+    while i < len(sentences):
+        current_chunk = []
+        current_size = 0
+        for j in range(i, len(sentences)):
+            sentence = sentences[j]
+            space_size = 1 if current_chunk else 0
+            total_addition = len(sentence) + space_size
+            if current_size + total_addition > chunk_size and current_chunk:
+                break
+            current_chunk.append(sentence)
+            current_size += total_addition
+
+        if current_chunk:
+            chunks.append(" ".join(current_chunk))
+            if chunk_overlap > 0:
+                overlap_size = 0
+                overlap_sentences = 0
+                for k in range(len(current_chunk) - 1, -1, -1):
+                    sentence_len = len(current_chunk[k]) + (
+                        1 if k < len(current_chunk) - 1 else 0
+                    )
+                    if overlap_size + sentence_len <= chunk_overlap:
+                        overlap_size += sentence_len
+                        overlap_sentences += 1
+                    else:
+                        break
+                next_start = i + len(current_chunk) - overlap_sentences
+                i = max(next_start, i + 1)
+            else:
+                i += len(current_chunk)
+        else:
+            i += 1
+    return chunks
+
+
+def legacy_process_course_document(processor, file_path):
+    """The whole-file parser process_course_document replaced"""
+    content = processor.read_file(file_path)
+    filename = os.path.basename(file_path)
+    lines = content.strip().split("\n")
+
+    course_title = filename
+    course_link = None
+    instructor_name = "Unknown"
+    if len(lines) >= 1:
+        course_title = processor._parse_course_title(lines[0], filename)
+    for i in range(1, min(len(lines), 4)):
+        line = lines[i].strip()
+        if not line:
+            continue
+        link_match = re.match(r"^Course Link:\s*(.+)$", line, re.IGNORECASE)
+        if link_match:
+            course_link = link_match.group(1).strip()
+            continue
+        instructor_match = re.match(r"^Course Instructor:\s*(.+)$", line, re.IGNORECASE)
+        if instructor_match:
+            instructor_name = instructor_match.group(1).strip()
+            continue
+
+    course = Course(
+        title=course_title,
+        course_link=course_link,
+        instructor=instructor_name if instructor_name != "Unknown" else None,
+    )
+    course_chunks = []
+    current_lesson = None
+    lesson_title = None
+    lesson_link = None
+    lesson_content = []
+    chunk_counter = 0
+
+    def close_lesson():
+        nonlocal chunk_counter
+        lesson_text = "\n".join(lesson_content).strip()
+        if not lesson_text:
+            return
+        course.lessons.append(
+            Lesson(
+                lesson_number=current_lesson,
+                title=lesson_title,
+                lesson_link=lesson_link,
+            )
+        )
+        for chunk in processor.chunk_text(lesson_text):
+            course_chunks.append(
+                CourseChunk(
+                    content=f"Course {course.title} Lesson {current_lesson} content: {chunk}",
+                    course_title=course.title,
+                    lesson_number=current_lesson,
+                    chunk_index=chunk_counter,
+                )
+            )
+            chunk_counter += 1
+
+    start_index = 3
+    if len(lines) > 3 and not lines[3].strip():
+        start_index = 4
+    i = start_index
+    while i < len(lines):
+        line = lines[i]
+        lesson_match = re.match(
+            r"^Lesson\s+(\d+):\s*(.+)$", line.strip(), re.IGNORECASE
+        )
+        if lesson_match:
+            if current_lesson is not None and lesson_content:
+                close_lesson()
+            current_lesson = int(lesson_match.group(1))
+            lesson_title = lesson_match.group(2).strip()
+            lesson_link = None
+            if i + 1 < len(lines):
+                link_match = re.match(
+                    r"^Lesson Link:\s*(.+)$", lines[i + 1].strip(), re.IGNORECASE
+                )
+                if link_match:
+                    lesson_link = link_match.group(1).strip()
+                    i += 1
+            lesson_content = []
+        else:
+            lesson_content.append(line)
+        i += 1
+    if current_lesson is not None and lesson_content:
+        close_lesson()
+
+    if not course_chunks and len(lines) > 2:
+        remaining_content = "\n".join(lines[start_index:]).strip()
+        if remaining_content:
+            for chunk in processor.chunk_text(remaining_content):
+                course_chunks.append(
+                    CourseChunk(
+                        content=chunk,
+                        course_title=course.title,
+                        chunk_index=chunk_counter,
+                    )
+                )
+                chunk_counter += 1
+    return course, course_chunks
+
+
+# Fragments that exercise the sentence splitter: abbreviations, initials,
+# mixed punctuation, unicode letters and whitespace
+FRAGMENTS = [
+    "Hello",
+    "world.",
+    "Dr.",
+    "Mr.",
+    "e.g.",
+    "i.e.",
+    "U.S.",
+    "A.",
+    "a.",
+    "Ok!",
+    "Why?",
+    "Yes!?",
+    "The",
+    "API",
+    "call",
+    "x.y.",
+    "3.5.",
+    "Élan.",
+    "École",
+    "_.",
+    "ß.",
+    "...",
+    "?",
+    ".",
+    "Z",
+    "q",
+]
+WHITESPACE = [" ", "  ", "\n", "\t", "\n\n", "  ", " ", "\r\n", "\x1c"]
+
+
+def random_text(rng, words):
+    parts = [rng.choice(WHITESPACE) if rng.random() < 0.2 else ""]
+    for _ in range(words):
+        parts.append(rng.choice(FRAGMENTS))
+        parts.append(rng.choice(WHITESPACE) if rng.random() < 0.3 else " ")
+    return "".join(parts)
+
+
+class TestChunkText(unittest.TestCase):
+
+    def test_matches_legacy_chunker_on_random_text(self):
+        rng = random.Random(1234)
+        for case in range(3000):
+            text = random_text(rng, rng.randint(0, 60))
+            chunk_size = rng.randint(1, 60)
+            chunk_overlap = rng.choice([0, 0, rng.randint(1, 80)])
+            processor = DocumentProcessor(chunk_size, chunk_overlap)
+
+            self.assertEqual(
+                processor.chunk_text(text),
+                legacy_chunk_text(text, chunk_size, chunk_overlap),
+                f"case {case}: {text!r} size={chunk_size} overlap={chunk_overlap}",
+            )
+
+    def test_matches_legacy_chunker_on_course_script(self):
+        path = os.path.join(
+            os.path.dirname(__file__), "..", "..", "docs", "course1_script.txt"
+        )
+        with open(path, encoding="utf-8") as file:
+            text = file.read()
+        for chunk_size, chunk_overlap in [(800, 100), (200, 0), (50, 400)]:
+            processor = DocumentProcessor(chunk_size, chunk_overlap)
+            self.assertEqual(
+                processor.chunk_text(text),
+                legacy_chunk_text(text, chunk_size, chunk_overlap),
+            )
+
+    def test_chunks_are_generated_lazily(self):
+        processor = DocumentProcessor(chunk_size=20, chunk_overlap=0)
+        chunks = processor.iter_chunks("One. Two. Three. Four. Five. Six. Seven.")
+
+        self.assertEqual(next(chunks), "One. Two. Three.")
+        self.assertEqual(list(chunks), ["Four. Five. Six.", "Seven."])
+
+
+DOCUMENT_LINES = [
+    "Course Title: Building Agents",
+    "Agents 101",
+    "Course Link: https://example.com/agents",
+    "course link:https://example.com/lower",
+    "Course Instructor: Ada",
+    "Course Instructor: Unknown",
+    "Lesson 0: Introduction",
+    "  lesson 12:   Tools  ",
+    "Lesson 3:",
+    "Lesson Link: https://example.com/lesson",
+    "Lesson Link:",
+    "Welcome to the course. We build agents.",
+    "Dr. Smith explains e.g. tool use! Then we test it?",
+    "   indented text. More text here.",
+    "",
+    "   ",
+    "\t",
+]
+
+
+def random_document(rng):
+    lines = [rng.choice(DOCUMENT_LINES) for _ in range(rng.randint(0, 25))]
+    newline = rng.choice(["\n", "\r\n"])
+    text = rng.choice(["", "\n\n", "  "]) + newline.join(lines)
+    data = text.encode("utf-8") + rng.choice([b"", b"\n", b"\n\n  "])
+    if rng.random() < 0.1:
+        data += b"\xff\xfe broken bytes."
+    return data
+
+
+class TestProcessCourseDocument(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def test_matches_legacy_parser_on_random_documents(self):
+        rng = random.Random(42)
+        processor = DocumentProcessor(chunk_size=60, chunk_overlap=20)
+        path = os.path.join(self.folder, "course.txt")
+        for case in range(1500):
+            data = random_document(rng)
+            with open(path, "wb") as file:
+                file.write(data)
+
+            course, chunks = processor.process_course_document(path)
+
+            self.assertEqual(
+                (course, list(chunks)),
+                legacy_process_course_document(processor, path),
+                f"case {case}: {data!r}",
+            )
+
+    def test_matches_legacy_parser_on_course_scripts(self):
+        processor = DocumentProcessor(chunk_size=800, chunk_overlap=100)
+        docs = os.path.join(os.path.dirname(__file__), "..", "..", "docs")
+        for name in sorted(os.listdir(docs)):
+            path = os.path.join(docs, name)
+            course, chunks = processor.process_course_document(path)
+            self.assertEqual(
+                (course, list(chunks)),
+                legacy_process_course_document(processor, path),
+            )
+
+    def test_lessons_are_emitted_as_they_close(self):
+        processor = DocumentProcessor(chunk_size=800, chunk_overlap=0)
+        read = []
+
+        def lines():
+            for line in [
+                "Course Title: Streaming",
+                "Course Link: https://example.com",
+                "Course Instructor: Ada",
+                "",
+                "Lesson 1: First",
+                "Lesson Link: https://example.com/1",
+                "First lesson text.",
+                "Lesson 2: Second",
+                "Second lesson text.",
+            ]:
+                read.append(line)
+                yield line + "\n"
+
+        course, events = processor.stream_course_document(lines(), "streaming.txt")
+        self.assertEqual((course.title, course.lessons), ("Streaming", []))
+
+        lesson, chunks = next(events)
+        self.assertEqual(lesson.lesson_link, "https://example.com/1")
+        self.assertEqual(
+            chunks.contents(), ["Course Streaming Lesson 1 content: First lesson text."]
+        )
+        # The second lesson has not been read past its first line
+        self.assertEqual(read[-1], "Lesson 2: Second")
+        self.assertEqual([lesson.title for lesson in course.lessons], ["First"])
+
+        lesson, chunks = next(events)
+        self.assertEqual((lesson.lesson_number, list(chunks.chunk_indices)), (2, [1]))
+        self.assertEqual(list(events), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,197 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+import zipfile
+from unittest.mock import patch
+
+from backend import document_readers
+from backend.document_processor import DocumentProcessor
+from backend.document_readers import (
+    get_reader,
+    read_docx_lines,
+    read_pdf_lines,
+    read_text_lines,
+    register_reader,
+    supported_extensions,
+)
+from backend.ingestion import list_course_files
+
+try:
+    import pypdf
+except ImportError:
+    pypdf = None
+
+COURSE_LINES = [
+    "Course Title: Binary Course",
+    "Course Link: https://example.com/binary",
+    "Course Instructor: Ada",
+    "",
+    "Lesson 1: Introduction",
+    "Lesson Link: https://example.com/binary/1",
+    "Welcome to the course. Documents can be binary.",
+    "Lesson 2: Extraction",
+    "Text is extracted before it is chunked.",
+]
+
+
+def write_docx(path, paragraphs):
+    """A minimal Word document with one paragraph per entry"""
+    namespace = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+    body = "".join(
+        f"<w:p><w:r><w:t xml:space='preserve'>{text}</w:t></w:r></w:p>"
+        for text in paragraphs
+    )
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr(
+            "word/document.xml",
+            f"<?xml version='1.0'?><w:document xmlns:w='{namespace}'>"
+            f"<w:body>{body}</w:body></w:document>",
+        )
+
+
+def write_pdf(path, pages):
+    """A minimal PDF with one page per entry, each a list of text lines"""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None]
+    font = 3 + 2 * len(pages)
+    kids = []
+    for index, lines in enumerate(pages):
+        page, content = 3 + 2 * index, 4 + 2 * index
+        kids.append(f"{page} 0 R")
+        text = " ".join(f"({line}) Tj T*" for line in lines)
+        stream = f"BT /F1 12 Tf 14 TL 72 720 Td {text} ET"
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792]"
+            f" /Contents {content} 0 R /Resources << /Font << /F1 {font} 0 R >> >> >>"
+        )
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(pages)} >>"
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    data = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(data))
+        data += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(data)
+    data += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    for offset in offsets:
+        data += f"{offset:010d} 00000 n \n".encode("latin-1")
+    data += (
+        f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n"
+        f"startxref\n{xref}\n%%EOF\n"
+    ).encode("latin-1")
+    with open(path, "wb") as file:
+        file.write(data)
+
+
+class TestReaderRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        document_readers._READERS.pop(".md", None)
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def test_readers_are_chosen_by_extension(self):
+        self.assertIs(get_reader("course.PDF"), read_pdf_lines)
+        self.assertIs(get_reader("course.docx"), read_docx_lines)
+        self.assertIs(get_reader("course.txt"), read_text_lines)
+        # Unknown types are read as text, as before
+        self.assertIs(get_reader("course.rst"), read_text_lines)
+
+    def test_registered_types_are_listed_for_ingestion(self):
+        for name in ("a.txt", "b.md", "c.docx", "d.csv"):
+            open(os.path.join(self.folder, name), "w").close()
+        self.assertEqual(
+            [os.path.basename(path) for path in list_course_files(self.folder)],
+            ["a.txt", "c.docx"],
+        )
+
+        register_reader(".md", read_text_lines)
+
+        self.assertIn(".md", supported_extensions())
+        self.assertEqual(
+            [os.path.basename(path) for path in list_course_files(self.folder)],
+            ["a.txt", "b.md", "c.docx"],
+        )
+
+
+class TestDocxReader(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.path = os.path.join(self.folder, "course.docx")
+        write_docx(self.path, COURSE_LINES)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def test_paragraphs_become_lines(self):
+        lines = list(read_docx_lines(self.path))
+
+        self.assertEqual(lines, [line + "\n" for line in COURSE_LINES])
+
+    def test_docx_course_is_parsed_like_text(self):
+        text_path = os.path.join(self.folder, "course.txt")
+        with open(text_path, "w") as file:
+            file.write("\n".join(COURSE_LINES))
+        processor = DocumentProcessor(chunk_size=800, chunk_overlap=0)
+
+        course, chunks = processor.process_course_document(self.path)
+
+        self.assertEqual(course.title, "Binary Course")
+        self.assertEqual(course.lessons[0].lesson_link, "https://example.com/binary/1")
+        self.assertEqual((course, chunks), processor.process_course_document(text_path))
+        self.assertEqual(processor.read_course_title(self.path), "Binary Course")
+
+
+class TestPdfReader(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.path = os.path.join(self.folder, "course.pdf")
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def test_missing_pypdf_is_reported_instead_of_reading_bytes(self):
+        write_pdf(self.path, [COURSE_LINES])
+        processor = DocumentProcessor(chunk_size=800, chunk_overlap=0)
+
+        with patch.dict(sys.modules, {"pypdf": None}):
+            with self.assertRaisesRegex(ImportError, "pip install pypdf"):
+                processor.process_course_document(self.path)
+
+    @unittest.skipUnless(pypdf, "pypdf is not installed")
+    def test_pdf_course_is_parsed(self):
+        write_pdf(self.path, [COURSE_LINES[:7], COURSE_LINES[7:]])
+        processor = DocumentProcessor(chunk_size=800, chunk_overlap=0)
+
+        course, chunks = processor.process_course_document(self.path)
+
+        self.assertEqual(course.title, "Binary Course")
+        self.assertEqual([lesson.lesson_number for lesson in course.lessons], [1, 2])
+        self.assertIn("Text is extracted", chunks[-1].content)
+
+    @unittest.skipUnless(pypdf, "pypdf is not installed")
+    def test_parallel_page_extraction_matches_serial(self):
+        write_pdf(
+            self.path,
+            [[f"Page {page}. Line {line}." for line in range(3)] for page in range(7)],
+        )
+        serial = list(read_pdf_lines(self.path, workers=1))
+
+        with patch.object(document_readers, "PARALLEL_PDF_MIN_PAGES", 2), patch.object(
+            document_readers, "PDF_PAGES_PER_TASK", 2
+        ):
+            parallel = list(read_pdf_lines(self.path, workers=3))
+
+        self.assertEqual(parallel, serial)
+        self.assertIn("Page 6. Line 2.\n", parallel)
+
+
+if __name__ == "__main__":
+    unittest.main()
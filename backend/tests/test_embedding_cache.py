@@ -0,0 +1,49 @@
+import unittest
+
+import numpy as np
+
+from backend.embedding_cache import EmbeddingCache
+
+
+class TestEmbeddingCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = EmbeddingCache(max_size=2)
+
+    def test_hit_and_miss_counters(self):
+        self.assertIsNone(self.cache.get("model", "mcp"))
+        self.cache.put("model", "mcp", np.ones(3, dtype=np.float32))
+
+        self.assertIsNotNone(self.cache.get("model", "mcp"))
+        stats = self.cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hit_rate"], 0.5)
+
+    def test_key_includes_model_name(self):
+        self.cache.put("model-a", "mcp", np.ones(3))
+        self.assertIsNone(self.cache.get("model-b", "mcp"))
+
+    def test_evicts_least_recently_used(self):
+        self.cache.put("model", "a", np.ones(3))
+        self.cache.put("model", "b", np.ones(3))
+        # Touch "a" so "b" becomes the eviction candidate
+        self.cache.get("model", "a")
+        self.cache.put("model", "c", np.ones(3))
+
+        self.assertIsNotNone(self.cache.get("model", "a"))
+        self.assertIsNone(self.cache.get("model", "b"))
+        self.assertIsNotNone(self.cache.get("model", "c"))
+        self.assertEqual(self.cache.stats()["size"], 2)
+
+    def test_cached_embeddings_are_read_only(self):
+        self.cache.put("model", "a", np.ones(3))
+        with self.assertRaises(ValueError):
+            self.cache.get("model", "a")[0] = 2.0
+
+    def test_normalize_collapses_whitespace(self):
+        self.assertEqual(EmbeddingCache.normalize("  MCP \n course "), "MCP course")
+
+
+if __name__ == "__main__":
+    unittest.main()
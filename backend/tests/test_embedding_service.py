@@ -0,0 +1,170 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+import numpy as np
+
+from backend.embedding_service import (
+    EmbeddingServer,
+    MicroBatchEmbedder,
+    ModelEmbedder,
+    RemoteEmbedder,
+)
+
+
+class FakeModel:
+    """Embeds a text as [len(text), index within the batch]; records batches"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def __call__(self, texts):
+        with self.lock:
+            self.batches.append(list(texts))
+        if "fail" in texts:
+            raise ValueError("model failed")
+        time.sleep(self.delay + (0.5 if "slow" in texts else 0.0))
+        return [
+            np.array([len(text), i], dtype=np.float32) for i, text in enumerate(texts)
+        ]
+
+
+def embed_concurrently(embedder, requests):
+    results = [None] * len(requests)
+    errors = [None] * len(requests)
+
+    def run(index):
+        try:
+            results[index] = embedder(requests[index])
+        except Exception as e:
+            errors[index] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(requests))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+class TestMicroBatchEmbedder(unittest.TestCase):
+
+    def test_concurrent_calls_share_model_calls(self):
+        model = FakeModel(delay=0.05)
+        embedder = MicroBatchEmbedder(model, max_batch_size=64, max_wait_ms=20)
+        requests = [["x" * (i + 1)] for i in range(16)]
+
+        results, errors = embed_concurrently(embedder, requests)
+        embedder.close()
+
+        self.assertEqual(errors, [None] * 16)
+        # Each caller gets the embedding of its own text
+        self.assertEqual([int(result[0][0]) for result in results], list(range(1, 17)))
+        self.assertLess(len(model.batches), 16)
+        self.assertEqual(embedder.stats()["texts"], 16)
+
+    def test_batches_are_bounded_by_max_batch_size(self):
+        model = FakeModel(delay=0.01)
+        embedder = MicroBatchEmbedder(model, max_batch_size=4, max_wait_ms=20)
+
+        results, _ = embed_concurrently(
+            embedder, [["a", "b"]] * 6 + [["c"] * 10]  # The last one is oversized
+        )
+        embedder.close()
+
+        self.assertEqual(sum(len(batch) for batch in model.batches), 22)
+        self.assertIn(["c"] * 10, model.batches)
+        self.assertTrue(
+            all(len(batch) <= 4 for batch in model.batches if batch != ["c"] * 10)
+        )
+        self.assertEqual(len(results[-1]), 10)
+
+    def test_model_errors_reach_every_caller_in_the_batch(self):
+        embedder = MicroBatchEmbedder(FakeModel(), max_wait_ms=0)
+
+        with self.assertRaisesRegex(ValueError, "model failed"):
+            embedder(["fail"])
+        # The worker survives the failure
+        self.assertEqual(len(embedder(["ok"])), 1)
+        embedder.close()
+
+
+class TestEmbeddingServer(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.socket_path = os.path.join(self.temp_dir, "embedding.sock")
+        self.embedder = MicroBatchEmbedder(FakeModel(), max_wait_ms=1)
+        self.server = EmbeddingServer(self.embedder, self.socket_path)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.client = RemoteEmbedder(self.socket_path, timeout=5.0)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.embedder.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_remote_embeddings_match_local(self):
+        texts = ["one", "three", "eleven"]
+
+        remote = self.client(texts)
+
+        self.assertEqual(len(remote), 3)
+        for remote_embedding, local_embedding in zip(remote, FakeModel()(texts)):
+            np.testing.assert_array_equal(remote_embedding, local_embedding)
+        self.assertEqual(self.client([]), [])
+
+    def test_concurrent_clients_share_the_server(self):
+        results, errors = embed_concurrently(
+            self.client, [[f"text {i}"] for i in range(8)]
+        )
+
+        self.assertEqual(errors, [None] * 8)
+        self.assertTrue(all(len(result) == 1 for result in results))
+
+    def test_server_errors_are_raised_by_the_client(self):
+        with self.assertRaisesRegex(RuntimeError, "model failed"):
+            self.client(["fail"])
+        # The connection is still usable afterwards
+        self.assertEqual(len(self.client(["ok"])), 1)
+
+    def test_timed_out_reply_is_not_read_by_the_next_call(self):
+        client = RemoteEmbedder(self.socket_path, timeout=0.2)
+        try:
+            with self.assertRaises(TimeoutError):
+                client(["slow"])
+
+            # Served after the slow call, on a new connection (which picks up
+            # the longer timeout); must not get the slow call's late reply
+            client.timeout = 5.0
+            embedding = client(["eleven"])[0]
+        finally:
+            client.close()
+
+        self.assertEqual(int(embedding[0]), len("eleven"))
+
+
+class TestModelEmbedder(unittest.TestCase):
+
+    def test_unknown_backend_is_an_error(self):
+        with self.assertRaisesRegex(ValueError, "Unknown embedding backend"):
+            ModelEmbedder("all-MiniLM-L6-v2", "tensorrt")
+
+    def test_model_is_loaded_once_per_backend(self):
+        first = ModelEmbedder("all-MiniLM-L6-v2")
+        second = ModelEmbedder("all-MiniLM-L6-v2")
+
+        self.assertIs(first.model, second.model)
+        self.assertEqual(first(["one", "two"])[0].dtype, np.float32)
+
+
+if __name__ == "__main__":
+    unittest.main()
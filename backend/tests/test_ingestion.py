@@ -0,0 +1,325 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from backend import ingestion
+from backend.document_processor import DocumentProcessor
+from backend.ingestion import IngestionPipeline
+from backend.ingestion_lock import IngestionInProgress, IngestionLock
+from backend.ingestion_manifest import IngestionManifest
+from backend.vector_store import VectorStore
+
+COURSE_TEMPLATE = """Course Title: {title}
+Course Link: https://example.com/{slug}
+Course Instructor: Ada
+
+Lesson 0: Introduction
+Lesson Link: https://example.com/{slug}/0
+{body}
+"""
+
+
+class TestIngestionPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.processor = DocumentProcessor(chunk_size=80, chunk_overlap=0)
+        self.vector_store = MagicMock()
+        self.vector_store.embed_documents.side_effect = lambda texts: [
+            [0.0] for _ in texts
+        ]
+        self.vector_store.find_embeddings.return_value = {}
+        self.vector_store.embed_chunks.side_effect = (
+            lambda chunks: VectorStore.embed_chunks(self.vector_store, chunks)
+        )
+        self.paths = [
+            self._write_course(
+                f"Course {i}",
+                f"c{i}",
+                " ".join(f"Sentence {j} of course {i}." for j in range(10)),
+            )
+            for i in range(3)
+        ]
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def _write_course(self, title, slug, body):
+        path = os.path.join(self.folder, f"{slug}.txt")
+        with open(path, "w") as f:
+            f.write(COURSE_TEMPLATE.format(title=title, slug=slug, body=body))
+        return path
+
+    def _written_chunks(self):
+        return [
+            chunk
+            for call in self.vector_store.add_course_content.call_args_list
+            for chunk in call.args[0]
+        ]
+
+    def test_embeds_in_fixed_size_batches_across_courses(self):
+        pipeline = IngestionPipeline(
+            self.processor, self.vector_store, batch_size=4, workers=1
+        )
+
+        stats = pipeline.ingest(self.paths)
+
+        expected = sum(
+            len(self.processor.process_course_document(path)[1]) for path in self.paths
+        )
+        batch_sizes = [
+            len(call.args[0])
+            for call in self.vector_store.embed_documents.call_args_list
+        ]
+        self.assertEqual(stats.courses_added, 3)
+        self.assertEqual(stats.chunks_added, expected)
+        self.assertEqual(len(self._written_chunks()), expected)
+        self.assertTrue(all(size == 4 for size in batch_sizes[:-1]))
+        self.assertLessEqual(batch_sizes[-1], 4)
+        # Each write carries the embeddings computed for that batch
+        for call in self.vector_store.add_course_content.call_args_list:
+            self.assertEqual(len(call.kwargs["embeddings"]), len(call.args[0]))
+
+    def test_existing_courses_are_skipped_before_parsing(self):
+        pipeline = IngestionPipeline(self.processor, self.vector_store, workers=1)
+
+        with patch.object(
+            self.processor,
+            "process_course_document",
+            wraps=self.processor.process_course_document,
+        ) as mock_process:
+            stats = pipeline.ingest(self.paths, existing_titles={"Course 1"})
+
+        parsed = [call.args[0] for call in mock_process.call_args_list]
+        self.assertNotIn(self.paths[1], parsed)
+        self.assertEqual(stats.files_skipped, 1)
+        self.assertEqual(stats.courses_added, 2)
+
+    def test_parallel_parse_matches_serial(self):
+        serial = IngestionPipeline(self.processor, self.vector_store, workers=1)
+        serial.ingest(self.paths)
+        serial_chunks = self._written_chunks()
+
+        self.vector_store.add_course_content.reset_mock()
+        parallel = IngestionPipeline(self.processor, self.vector_store, workers=2)
+        with patch.object(ingestion, "PARALLEL_PARSE_MIN_FILES", 1):
+            stats = parallel.ingest(self.paths)
+
+        self.assertEqual(stats.files_failed, 0)
+        self.assertEqual(self._written_chunks(), serial_chunks)
+
+    def test_parse_workers_extract_pdf_pages_serially(self):
+        processor = DocumentProcessor(chunk_size=80, chunk_overlap=0, page_workers=4)
+        pipeline = IngestionPipeline(processor, self.vector_store, workers=2)
+        pool = MagicMock()
+        pool_map = pool.return_value.__enter__.return_value.map
+        pool_map.side_effect = map
+
+        with patch.object(ingestion, "PARALLEL_PARSE_MIN_FILES", 1), patch.object(
+            ingestion, "ProcessPoolExecutor", pool
+        ):
+            stats = pipeline.ingest(self.paths)
+
+        _, processors, _ = pool_map.call_args.args
+        self.assertEqual(stats.courses_added, 3)
+        self.assertEqual({p.page_workers for p in processors}, {1})
+        self.assertEqual(processor.page_workers, 4)
+
+
+class TestIncrementalIngestion(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.chroma_path = tempfile.mkdtemp()
+        self.store = VectorStore(self.chroma_path, "all-MiniLM-L6-v2")
+        self.processor = DocumentProcessor(chunk_size=60, chunk_overlap=0)
+        self.manifest_path = os.path.join(self.chroma_path, "manifest.json")
+        self.pipeline = IngestionPipeline(self.processor, self.store, workers=1)
+        self.paths = {
+            slug: self._write_course(
+                f"Course {slug}", slug, " ".join(f"Sentence {i}." for i in range(20))
+            )
+            for slug in ("a", "b")
+        }
+        self._ingest()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+        shutil.rmtree(self.chroma_path, ignore_errors=True)
+
+    def _write_course(self, title, slug, body):
+        path = os.path.join(self.folder, f"{slug}.txt")
+        with open(path, "w") as f:
+            f.write(COURSE_TEMPLATE.format(title=title, slug=slug, body=body))
+        return path
+
+    def _ingest(self):
+        file_paths = sorted(
+            os.path.join(self.folder, name) for name in os.listdir(self.folder)
+        )
+        # Reload from disk each time, as a restarted server would
+        manifest = IngestionManifest(self.manifest_path)
+        return self.pipeline.ingest(
+            file_paths, manifest=manifest, folder_path=self.folder
+        )
+
+    def test_unchanged_files_are_skipped_with_stat_only(self):
+        with patch.object(IngestionManifest, "hash_file") as mock_hash, patch.object(
+            self.processor, "process_course_document"
+        ) as mock_process:
+            stats = self._ingest()
+
+        mock_hash.assert_not_called()
+        mock_process.assert_not_called()
+        self.assertEqual(stats.files_skipped, 2)
+        self.assertEqual(stats.chunks_added, 0)
+
+    def test_changed_file_reembeds_only_changed_chunks(self):
+        total = len(self.store.get_course_chunk_ids("Course a"))
+        self._write_course(
+            "Course a",
+            "a",
+            " ".join(f"Sentence {i}." for i in range(19)) + " A brand new ending.",
+        )
+
+        with patch.object(
+            self.store, "embed_documents", wraps=self.store.embed_documents
+        ) as mock_embed:
+            stats = self._ingest()
+
+        embedded = [text for call in mock_embed.call_args_list for text in call.args[0]]
+        self.assertEqual(stats.courses_added, 1)
+        self.assertEqual(len(embedded), 1)
+        self.assertIn("A brand new ending.", embedded[0])
+        self.assertEqual(len(self.store.get_course_chunk_ids("Course a")), total)
+
+    def test_moved_text_keeps_its_ids_and_embeddings(self):
+        before = set(self.store.get_course_chunk_ids("Course a"))
+        self._write_course(
+            "Course a",
+            "a",
+            # Fills a chunk on its own, so the following chunks keep their text
+            "A whole new opening sentence that fills one chunk. "
+            + " ".join(f"Sentence {i}." for i in range(20)),
+        )
+
+        with patch.object(
+            self.store, "embed_documents", wraps=self.store.embed_documents
+        ) as mock_embed:
+            stats = self._ingest()
+
+        after = set(self.store.get_course_chunk_ids("Course a"))
+        embedded = [text for call in mock_embed.call_args_list for text in call.args[0]]
+        self.assertEqual(len(embedded), len(after - before))
+        self.assertIn("A whole new opening", embedded[0])
+        self.assertEqual(stats.chunks_removed, len(before - after))
+        # Text that only moved is rewritten with its stored embedding
+        self.assertGreater(stats.chunks_reused, 0)
+        self.assertEqual(stats.chunks_reused, stats.chunks_added - len(embedded))
+
+    def test_shortened_file_deletes_stale_chunks(self):
+        before = self.store.get_course_chunk_ids("Course a")
+        self._write_course("Course a", "a", "Only one sentence now.")
+
+        stats = self._ingest()
+
+        after = self.store.get_course_chunk_ids("Course a")
+        self.assertEqual(len(after), 1)
+        self.assertEqual(stats.chunks_removed, len(set(before) - set(after)))
+
+    def test_deleted_file_removes_course(self):
+        os.remove(self.paths["b"])
+
+        stats = self._ingest()
+
+        self.assertEqual(stats.files_removed, 1)
+        self.assertEqual(self.store.get_course_chunk_ids("Course b"), [])
+        self.assertEqual(self.store.get_existing_course_titles(), ["Course a"])
+        self.assertIsNone(IngestionManifest(self.manifest_path).get(self.paths["b"]))
+
+    def test_failed_batch_only_fails_its_files(self):
+        for slug in ("a", "b"):
+            self._write_course(
+                f"Course {slug}",
+                slug,
+                " ".join(f"Sentence {i}." for i in range(19)) + " New ending.",
+            )
+        add_course_content = self.store.add_course_content
+
+        def failing_add(chunks, **kwargs):
+            if "Course a" in chunks.course_titles:
+                raise RuntimeError("disk full")
+            return add_course_content(chunks, **kwargs)
+
+        self.pipeline.batch_size = 1
+        with patch.object(self.store, "add_course_content", side_effect=failing_add):
+            stats = self._ingest()
+
+        self.assertEqual(stats.files_failed, 1)
+        self.assertEqual(stats.courses_added, 1)
+        manifest = IngestionManifest(self.manifest_path)
+        self.assertIsNone(manifest.get(self.paths["a"]))
+        self.assertIsNotNone(manifest.get(self.paths["b"]))
+        stored = self.store.course_content.get(where={"course_title": "Course b"})
+        self.assertTrue(any("New ending." in text for text in stored["documents"]))
+
+        # The next run picks the failed file up again
+        stats = self._ingest()
+        self.assertEqual((stats.files_failed, stats.courses_added), (0, 1))
+        self.assertEqual(
+            set(self.store.get_course_chunk_ids("Course a")),
+            set(IngestionManifest(self.manifest_path).get(self.paths["a"]).chunk_ids),
+        )
+
+
+class TestIngestFolder(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.state = tempfile.mkdtemp()
+        with open(os.path.join(self.folder, "a.txt"), "w") as f:
+            f.write(COURSE_TEMPLATE.format(title="Course a", slug="a", body="Hi."))
+        self.vector_store = VectorStore(
+            os.path.join(self.state, "chroma_db"), "all-MiniLM-L6-v2"
+        )
+        self.pipeline = IngestionPipeline(
+            DocumentProcessor(chunk_size=80, chunk_overlap=0),
+            self.vector_store,
+            workers=1,
+        )
+        self.manifest = IngestionManifest(os.path.join(self.state, "manifest.json"))
+        self.lock_path = os.path.join(self.state, "store.lock")
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+        shutil.rmtree(self.state, ignore_errors=True)
+
+    def test_publishes_a_generation_only_when_the_store_changed(self):
+        lock = IngestionLock(self.lock_path)
+
+        stats = self.pipeline.ingest_folder(self.folder, self.manifest, lock=lock)
+        generation = lock.read_generation()
+        self.assertEqual(stats.courses_added, 1)
+        self.assertIsNotNone(generation)
+
+        stats = self.pipeline.ingest_folder(self.folder, self.manifest, lock=lock)
+        self.assertEqual(stats.files_skipped, 1)
+        self.assertEqual(lock.read_generation(), generation)
+
+    def test_refuses_to_run_while_another_process_ingests(self):
+        other = IngestionLock(self.lock_path)
+        other.acquire()
+        try:
+            with self.assertRaises(IngestionInProgress):
+                self.pipeline.ingest_folder(
+                    self.folder, self.manifest, lock=IngestionLock(self.lock_path)
+                )
+        finally:
+            other.release()
+        self.assertEqual(self.vector_store.get_course_count(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from backend.config import Config
+from backend.ingestion_lock import IngestionLock
+from backend.models import Course
+from backend.rag_system import RAGSystem
+
+
+class TestIngestionLock(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, "store.lock")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_lock_is_exclusive(self):
+        # Separate open files conflict like separate processes would
+        first, second = IngestionLock(self.path), IngestionLock(self.path)
+
+        self.assertTrue(first.acquire(blocking=False))
+        self.assertFalse(second.acquire(blocking=False))
+        first.release()
+        self.assertTrue(second.acquire(blocking=False))
+        second.release()
+
+    def test_published_generation_is_visible_to_other_processes(self):
+        writer, reader = IngestionLock(self.path), IngestionLock(self.path)
+        self.assertIsNone(reader.read_generation())
+
+        generation = writer.publish()
+
+        self.assertEqual(reader.read_generation(), generation)
+        self.assertEqual(writer.last_published, generation)
+        self.assertNotEqual(writer.publish(), generation)
+
+
+class TestSharedStore(unittest.TestCase):
+    """A read-only serving process and a separate ingesting process"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.docs = os.path.join(self.temp_dir, "docs")
+        os.makedirs(self.docs)
+        with open(os.path.join(self.docs, "course.txt"), "w") as f:
+            f.write(
+                "Course Title: Shared Course\n"
+                "Course Link: https://example.com/shared\n"
+                "Course Instructor: Ada\n\n"
+                "Lesson 1: Intro\n"
+                "Shared stores are written by one process only.\n"
+            )
+
+        self.config = Config()
+        self.config.CHROMA_PATH = os.path.join(self.temp_dir, "chroma_db")
+        self.config.INGESTION_LOCK_PATH = os.path.join(self.temp_dir, "chroma.lock")
+        self.config.SERVER_ROLE = "serve"
+        self.config.INGESTION_WORKERS = 1
+        with patch.dict(os.environ, {"PERPLEXITY_API_KEY": "fake_api_key"}):
+            self.serving = RAGSystem(self.config)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_serving_store_is_read_only(self):
+        with self.assertRaises(RuntimeError):
+            self.serving.vector_store.add_course_metadata(Course(title="Nope"))
+        with self.assertRaises(RuntimeError):
+            self.serving.add_course_folder(self.docs)
+
+    def test_refresh_picks_up_external_ingestion(self):
+        self.assertFalse(self.serving.refresh_index())
+
+        ingest_config = Config(**{**vars(self.config), "SERVER_ROLE": "standalone"})
+        with patch.dict(os.environ, {"PERPLEXITY_API_KEY": "fake_api_key"}):
+            ingesting = RAGSystem(ingest_config)
+        ingesting.add_course_folder(self.docs)
+        # The writer already sees its own changes
+        self.assertFalse(ingesting.refresh_index())
+        self.assertEqual(self.serving.vector_store.get_course_count(), 0)
+
+        version = self.serving.vector_store.corpus_version
+        self.assertTrue(self.serving.refresh_index())
+
+        store = self.serving.vector_store
+        self.assertEqual(store.get_existing_course_titles(), ["Shared Course"])
+        self.assertGreater(store.corpus_version, version)
+        results = store.search("written by one process", mode="lexical")
+        self.assertIn("one process only", results.documents[0])
+        self.assertFalse(self.serving.refresh_index())
+
+
+if __name__ == "__main__":
+    unittest.main()
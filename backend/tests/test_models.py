@@ -0,0 +1,72 @@
+import pickle
+import unittest
+
+from backend.models import ChunkBatch, CourseChunk
+
+
+def course_chunks():
+    return [
+        CourseChunk(
+            content="Course Agents Lesson 1 content: Tools are functions.",
+            course_title="Agents",
+            lesson_number=1,
+            chunk_index=0,
+        ),
+        # A lesson chunk without the usual prefix is kept as written
+        CourseChunk(
+            content="Plain text from lesson two.",
+            course_title="Agents",
+            lesson_number=2,
+            chunk_index=1,
+        ),
+        CourseChunk(content="No lessons here.", course_title="Notes", chunk_index=0),
+    ]
+
+
+class TestChunkBatch(unittest.TestCase):
+
+    def test_round_trips_course_chunks(self):
+        chunks = course_chunks()
+        batch = ChunkBatch.of(chunks)
+
+        self.assertEqual(list(batch), chunks)
+        self.assertEqual(batch[-1], chunks[-1])
+        self.assertEqual(batch.contents(), [chunk.content for chunk in chunks])
+        self.assertIs(ChunkBatch.of(batch), batch)
+
+    def test_prefix_is_built_on_demand(self):
+        batch = ChunkBatch()
+        batch.append("Tools are functions.", "Agents", 1, 0, prefixed=True)
+
+        self.assertEqual(batch.texts, ["Tools are functions."])
+        self.assertEqual(
+            batch.content(0), "Course Agents Lesson 1 content: Tools are functions."
+        )
+
+    def test_course_titles_are_shared(self):
+        batch = ChunkBatch()
+        for index in range(3):
+            batch.append(f"Text {index}.", "".join(["Age", "nts"]), 1, index)
+
+        self.assertIs(batch.course_titles[0], batch.course_titles[2])
+
+    def test_slices_and_selections_are_batches(self):
+        batch = ChunkBatch.of(course_chunks())
+
+        self.assertEqual(list(batch[1:]), course_chunks()[1:])
+        self.assertEqual(
+            list(batch.select([2, 0])), [course_chunks()[2], course_chunks()[0]]
+        )
+        other = ChunkBatch()
+        other.extend(batch[:1])
+        other.extend(batch[1:])
+        self.assertEqual(other, batch)
+
+    def test_pickles_for_worker_processes(self):
+        batch = ChunkBatch.of(course_chunks())
+
+        self.assertEqual(pickle.loads(pickle.dumps(batch)), batch)
+
+
+if __name__ == "__main__":
+    unittest.main()
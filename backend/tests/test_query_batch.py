@@ -0,0 +1,117 @@
+import shutil
+import tempfile
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from langchain_core.messages import AIMessage
+
+from backend.config import Config
+from backend.models import CourseChunk
+from backend.rag_system import RAGSystem
+
+
+class TestQueryBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        config = Config()
+        config.CHROMA_PATH = self.temp_dir
+        config.BATCH_CONCURRENCY = 2
+        with patch("os.getenv", return_value="fake_api_key"):
+            self.rag_system = RAGSystem(config)
+
+        self.rag_system.vector_store.add_course_content(
+            [
+                CourseChunk(
+                    content="Prompt caching reduces latency.",
+                    course_title="Test Course",
+                    lesson_number=1,
+                    chunk_index=0,
+                ),
+                CourseChunk(
+                    content="MCP servers expose tools.",
+                    course_title="Test Course",
+                    lesson_number=2,
+                    chunk_index=1,
+                ),
+            ]
+        )
+
+        async def fake_ainvoke(messages):
+            return AIMessage(
+                content=f"answer to: {messages[-1].content.splitlines()[0]}"
+            )
+
+        self.rag_system.ai_generator.llm = AsyncMock()
+        self.rag_system.ai_generator.llm.ainvoke.side_effect = fake_ainvoke
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_shared_retrieval_and_ordered_answers(self):
+        queries = ["What is prompt caching?", "What do MCP servers expose?", "Tools?"]
+        store = self.rag_system.vector_store
+
+        with patch.object(
+            store.course_content, "query", wraps=store.course_content.query
+        ) as chroma_query, patch.object(
+            store, "embedder", wraps=store.embedder
+        ) as embed:
+            results = self.rag_system.query_batch(queries)
+
+        self.assertEqual(chroma_query.call_count, 1)
+        self.assertEqual(embed.call_count, 1)
+        self.assertEqual(
+            [result["answer"] for result in results],
+            [
+                f"answer to: Answer this question about course materials: {query}"
+                for query in queries
+            ],
+        )
+        self.assertTrue(all(result["error"] is None for result in results))
+        self.assertTrue(all(result["sources"] for result in results))
+
+    def test_failures_are_reported_per_item(self):
+        ainvoke = self.rag_system.ai_generator.llm.ainvoke
+        original = ainvoke.side_effect
+
+        async def flaky(messages):
+            if "fail" in messages[-1].content:
+                raise RuntimeError("LLM timeout")
+            return await original(messages)
+
+        ainvoke.side_effect = flaky
+        results = self.rag_system.query_batch(["please fail", "caching"])
+
+        self.assertEqual(
+            results[0], {"answer": None, "sources": [], "error": "LLM timeout"}
+        )
+        self.assertIsNone(results[1]["error"])
+
+    def test_retrieval_failure_only_fails_its_query(self):
+        store = self.rag_system.vector_store
+        embedder = store.embedder
+
+        def picky_embedder(texts):
+            if any("poison" in text for text in texts):
+                raise ValueError("cannot embed")
+            return embedder(texts)
+
+        with patch.object(store, "embedder", side_effect=picky_embedder):
+            results = self.rag_system.query_batch(["poison pill", "caching"])
+
+        self.assertEqual(
+            results[0],
+            {"answer": None, "sources": [], "error": "Search error: cannot embed"},
+        )
+        self.assertIsNone(results[1]["error"])
+        self.assertTrue(results[1]["sources"])
+
+    def test_repeated_batches_use_the_response_cache(self):
+        self.rag_system.query_batch(["What is prompt caching?"])
+        self.rag_system.query_batch(["What is prompt caching?"])
+        self.assertEqual(self.rag_system.ai_generator.llm.ainvoke.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+import shutil
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from langchain_core.messages import AIMessage
+
+from backend.config import Config
+from backend.models import Course, CourseChunk
+from backend.query_router import QueryRouter, Route, common_title_words
+from backend.rag_system import RAGSystem
+
+TITLES = [
+    "Building Towards Computer Use with Anthropic",
+    "MCP: Build Rich-Context AI Apps with Anthropic",
+    "Advanced Retrieval for AI with Chroma",
+]
+
+
+class TestQueryRouter(unittest.TestCase):
+
+    def setUp(self):
+        self.vector_store = MagicMock()
+        self.vector_store.get_existing_course_titles.return_value = TITLES
+        self.vector_store.nearest_course_title.return_value = (TITLES[2], 1.5)
+        self.router = QueryRouter(self.vector_store, max_title_distance=0.9)
+
+    def test_acronym_and_lesson(self):
+        self.assertEqual(
+            self.router.route("What does lesson 2 of the MCP course cover?"),
+            Route(course_name=TITLES[1], lesson_number=2),
+        )
+        self.vector_store.nearest_course_title.assert_not_called()
+
+    def test_distinctive_title_words(self):
+        self.assertEqual(
+            self.router.route("How is computer use set up?"), Route(TITLES[0])
+        )
+
+    def test_common_title_words_come_from_the_catalog(self):
+        self.assertEqual(common_title_words(TITLES), {"with", "anthropic", "ai"})
+        self.assertEqual(common_title_words(TITLES[:1]), set())
+        # "AI" is in two of three titles, so it cannot pick out the Chroma course
+        self.assertIsNone(self.router.route("Retrieval tips for AI"))
+
+    def test_embedding_fallback_within_cutoff(self):
+        self.vector_store.nearest_course_title.return_value = (TITLES[2], 0.5)
+        self.assertEqual(
+            self.router.route("How do embeddings rank documents?"), Route(TITLES[2])
+        )
+
+    def test_course_vocabulary_searches_unfiltered(self):
+        self.assertEqual(self.router.route("Which courses mention agents?"), Route())
+
+    def test_ambiguous_queries_fall_back(self):
+        self.assertIsNone(self.router.route("What is the capital of France?"))
+        self.assertIsNone(self.router.route("What is lesson 3 about?"))
+        # "Anthropic" names two courses equally well
+        self.assertIsNone(self.router.route("Anthropic tips and tricks"))
+
+    def test_tool_args(self):
+        self.assertEqual(
+            Route(TITLES[1], 2).tool_args("q"),
+            {"query": "q", "course_name": TITLES[1], "lesson_number": 2},
+        )
+        self.assertEqual(Route().tool_args("q"), {"query": "q"})
+
+
+class TestRAGSystemPreRouting(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        config = Config()
+        config.CHROMA_PATH = self.temp_dir
+        config.PRE_ROUTING = True
+        with patch("os.getenv", return_value="fake_api_key"):
+            self.rag_system = RAGSystem(config)
+
+        store = self.rag_system.vector_store
+        store.add_course_metadata(Course(title=TITLES[1]))
+        store.add_course_content(
+            [
+                CourseChunk(
+                    content="MCP servers expose tools and resources.",
+                    course_title=TITLES[1],
+                    lesson_number=1,
+                    chunk_index=0,
+                )
+            ]
+        )
+
+        self.mock_llm = MagicMock()
+        self.mock_llm.invoke.return_value = AIMessage(content="Tools and resources.")
+        self.rag_system.ai_generator.llm = self.mock_llm
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_routed_query_makes_one_llm_call(self):
+        answer, sources = self.rag_system.query("What do MCP servers expose?")
+
+        self.assertEqual(answer, "Tools and resources.")
+        self.assertEqual(sources[0]["text"], f"{TITLES[1]} - Lesson 1")
+        self.mock_llm.bind_tools.assert_not_called()
+        self.assertEqual(self.mock_llm.invoke.call_count, 1)
+        prompt = self.mock_llm.invoke.call_args[0][0][-1].content
+        self.assertIn("MCP servers expose tools and resources.", prompt)
+
+    def test_follow_ups_use_tool_calling(self):
+        self.mock_llm.bind_tools.return_value.invoke.return_value = AIMessage(
+            content="Direct answer."
+        )
+        session_id = self.rag_system.session_manager.create_session()
+        self.rag_system.session_manager.add_exchange(session_id, "Hi", "Hello")
+
+        answer, _ = self.rag_system.query("What do MCP servers expose?", session_id)
+
+        self.assertEqual(answer, "Direct answer.")
+        self.mock_llm.bind_tools.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
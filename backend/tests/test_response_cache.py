@@ -0,0 +1,112 @@
+import shutil
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from langchain_core.messages import AIMessage
+
+from backend.config import Config
+from backend.models import Course
+from backend.rag_system import RAGSystem
+from backend.response_cache import ResponseCache
+
+
+class TestResponseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = ResponseCache(max_size=2, ttl_seconds=60)
+
+    def test_hit_returns_answer_and_sources(self):
+        key = ResponseCache.key("What is MCP?", 1)
+        self.assertIsNone(self.cache.get(key))
+        self.cache.put(key, "An answer", [{"text": "MCP - Lesson 1"}])
+
+        cached = self.cache.get(ResponseCache.key("  what is   mcp ", 1))
+        self.assertEqual(cached.answer, "An answer")
+        self.assertEqual(cached.sources, [{"text": "MCP - Lesson 1"}])
+        self.assertEqual(self.cache.stats()["hits"], 1)
+
+    def test_corpus_version_is_part_of_key(self):
+        self.cache.put(ResponseCache.key("What is MCP?", 1), "Old answer", [])
+        self.assertIsNone(self.cache.get(ResponseCache.key("What is MCP?", 2)))
+
+    def test_expired_entries_are_dropped(self):
+        key = ResponseCache.key("What is MCP?", 1)
+        with patch("backend.response_cache.time.monotonic", return_value=100.0):
+            self.cache.put(key, "An answer", [])
+        with patch("backend.response_cache.time.monotonic", return_value=161.0):
+            self.assertIsNone(self.cache.get(key))
+        self.assertEqual(self.cache.stats()["size"], 0)
+
+    def test_evicts_least_recently_used(self):
+        keys = [ResponseCache.key(q, 1) for q in ("a", "b", "c")]
+        self.cache.put(keys[0], "A", [])
+        self.cache.put(keys[1], "B", [])
+        self.cache.get(keys[0])
+        self.cache.put(keys[2], "C", [])
+
+        self.assertIsNotNone(self.cache.get(keys[0]))
+        self.assertIsNone(self.cache.get(keys[1]))
+
+    def test_returned_sources_are_copies(self):
+        key = ResponseCache.key("What is MCP?", 1)
+        self.cache.put(key, "An answer", [{"text": "MCP"}])
+        self.cache.get(key).sources[0]["text"] = "changed"
+        self.assertEqual(self.cache.get(key).sources, [{"text": "MCP"}])
+
+
+class TestRAGSystemResponseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        config = Config()
+        config.CHROMA_PATH = self.temp_dir
+        with patch("os.getenv", return_value="fake_api_key"):
+            self.rag_system = RAGSystem(config)
+
+        self.mock_llm = MagicMock()
+        self.mock_llm.bind_tools.return_value.invoke.return_value = AIMessage(
+            content="",
+            tool_calls=[
+                {"name": "search_course_content", "args": {"query": "mcp"}, "id": "1"}
+            ],
+        )
+        self.mock_llm.invoke.return_value = AIMessage(content="MCP is a protocol.")
+        self.rag_system.ai_generator.llm = self.mock_llm
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_repeated_question_skips_llm(self):
+        first = self.rag_system.query("What is MCP?")
+        second = self.rag_system.query("what is mcp")
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.mock_llm.invoke.call_count, 1)
+        cached = self.rag_system.response_cache.get(
+            self.rag_system._cache_key("What is MCP?", None, use_cache=True)
+        )
+        self.assertEqual(
+            cached.tool_calls, [("search_course_content", {"query": "mcp"})]
+        )
+
+    def test_use_cache_false_bypasses_cache(self):
+        self.rag_system.query("What is MCP?")
+        self.rag_system.query("What is MCP?", use_cache=False)
+        self.assertEqual(self.mock_llm.invoke.call_count, 2)
+
+    def test_follow_up_questions_are_not_cached(self):
+        session_id = self.rag_system.session_manager.create_session()
+        self.rag_system.query("What is MCP?", session_id)
+        self.rag_system.query("What is MCP?", session_id)
+        self.assertEqual(self.mock_llm.invoke.call_count, 2)
+
+    def test_ingestion_invalidates_cached_answers(self):
+        self.rag_system.query("What is MCP?")
+        self.rag_system.vector_store.add_course_metadata(Course(title="MCP Course"))
+        self.rag_system.query("What is MCP?")
+        self.assertEqual(self.mock_llm.invoke.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,18 @@
+import threading
+import time
 import unittest
-from unittest.mock import MagicMock
-
-from backend.search_tools import CourseSearchTool
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+from backend.ai_generator import AIGenerator
+from backend.search_tools import (
+    CourseSearchTool,
+    RequestContext,
+    ToolManager,
+    ToolResult,
+)
 from backend.vector_store import SearchResults
+from langchain_core.messages import AIMessage
 
 
 class TestCourseSearchTool(unittest.TestCase):
@@ -28,15 +38,13 @@ class TestCourseSearchTool(unittest.TestCase):
         result = self.search_tool.execute(query="test query")
 
         # Assert the results
-        self.assertIn("[Test Course - Lesson 1]", result)
-        self.assertIn("doc1", result)
-        self.assertIn("[Test Course - Lesson 2]", result)
-        self.assertIn("doc2", result)
-        self.assertEqual(len(self.search_tool.last_sources), 2)
-        self.assertEqual(
-            self.search_tool.last_sources[0]["text"], "Test Course - Lesson 1"
-        )
-        self.assertEqual(self.search_tool.last_sources[0]["link"], "link1")
+        self.assertIn("[Test Course - Lesson 1]", result.text)
+        self.assertIn("doc1", result.text)
+        self.assertIn("[Test Course - Lesson 2]", result.text)
+        self.assertIn("doc2", result.text)
+        self.assertEqual(len(result.sources), 2)
+        self.assertEqual(result.sources[0]["text"], "Test Course - Lesson 1")
+        self.assertEqual(result.sources[0]["link"], "link1")
 
     def test_execute_no_results(self):
         # Mock empty search results
@@ -47,7 +55,7 @@ class TestCourseSearchTool(unittest.TestCase):
         result = self.search_tool.execute(query="test query")
 
         # Assert the result
-        self.assertEqual(result, "No relevant content found.")
+        self.assertEqual(result, ToolResult("No relevant content found."))
 
     def test_execute_with_filters(self):
         # Mock the search results
@@ -68,12 +76,10 @@ class TestCourseSearchTool(unittest.TestCase):
         self.mock_vector_store.search.assert_called_with(
             query="test query", course_name="Filtered Course", lesson_number=3
         )
-        self.assertIn("[Filtered Course - Lesson 3]", result)
-        self.assertIn("doc1", result)
-        self.assertEqual(len(self.search_tool.last_sources), 1)
-        self.assertEqual(
-            self.search_tool.last_sources[0]["text"], "Filtered Course - Lesson 3"
-        )
+        self.assertIn("[Filtered Course - Lesson 3]", result.text)
+        self.assertIn("doc1", result.text)
+        self.assertEqual(len(result.sources), 1)
+        self.assertEqual(result.sources[0]["text"], "Filtered Course - Lesson 3")
 
     def test_execute_error(self):
         # Mock an error
@@ -86,7 +92,95 @@ class TestCourseSearchTool(unittest.TestCase):
         result = self.search_tool.execute(query="test query")
 
         # Assert the result
-        self.assertEqual(result, "Test error")
+        self.assertEqual(result, ToolResult("Test error"))
+
+
+class TestToolManager(unittest.TestCase):
+
+    def setUp(self):
+        self.mock_vector_store = MagicMock()
+        self.mock_vector_store.get_lesson_link.return_value = None
+
+        def search(query, course_name=None, lesson_number=None):
+            if query == "slow":
+                time.sleep(0.5)
+            return SearchResults(
+                documents=[f"about {query}"],
+                metadata=[{"course_title": query, "lesson_number": 1}],
+                distances=[0.1],
+            )
+
+        self.mock_vector_store.search.side_effect = search
+        self.tool_manager = ToolManager()
+        self.tool_manager.register_tool(CourseSearchTool(self.mock_vector_store))
+
+    def test_execute_tool_records_into_context(self):
+        context = RequestContext()
+        tools = self.tool_manager.for_request(context)
+
+        text = tools.execute_tool("search_course_content", query="MCP")
+
+        self.assertIn("about MCP", text)
+        self.assertEqual(context.sources, [{"text": "MCP - Lesson 1", "link": None}])
+        self.assertEqual(
+            context.tool_calls, [("search_course_content", {"query": "MCP"})]
+        )
+        # Without a context nothing is kept between calls
+        self.tool_manager.execute_tool("search_course_content", query="Other")
+        self.assertEqual(len(context.sources), 1)
+
+    def test_concurrent_requests_keep_their_own_sources(self):
+        contexts = [RequestContext() for _ in range(8)]
+
+        def run(index):
+            tools = self.tool_manager.for_request(contexts[index])
+            for _ in range(20):
+                tools.execute_tool("search_course_content", query=f"course {index}")
+
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for index, context in enumerate(contexts):
+            self.assertEqual(len(context.sources), 20)
+            self.assertEqual(
+                {source["text"] for source in context.sources},
+                {f"course {index} - Lesson 1"},
+            )
+
+    def test_timed_out_call_records_nothing(self):
+        with patch("os.getenv", return_value="fake_api_key"):
+            generator = AIGenerator(model="test_model", tool_timeout=0.1)
+        response = AIMessage(
+            content="",
+            tool_calls=[
+                {
+                    "name": "search_course_content",
+                    "args": {"query": query},
+                    "id": f"call_{query}",
+                }
+                for query in ("slow", "fast")
+            ],
+        )
+        context = RequestContext()
+        executor = ThreadPoolExecutor(max_workers=2)
+
+        results = generator._execute_tool_calls(
+            response, self.tool_manager.for_request(context), executor
+        )
+        # Let the slow call finish and try to record
+        executor.shutdown(wait=True)
+
+        self.assertEqual(
+            results[0]["content"],
+            "Tool 'search_course_content' timed out after 0.1s",
+        )
+        self.assertEqual(context.sources, [{"text": "fast - Lesson 1", "link": None}])
+        self.assertEqual(
+            context.tool_calls, [("search_course_content", {"query": "fast"})]
+        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,63 @@
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+from backend.semantic_cache import SemanticCache
+
+
+class TestSemanticCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = SemanticCache(max_size=2, threshold=0.9, ttl_seconds=60)
+
+    def test_similar_query_hits(self):
+        self.cache.put("MCP lesson 2 overview", [1.0, 0.0, 0.0], 1, "Answer", ["s"])
+
+        cached = self.cache.get("What does lesson 2 cover in MCP", [0.95, 0.1, 0.0], 1)
+        self.assertEqual(cached.answer, "Answer")
+        self.assertEqual(cached.sources, ["s"])
+        self.assertEqual(self.cache.stats()["hits"], 1)
+
+    def test_dissimilar_query_misses(self):
+        self.cache.put("MCP lesson 2 overview", [1.0, 0.0, 0.0], 1, "Answer", [])
+        self.assertIsNone(self.cache.get("Chroma retrieval", [0.0, 1.0, 0.0], 1))
+        self.assertEqual(self.cache.stats()["misses"], 1)
+
+    def test_numbers_must_match(self):
+        self.cache.put("MCP lesson 2 overview", [1.0, 0.0, 0.0], 1, "Answer", [])
+        self.assertIsNone(self.cache.get("MCP lesson 3 overview", [1.0, 0.0, 0.0], 1))
+
+    def test_entries_are_scoped_to_corpus_version(self):
+        self.cache.put("MCP lesson 2 overview", [1.0, 0.0, 0.0], 1, "Answer", [])
+        self.assertIsNone(self.cache.get("MCP lesson 2 overview", [1.0, 0.0, 0.0], 2))
+
+    def test_expired_entries_miss(self):
+        with patch("backend.semantic_cache.time.monotonic", return_value=100.0):
+            self.cache.put("MCP", [1.0, 0.0], 1, "Answer", [])
+        with patch("backend.semantic_cache.time.monotonic", return_value=161.0):
+            self.assertIsNone(self.cache.get("MCP", [1.0, 0.0], 1))
+
+    def test_evicts_stale_then_least_recently_used(self):
+        self.cache.put("a", [1.0, 0.0, 0.0], 1, "A", [])
+        self.cache.put("b", [0.0, 1.0, 0.0], 2, "B", [])
+        # "a" belongs to an older corpus version, so it is reclaimed first
+        self.cache.put("c", [0.0, 0.0, 1.0], 2, "C", [])
+        self.assertIsNotNone(self.cache.get("b", [0.0, 1.0, 0.0], 2))
+        self.assertIsNotNone(self.cache.get("c", [0.0, 0.0, 1.0], 2))
+
+        # Both live now: "b" was used less recently than "c"
+        self.cache.get("c", [0.0, 0.0, 1.0], 2)
+        self.cache.put("d", [1.0, 1.0, 0.0], 2, "D", [])
+        self.assertIsNone(self.cache.get("b", [0.0, 1.0, 0.0], 2))
+        self.assertEqual(self.cache.get("d", np.array([1.0, 1.0, 0.0]), 2).answer, "D")
+
+    def test_disabled_when_size_is_zero(self):
+        cache = SemanticCache(max_size=0)
+        cache.put("MCP", [1.0, 0.0], 1, "Answer", [])
+        self.assertFalse(cache.enabled)
+        self.assertIsNone(cache.get("MCP", [1.0, 0.0], 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,156 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+from backend.session_manager import (
+    InMemorySessionStore,
+    SessionManager,
+    SQLiteSessionStore,
+)
+
+
+class SessionManagerContract:
+    """Behaviour every session store must provide through SessionManager"""
+
+    def make_store(self, **kwargs):
+        raise NotImplementedError
+
+    def setUp(self):
+        self.store = self.make_store()
+        self.manager = SessionManager(max_history=2, store=self.store)
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_session_ids_are_unique_and_unguessable(self):
+        ids = {self.manager.create_session() for _ in range(100)}
+        self.assertEqual(len(ids), 100)
+        self.assertNotIn("session_1", ids)
+
+    def test_history_is_formatted_and_trimmed(self):
+        session_id = self.manager.create_session()
+        self.assertIsNone(self.manager.get_conversation_history(session_id))
+
+        for i in range(3):
+            self.manager.add_exchange(session_id, f"question {i}", f"answer {i}")
+
+        self.assertEqual(
+            self.manager.get_conversation_history(session_id),
+            "User: question 1\nAssistant: answer 1\n"
+            "User: question 2\nAssistant: answer 2",
+        )
+
+    def test_unknown_session_is_created_on_write(self):
+        self.manager.add_message("client-supplied", "user", "hello")
+        self.assertEqual(
+            self.manager.get_conversation_history("client-supplied"), "User: hello"
+        )
+
+    def test_clear_session(self):
+        session_id = self.manager.create_session()
+        self.manager.add_exchange(session_id, "question", "answer")
+        self.manager.clear_session(session_id)
+        self.assertIsNone(self.manager.get_conversation_history(session_id))
+
+    def test_concurrent_exchanges_are_not_lost(self):
+        manager = SessionManager(max_history=100, store=self.store)
+        session_id = manager.create_session()
+
+        def add_exchanges(worker):
+            for i in range(10):
+                manager.add_exchange(session_id, f"q{worker}-{i}", f"a{worker}-{i}")
+
+        threads = [threading.Thread(target=add_exchanges, args=(w,)) for w in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(self.store.get_messages(session_id)), 80)
+
+
+class TestInMemorySessionStore(SessionManagerContract, unittest.TestCase):
+
+    def make_store(self, **kwargs):
+        return InMemorySessionStore(**kwargs)
+
+    def test_least_recently_used_session_is_evicted(self):
+        store = self.make_store(max_sessions=2)
+        manager = SessionManager(max_history=2, store=store)
+        first, second = manager.create_session(), manager.create_session()
+        manager.add_message(first, "user", "still here")
+
+        manager.create_session()
+
+        self.assertEqual(len(store), 2)
+        self.assertIsNotNone(manager.get_conversation_history(first))
+        self.assertEqual(store.get_messages(second), [])
+
+    def test_idle_sessions_expire(self):
+        store = self.make_store(ttl_seconds=60)
+        manager = SessionManager(max_history=2, store=store)
+        with patch("backend.session_manager.time.monotonic", return_value=100.0):
+            session_id = manager.create_session()
+            manager.add_message(session_id, "user", "hello")
+        with patch("backend.session_manager.time.monotonic", return_value=161.0):
+            self.assertIsNone(manager.get_conversation_history(session_id))
+            manager.create_session()
+        self.assertEqual(len(store), 1)
+
+
+class TestSQLiteSessionStore(SessionManagerContract, unittest.TestCase):
+
+    def make_store(self, **kwargs):
+        kwargs.setdefault("eviction_interval", 0)
+        return SQLiteSessionStore(os.path.join(self.temp_dir, "sessions.db"), **kwargs)
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        super().setUp()
+
+    def tearDown(self):
+        super().tearDown()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_sessions_are_shared_and_persisted(self):
+        session_id = self.manager.create_session()
+        self.manager.add_exchange(session_id, "question", "answer")
+
+        # A second store on the same file stands in for another worker or a restart
+        other = self.make_store()
+        try:
+            self.assertEqual(
+                SessionManager(2, other).get_conversation_history(session_id),
+                "User: question\nAssistant: answer",
+            )
+        finally:
+            other.close()
+
+    def test_evict_removes_idle_and_excess_sessions(self):
+        store = self.make_store(max_sessions=1, ttl_seconds=60)
+        try:
+            with patch("backend.session_manager.time.time", return_value=100.0):
+                idle = store.create_session()
+            with patch("backend.session_manager.time.time", return_value=200.0):
+                older = store.create_session()
+            with patch("backend.session_manager.time.time", return_value=201.0):
+                newer = store.create_session()
+                self.assertEqual(store.evict(), 2)
+                self.assertEqual(store.get_messages(newer), [])
+                store.append_messages(newer, [], 4)
+
+            remaining = [
+                row[0] for row in store._connection().execute("SELECT id FROM sessions")
+            ]
+            self.assertEqual(remaining, [newer])
+            self.assertNotIn(idle, remaining)
+            self.assertNotIn(older, remaining)
+        finally:
+            store.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
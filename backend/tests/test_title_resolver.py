@@ -0,0 +1,56 @@
+import unittest
+from unittest.mock import MagicMock
+
+from backend.title_resolver import CourseTitleResolver
+
+TITLES = [
+    "Building Towards Computer Use with Anthropic",
+    "MCP: Build Rich-Context AI Apps with Anthropic",
+    "Advanced Retrieval for AI with Chroma",
+    "Prompt Compression and Query Optimization",
+]
+
+
+class TestCourseTitleResolver(unittest.TestCase):
+
+    def setUp(self):
+        self.embedding_lookup = MagicMock(return_value=None)
+        self.resolver = CourseTitleResolver(self.embedding_lookup, max_distance=1.0)
+        self.resolver.set_titles(TITLES)
+
+    def assertResolves(self, course_name, title):
+        self.assertEqual(self.resolver.resolve(course_name), title)
+
+    def test_local_matches(self):
+        self.assertResolves(TITLES[2], TITLES[2])
+        self.assertResolves("advanced retrieval for ai with chroma", TITLES[2])
+        self.assertResolves("MCP", TITLES[1])
+        self.assertResolves("computer use", TITLES[0])
+        self.assertResolves("Chroma retrieval", TITLES[2])
+        self.assertResolves("Prompt Compresion", TITLES[3])
+        self.embedding_lookup.assert_not_called()
+
+    def test_shortest_title_wins_ties(self):
+        self.assertResolves("anthropic", TITLES[0])
+
+    def test_embedding_fallback_respects_cutoff(self):
+        self.embedding_lookup.return_value = (TITLES[3], 0.4)
+        self.assertResolves("making prompts smaller", TITLES[3])
+
+        self.embedding_lookup.return_value = (TITLES[3], 1.5)
+        self.assertResolves("cooking", None)
+
+    def test_results_are_memoized_until_titles_change(self):
+        self.assertResolves("cooking", None)
+        self.assertResolves("cooking", None)
+        self.assertEqual(self.embedding_lookup.call_count, 1)
+
+        self.resolver.add_title("Cooking Basics")
+        self.assertResolves("cooking", "Cooking Basics")
+
+        self.resolver.remove_title("Cooking Basics")
+        self.assertResolves("cooking", None)
+
+
+if __name__ == "__main__":
+    unittest.main()
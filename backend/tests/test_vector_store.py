@@ -0,0 +1,298 @@
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+from backend.models import ChunkBatch, Course, CourseChunk, Lesson
+from backend.vector_store import EmbeddingMismatch, VectorStore
+
+
+class TestVectorStoreCatalogIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.chroma_path = tempfile.mkdtemp()
+        self.store = VectorStore(self.chroma_path, "all-MiniLM-L6-v2")
+        self.course = Course(
+            title="Test Course",
+            course_link="https://example.com/course",
+            instructor="Ada",
+            lessons=[
+                Lesson(
+                    lesson_number=1, title="Intro", lesson_link="https://example.com/1"
+                ),
+                Lesson(lesson_number=2, title="Next"),
+            ],
+        )
+        self.store.add_course_metadata(self.course)
+
+    def tearDown(self):
+        shutil.rmtree(self.chroma_path, ignore_errors=True)
+
+    def test_link_lookups_do_not_query_chroma(self):
+        with patch.object(self.store.course_catalog, "get") as mock_get:
+            self.assertEqual(
+                self.store.get_course_link("Test Course"), "https://example.com/course"
+            )
+            self.assertEqual(
+                self.store.get_lesson_link("Test Course", 1), "https://example.com/1"
+            )
+            self.assertIsNone(self.store.get_lesson_link("Test Course", 2))
+            self.assertIsNone(self.store.get_course_link("Unknown Course"))
+            mock_get.assert_not_called()
+
+    def test_index_is_loaded_from_existing_store(self):
+        reopened = VectorStore(self.chroma_path, "all-MiniLM-L6-v2")
+
+        self.assertEqual(reopened.get_existing_course_titles(), ["Test Course"])
+        self.assertEqual(
+            reopened.get_lesson_link("Test Course", 1), "https://example.com/1"
+        )
+        self.assertEqual(
+            reopened.get_all_courses_metadata()[0]["lessons"][0]["lesson_title"],
+            "Intro",
+        )
+
+    def test_clear_all_data_resets_index(self):
+        self.store.clear_all_data()
+
+        self.assertEqual(self.store.get_course_count(), 0)
+        self.assertIsNone(self.store.get_course_link("Test Course"))
+        self.assertIsNone(self.store.get_lesson_link("Test Course", 1))
+
+
+class TestVectorStoreHybridSearch(unittest.TestCase):
+
+    def setUp(self):
+        self.chroma_path = tempfile.mkdtemp()
+        self.store = VectorStore(self.chroma_path, "all-MiniLM-L6-v2", max_results=2)
+        self.store.add_course_metadata(Course(title="Test Course"))
+        self.chunks = [
+            CourseChunk(
+                content=content,
+                course_title="Test Course",
+                lesson_number=lesson,
+                chunk_index=index,
+            )
+            for index, (lesson, content) in enumerate(
+                [
+                    (1, "Agents call tools to take actions on a computer."),
+                    (1, "Call client.beta.messages.create with the computer_use tool."),
+                    (2, "Prompt caching reduces latency for long prompts."),
+                ]
+            )
+        ]
+        self.store.add_course_content(self.chunks)
+
+    def tearDown(self):
+        shutil.rmtree(self.chroma_path, ignore_errors=True)
+
+    def test_lexical_mode_matches_exact_identifiers(self):
+        results = self.store.search("computer_use", mode="lexical")
+
+        self.assertEqual(results.ids, [VectorStore.chunk_id(self.chunks[1])])
+        self.assertEqual(results.documents, [self.chunks[1].content])
+        self.assertEqual(results.metadata[0]["lesson_number"], 1)
+        self.assertEqual(results.distances, [None])
+
+    def test_hybrid_mode_fuses_both_rankings(self):
+        results = self.store.search("computer_use tool", mode="hybrid")
+
+        self.assertEqual(len(results.documents), 2)
+        self.assertEqual(results.ids[0], VectorStore.chunk_id(self.chunks[1]))
+
+    def test_lexical_search_respects_filters(self):
+        results = self.store.search("prompt", lesson_number=1, mode="lexical")
+        self.assertTrue(results.is_empty())
+
+    def test_lexical_index_follows_deletes_and_reloads(self):
+        self.store.delete_course_content([VectorStore.chunk_id(self.chunks[1])])
+        self.assertTrue(self.store.search("computer_use", mode="lexical").is_empty())
+
+        reopened = VectorStore(self.chroma_path, "all-MiniLM-L6-v2")
+        self.assertEqual(
+            reopened.search("caching", mode="lexical").ids,
+            [VectorStore.chunk_id(self.chunks[2])],
+        )
+
+    def test_reload_stops_the_replaced_client(self):
+        old_system = self.store.client._system
+        with patch.object(old_system, "stop", wraps=old_system.stop) as stop:
+            self.store.reload()
+
+        stop.assert_called_once()
+        self.assertIsNot(self.store.client._system, old_system)
+        self.assertEqual(self.store.course_content.count(), len(self.chunks))
+        self.assertEqual(
+            self.store.search("caching", mode="lexical").ids,
+            [VectorStore.chunk_id(self.chunks[2])],
+        )
+
+    def test_adding_chunks_again_is_idempotent(self):
+        count = self.store.course_content.count()
+        moved = self.chunks[0].model_copy(update={"chunk_index": 7})
+
+        self.store.add_course_content(self.chunks + [moved])
+
+        self.assertEqual(self.store.course_content.count(), count)
+        self.assertEqual(
+            VectorStore.chunk_id(moved), VectorStore.chunk_id(self.chunks[0])
+        )
+
+    def test_chunk_ids_depend_on_course_and_normalized_text(self):
+        chunk = self.chunks[0]
+        respaced = chunk.model_copy(update={"content": f"  {chunk.content}\n"})
+        other_course = chunk.model_copy(update={"course_title": "Other Course"})
+
+        self.assertEqual(VectorStore.chunk_id(respaced), VectorStore.chunk_id(chunk))
+        self.assertNotEqual(
+            VectorStore.chunk_id(other_course), VectorStore.chunk_id(chunk)
+        )
+
+    def test_stored_text_reuses_its_embedding(self):
+        copy = self.chunks[2].model_copy(update={"course_title": "Other Course"})
+
+        with patch.object(self.store, "embed_documents") as mock_embed:
+            embeddings, reused = self.store.embed_chunks([copy])
+
+        mock_embed.assert_not_called()
+        self.assertEqual(reused, 1)
+        self.assertEqual(len(embeddings[0]), 384)
+
+    def test_unknown_mode_is_an_error(self):
+        self.assertIsNotNone(self.store.search("tools", mode="fuzzy").error)
+
+
+class TestEmbeddingCompatibility(unittest.TestCase):
+
+    def setUp(self):
+        self.chroma_path = tempfile.mkdtemp()
+        store = VectorStore(self.chroma_path, "all-MiniLM-L6-v2")
+        store.add_course_content(
+            [
+                CourseChunk(content=content, course_title="Test Course", chunk_index=i)
+                for i, content in enumerate(["Agents call tools.", "Prompt caching."])
+            ]
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.chroma_path, ignore_errors=True)
+
+    def reopen(self, embedder=None):
+        return VectorStore(self.chroma_path, "all-MiniLM-L6-v2", embedder=embedder)
+
+    def test_same_embedder_is_compatible(self):
+        report = self.reopen().verify_embeddings(0.95)
+
+        self.assertEqual(report["checked"], 2)
+        self.assertEqual(report["dimension"], report["stored_dimension"])
+        self.assertAlmostEqual(report["mean_similarity"], 1.0, places=3)
+
+    def test_empty_store_is_compatible(self):
+        self.reopen().clear_all_data()
+
+        self.assertEqual(self.reopen().verify_embeddings(0.95)["checked"], 0)
+
+    def test_other_dimension_is_rejected(self):
+        store = self.reopen(lambda texts: [np.ones(8, dtype=np.float32) for _ in texts])
+
+        with self.assertRaisesRegex(EmbeddingMismatch, "dimension 8"):
+            store.verify_embeddings(0.95)
+
+    def test_drifted_vectors_are_rejected(self):
+        rng = np.random.default_rng(0)
+        store = self.reopen(
+            lambda texts: list(rng.normal(size=(len(texts), 384)).astype(np.float32))
+        )
+
+        self.assertLess(store.check_embedding_compatibility()["mean_similarity"], 0.5)
+        with self.assertRaisesRegex(EmbeddingMismatch, "mean similarity"):
+            store.verify_embeddings(0.95)
+
+
+class TestChunkContext(unittest.TestCase):
+
+    def setUp(self):
+        self.chroma_path = tempfile.mkdtemp()
+        self.chunks = ChunkBatch()
+        for index, text in enumerate(["Agents call tools.", "Prompt caching."]):
+            self.chunks.append(text, "Test Course", index + 1, index, prefixed=True)
+        # Outside any lesson: stored the same way in both modes
+        self.chunks.append("Course overview.", "Test Course", None, 2)
+
+    def tearDown(self):
+        shutil.rmtree(self.chroma_path, ignore_errors=True)
+
+    def open(self, chunk_context):
+        return VectorStore(
+            self.chroma_path, "all-MiniLM-L6-v2", chunk_context=chunk_context
+        )
+
+    def stored(self, store):
+        results = store.course_content.get(include=["documents", "metadatas"])
+        return dict(
+            zip(results["ids"], zip(results["documents"], results["metadatas"]))
+        )
+
+    def test_records_match_course_chunks(self):
+        chunks = list(self.chunks)
+
+        ids, documents, metadatas = self.open("prefix").chunk_records(self.chunks)
+
+        self.assertEqual(ids, [VectorStore.chunk_id(chunk) for chunk in chunks])
+        self.assertEqual(documents, [chunk.content for chunk in chunks])
+        self.assertEqual(metadatas[1]["lesson_number"], 2)
+        self.assertNotIn("lesson_number", metadatas[2])
+
+    def test_metadata_mode_stores_text_without_prefix(self):
+        prefix_ids = self.open("prefix").chunk_records(self.chunks)[0]
+        store = self.open("metadata")
+
+        store.add_course_content(self.chunks)
+
+        stored = self.stored(store)
+        self.assertEqual(set(stored), set(prefix_ids))
+        self.assertEqual(
+            sorted(document for document, _ in stored.values()),
+            ["Agents call tools.", "Course overview.", "Prompt caching."],
+        )
+        self.assertEqual(store.stored_chunk_context(), "metadata")
+        results = store.search("caching", limit=1)
+        self.assertEqual(results.documents, ["Prompt caching."])
+        self.assertEqual(results.metadata[0]["lesson_number"], 2)
+
+    def test_migration_rewrites_chunks_in_place(self):
+        self.open("prefix").add_course_content(self.chunks)
+        before = self.stored(self.open("prefix"))
+        store = self.open("metadata")
+
+        with self.assertRaisesRegex(EmbeddingMismatch, "--migrate-context"):
+            store.verify_embeddings(0.95)
+        self.assertEqual(store.migrate_chunk_context(batch_size=1), 2)
+
+        after = self.stored(store)
+        self.assertEqual(set(after), set(before))
+        self.assertEqual(
+            {document for document, _ in after.values()},
+            {"Agents call tools.", "Prompt caching.", "Course overview."},
+        )
+        self.assertEqual(store.verify_embeddings(0.95)["chunk_context"], "metadata")
+        self.assertEqual(store.migrate_chunk_context(), 0)
+        # Incremental ingestion finds the migrated chunks unchanged
+        ids, documents, metadatas = store.chunk_records(self.chunks)
+        self.assertEqual(
+            store.get_chunks(ids), dict(zip(ids, zip(documents, metadatas)))
+        )
+
+        back = self.open("prefix")
+        self.assertEqual(back.migrate_chunk_context(), 2)
+        self.assertEqual(self.stored(back), before)
+
+    def test_unknown_mode_is_an_error(self):
+        with self.assertRaises(ValueError):
+            self.open("suffix")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+import re
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+# Below this trigram Jaccard similarity a fuzzy title match is rejected
+MIN_TRIGRAM_SIMILARITY = 0.35
+
+# Memoized inputs kept before the memo is reset
+MAX_MEMO_SIZE = 4096
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def _tokens(text: str) -> Set[str]:
+    return set(_TOKEN_PATTERN.findall(text.casefold()))
+
+
+def _trigrams(text: str) -> Set[str]:
+    padded = f"  {' '.join(text.casefold().split())} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class CourseTitleResolver:
+    """
+    Resolves a user- or LLM-supplied course name to a catalog title.
+
+    Cheap deterministic matches are tried in order: exact, case-insensitive,
+    prefix, substring, all-tokens and trigram similarity. Only when none
+    applies is the embedding lookup consulted, and its nearest title is
+    accepted only within max_distance. Among several candidates at one stage
+    the shortest title wins, so "MCP" prefers the title that is mostly "MCP".
+    Results (including misses) are memoized per input until the titles change.
+    """
+
+    def __init__(
+        self,
+        embedding_lookup: Optional[Callable[[str], Optional[Tuple[str, float]]]] = None,
+        max_distance: float = 1.3,
+    ):
+        self.embedding_lookup = embedding_lookup
+        self.max_distance = max_distance
+        self._lock = threading.Lock()
+        self._titles: Dict[str, Tuple[str, Set[str], Set[str]]] = {}
+        self._memo: Dict[str, Optional[str]] = {}
+
+    # The titles dict is replaced rather than mutated, so resolve() can match
+    # against a snapshot without holding the lock
+
+    def set_titles(self, titles: Iterable[str]):
+        """Replace the known titles"""
+        entries = {title: self._entry(title) for title in titles}
+        with self._lock:
+            self._titles = entries
+            self._memo = {}
+
+    def add_title(self, title: str):
+        entry = self._entry(title)
+        with self._lock:
+            self._titles = {**self._titles, title: entry}
+            self._memo = {}
+
+    def remove_title(self, title: str):
+        with self._lock:
+            if title in self._titles:
+                self._titles = {
+                    known: entry
+                    for known, entry in self._titles.items()
+                    if known != title
+                }
+                self._memo = {}
+
+    @staticmethod
+    def _entry(title: str) -> Tuple[str, Set[str], Set[str]]:
+        return title.casefold(), _tokens(title), _trigrams(title)
+
+    def resolve(self, course_name: str) -> Optional[str]:
+        """Get the catalog title a course name refers to, or None"""
+        with self._lock:
+            if course_name in self._memo:
+                return self._memo[course_name]
+            titles = self._titles
+
+        title = self._match_locally(course_name, titles)
+        if title is None and self.embedding_lookup is not None and titles:
+            nearest = self.embedding_lookup(course_name)
+            if nearest is not None and nearest[1] <= self.max_distance:
+                title = nearest[0]
+
+        with self._lock:
+            # Don't memoize against titles that changed during the lookup
+            if titles is self._titles:
+                if len(self._memo) >= MAX_MEMO_SIZE:
+                    self._memo = {}
+                self._memo[course_name] = title
+        return title
+
+    @staticmethod
+    def _shortest(candidates: List[str]) -> Optional[str]:
+        return min(candidates, key=lambda title: (len(title), title), default=None)
+
+    def _match_locally(
+        self, course_name: str, titles: Dict[str, Tuple[str, Set[str], Set[str]]]
+    ) -> Optional[str]:
+        if course_name in titles:
+            return course_name
+
+        name = " ".join(course_name.casefold().split())
+        if not name:
+            return None
+
+        for predicate in (
+            lambda folded: folded == name,
+            lambda folded: folded.startswith(name),
+            lambda folded: name in folded,
+        ):
+            match = self._shortest(
+                [title for title, (folded, _, _) in titles.items() if predicate(folded)]
+            )
+            if match:
+                return match
+
+        name_tokens = _tokens(name)
+        if name_tokens:
+            match = self._shortest(
+                [
+                    title
+                    for title, (_, tokens, _) in titles.items()
+                    if name_tokens <= tokens
+                ]
+            )
+            if match:
+                return match
+
+        name_trigrams = _trigrams(name)
+        scored = [
+            (len(name_trigrams & trigrams) / len(name_trigrams | trigrams), title)
+            for title, (_, _, trigrams) in titles.items()
+        ]
+        similarity, title = max(
+            scored, key=lambda item: (item[0], -len(item[1])), default=(0.0, None)
+        )
+        return title if similarity >= MIN_TRIGRAM_SIMILARITY else None
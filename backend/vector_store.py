@@ -1,10 +1,18 @@
-from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+import hashlib
+import json
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
 
 import chromadb
+import numpy as np
+from chromadb.api.shared_system_client import SharedSystemClient
 from chromadb.config import Settings
 
-from .models import Course, CourseChunk
+from .bm25_index import BM25Index, reciprocal_rank_fusion
+from .embedding_cache import EmbeddingCache
+from .embedding_service import MicroBatchEmbedder, load_model_embedder
+from .models import ChunkBatch, Course, CourseChunk
+from .title_resolver import CourseTitleResolver
 
 
 @dataclass
@@ -13,22 +21,30 @@ class SearchResults:
 
     documents: List[str]
     metadata: List[Dict[str, Any]]
-    distances: List[float]
+    distances: List[Optional[float]]  # None for lexical-only matches
     error: Optional[str] = None
+    ids: List[str] = field(default_factory=list)
 
     @classmethod
-    def from_chroma(cls, chroma_results: Dict) -> "SearchResults":
-        """Create SearchResults from ChromaDB query results"""
+    def from_chroma(cls, chroma_results: Dict, index: int = 0) -> "SearchResults":
+        """Create SearchResults from (one query of) ChromaDB query results"""
         return cls(
             documents=(
-                chroma_results["documents"][0] if chroma_results["documents"] else []
+                chroma_results["documents"][index]
+                if chroma_results["documents"]
+                else []
             ),
             metadata=(
-                chroma_results["metadatas"][0] if chroma_results["metadatas"] else []
+                chroma_results["metadatas"][index]
+                if chroma_results["metadatas"]
+                else []
             ),
             distances=(
-                chroma_results["distances"][0] if chroma_results["distances"] else []
+                chroma_results["distances"][index]
+                if chroma_results["distances"]
+                else []
             ),
+            ids=chroma_results["ids"][index] if chroma_results.get("ids") else [],
         )
 
     @classmethod
@@ -41,21 +57,110 @@ class SearchResults:
         return len(self.documents) == 0
 
 
+def content_hash(text: str) -> str:
+    """Hash of a chunk's text with whitespace normalized"""
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+
+def _chunk_id(course_title: str, digest: str) -> str:
+    """Chunk ID from its course and content_hash (see VectorStore.chunk_id)"""
+    course_digest = hashlib.sha256(f"{course_title}\n{digest}".encode("utf-8"))
+    return f"{course_title.replace(' ', '_')}_{course_digest.hexdigest()[:20]}"
+
+
+def _detach_chroma_system(client):
+    """
+    Drop a client's system from ChromaDB's per-path cache and return it.
+
+    A new client for the same path otherwise reuses the cached system, whose
+    in-memory index misses other processes' writes. Relies on private
+    SharedSystemClient state as of chromadb 1.0.15.
+    """
+    identifier = SharedSystemClient._get_identifier_from_settings(client.get_settings())
+    return SharedSystemClient._identifier_to_system.pop(identifier, None)
+
+
+class EmbeddingMismatch(RuntimeError):
+    """Raised when stored vectors were not made by the configured embedder"""
+
+
+# Retrieval modes accepted by VectorStore.search
+SEARCH_MODES = ("hybrid", "dense", "lexical")
+
+# Hybrid search fuses this many candidates per requested result from each ranker
+HYBRID_CANDIDATES_PER_RESULT = 4
+
+# How a lesson chunk's course and lesson context is stored: "prefix" embeds and
+# stores it as text ("Course ... Lesson N content: ") before the chunk,
+# "metadata" leaves it to the chunk's metadata
+CHUNK_CONTEXT_MODES = ("prefix", "metadata")
+
+
 class VectorStore:
     """Vector storage using ChromaDB for course content and metadata"""
 
-    def __init__(self, chroma_path: str, embedding_model: str, max_results: int = 5):
+    def __init__(
+        self,
+        chroma_path: str,
+        embedding_model: str,
+        max_results: int = 5,
+        embedding_cache_size: int = 1024,
+        search_mode: str = "hybrid",
+        course_name_max_distance: float = 1.3,
+        read_only: bool = False,
+        embedder: Optional[Callable[[List[str]], Sequence]] = None,
+        chunk_context: str = "prefix",
+    ):
+        if search_mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode: {search_mode}")
+        if chunk_context not in CHUNK_CONTEXT_MODES:
+            raise ValueError(f"Unknown chunk context mode: {chunk_context}")
+        self.chroma_path = chroma_path
         self.max_results = max_results
-        # Initialize ChromaDB client
-        self.client = chromadb.PersistentClient(
-            path=chroma_path, settings=Settings(anonymized_telemetry=False)
+        self.search_mode = search_mode
+        self.chunk_context = chunk_context
+        self.embedding_model = embedding_model
+        # Serving processes of a multi-worker deployment never write; another
+        # process ingests and they reload() when it publishes changes
+        self.read_only = read_only
+
+        # All embedding (queries, course names, ingested chunks) goes through
+        # one micro-batching embedder, in-process or a shared sidecar (see
+        # embedding_service); ChromaDB is always handed precomputed embeddings
+        self.embedder = (
+            embedder
+            if embedder is not None
+            else MicroBatchEmbedder(load_model_embedder(embedding_model))
         )
 
-        # Set up sentence transformer embedding function
-        self.embedding_function = (
-            chromadb.utils.embedding_functions.SentenceTransformerEmbeddingFunction(
-                model_name=embedding_model
-            )
+        self._open_client()
+
+        # Query embeddings for repeated strings (queries, course names)
+        self.embedding_cache = EmbeddingCache(embedding_cache_size)
+
+        # Course names are matched against catalog titles before the model is used
+        self.title_resolver = CourseTitleResolver(
+            self.nearest_course_title, course_name_max_distance
+        )
+
+        # In-process catalog index: title -> course metadata (lessons parsed) and
+        # (title, lesson_number) -> lesson link, so lookups need no ChromaDB I/O
+        self._catalog: Dict[str, Dict[str, Any]] = {}
+        self._lesson_links: Dict[Tuple[str, int], Optional[str]] = {}
+        self._load_catalog_index()
+
+        # BM25 index over course_content for exact terms (API names, code tokens)
+        self.lexical_index = BM25Index()
+        self._load_lexical_index()
+
+        # Bumped on every write so caches of derived answers can tell when the
+        # corpus they were computed from has changed
+        self.corpus_version = 0
+
+    def _open_client(self):
+        """Open the ChromaDB client and its collections"""
+        self.client = chromadb.PersistentClient(
+            path=self.chroma_path, settings=Settings(anonymized_telemetry=False)
         )
 
         # Create collections for different types of data
@@ -66,18 +171,300 @@ class VectorStore:
             "course_content"
         )  # Actual course material
 
+    def reload(self):
+        """
+        Reopen the store to see writes made by another process.
+
+        An open ChromaDB client keeps its vector index in memory and does not
+        notice writes from other processes, so the client is rebuilt along
+        with the catalog and BM25 indexes. The old client is stopped once
+        replaced; a query still running on it gets a search error.
+        """
+        old_system = _detach_chroma_system(self.client)
+        self._open_client()
+        if old_system is not None:
+            old_system.stop()
+        self._load_catalog_index()
+
+        lexical_index = BM25Index()
+        self._fill_lexical_index(lexical_index)
+        self.lexical_index = lexical_index
+        self.corpus_version += 1
+
+    def _check_writable(self):
+        if self.read_only:
+            raise RuntimeError("Vector store is open read-only")
+
     def _create_collection(self, name: str):
         """Create or get a ChromaDB collection"""
-        return self.client.get_or_create_collection(
-            name=name, embedding_function=self.embedding_function
+        # No embedding function, so a process using a remote embedder never
+        # loads the model
+        return self.client.get_or_create_collection(name=name, embedding_function=None)
+
+    def _load_catalog_index(self):
+        """(Re)build the in-process catalog index from the course_catalog collection"""
+        catalog: Dict[str, Dict[str, Any]] = {}
+        lesson_links: Dict[Tuple[str, int], Optional[str]] = {}
+        try:
+            results = self.course_catalog.get()
+        except Exception as e:
+            print(f"Error loading course catalog index: {e}")
+            results = {}
+
+        for metadata in results.get("metadatas") or []:
+            course_meta = self._parse_course(metadata)
+            catalog[course_meta["title"]] = course_meta
+            for lesson in course_meta["lessons"]:
+                lesson_links[(course_meta["title"], lesson.get("lesson_number"))] = (
+                    lesson.get("lesson_link")
+                )
+
+        # Swapped in whole so concurrent readers never see a partial index
+        self._catalog = catalog
+        self._lesson_links = lesson_links
+        self.title_resolver.set_titles(catalog)
+
+    def _load_lexical_index(self):
+        """(Re)build the BM25 index from the course_content collection"""
+        self.lexical_index.clear()
+        self._fill_lexical_index(self.lexical_index)
+
+    def _fill_lexical_index(self, lexical_index: BM25Index):
+        try:
+            results = self.course_content.get(include=["documents", "metadatas"])
+        except Exception as e:
+            print(f"Error loading lexical index: {e}")
+            return
+
+        lexical_index.add(results["ids"], results["documents"], results["metadatas"])
+
+    @staticmethod
+    def _parse_course(metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Catalog entry metadata with its lessons parsed"""
+        course_meta = metadata.copy()
+        course_meta["lessons"] = json.loads(course_meta.pop("lessons_json", "[]"))
+        return course_meta
+
+    def _index_course(self, metadata: Dict[str, Any]):
+        """Add one catalog entry's metadata to the in-process index"""
+        course_meta = self._parse_course(metadata)
+
+        title = course_meta["title"]
+        self._unindex_course(title)
+        self._catalog[title] = course_meta
+        self.title_resolver.add_title(title)
+        for lesson in course_meta["lessons"]:
+            self._lesson_links[(title, lesson.get("lesson_number"))] = lesson.get(
+                "lesson_link"
+            )
+
+    def _unindex_course(self, course_title: str):
+        """Remove a course and its lesson links from the in-process index"""
+        course_meta = self._catalog.pop(course_title, None)
+        self.title_resolver.remove_title(course_title)
+        if course_meta:
+            for lesson in course_meta["lessons"]:
+                self._lesson_links.pop(
+                    (course_title, lesson.get("lesson_number")), None
+                )
+
+    def embed_query(self, text: str):
+        """Embed a query string, reusing cached embeddings for repeated text"""
+        return self.embed_queries([text])[0]
+
+    def embed_queries(self, texts: List[str]) -> List:
+        """Embed query strings, computing all cache misses in one model call"""
+        normalized = [EmbeddingCache.normalize(text) for text in texts]
+        embeddings = [
+            self.embedding_cache.get(self.embedding_model, text) for text in normalized
+        ]
+
+        missing = list(
+            dict.fromkeys(
+                text
+                for text, embedding in zip(normalized, embeddings)
+                if embedding is None
+            )
+        )
+        if missing:
+            computed = dict(zip(missing, self.embedder(missing)))
+            for text, embedding in computed.items():
+                self.embedding_cache.put(self.embedding_model, text, embedding)
+            embeddings = [
+                computed[text] if embedding is None else embedding
+                for text, embedding in zip(normalized, embeddings)
+            ]
+        return embeddings
+
+    def embed_documents(self, texts: List[str]) -> List:
+        """Embed a batch of documents in a single model call"""
+        if not texts:
+            return []
+        return self.embedder(texts)
+
+    def check_embedding_compatibility(self, sample_size: int = 16) -> Dict[str, Any]:
+        """
+        Compare a sample of stored chunk vectors with the same chunks embedded now.
+
+        Switching model or backend (e.g. EMBEDDING_BACKEND) either changes the
+        dimension, which breaks vector search outright, or shifts the vectors,
+        which quietly degrades it. Returns the number of chunks checked, both
+        dimensions, the min and mean cosine similarity of the pairs and the
+        chunk context mode of the stored chunks (see stored_chunk_context).
+        """
+        report: Dict[str, Any] = {
+            "checked": 0,
+            "dimension": None,
+            "stored_dimension": None,
+            "min_similarity": None,
+            "mean_similarity": None,
+            "chunk_context": self.stored_chunk_context(sample_size),
+        }
+        results = self.course_content.get(
+            limit=sample_size, include=["documents", "embeddings"]
+        )
+        documents = results.get("documents") or []
+        if not documents:
+            return report
+
+        stored = np.asarray(results["embeddings"], dtype=np.float32)
+        current = np.asarray(self.embed_documents(documents), dtype=np.float32)
+        report["checked"] = len(documents)
+        report["stored_dimension"] = stored.shape[1]
+        report["dimension"] = current.shape[1]
+        if stored.shape != current.shape:
+            return report
+
+        norms = np.linalg.norm(stored, axis=1) * np.linalg.norm(current, axis=1)
+        similarity = np.sum(stored * current, axis=1) / np.maximum(norms, 1e-12)
+        report["min_similarity"] = round(float(similarity.min()), 4)
+        report["mean_similarity"] = round(float(similarity.mean()), 4)
+        return report
+
+    def verify_embeddings(self, min_similarity: float) -> Dict[str, Any]:
+        """
+        Check that stored vectors match the configured embedder.
+
+        Raises:
+            EmbeddingMismatch: If dimensions differ or the mean similarity of
+                the sample is below min_similarity
+        """
+        report = self.check_embedding_compatibility()
+        if not report["checked"]:
+            return report  # Nothing stored yet
+
+        if report["chunk_context"] not in (None, self.chunk_context):
+            raise EmbeddingMismatch(
+                f"Stored chunks were embedded with chunk context mode"
+                f" {report['chunk_context']!r}, not {self.chunk_context!r}."
+                " Re-embed them with `python -m backend.ingest --migrate-context`."
+            )
+        if report["dimension"] != report["stored_dimension"]:
+            problem = (
+                f"dimension {report['dimension']} does not match the stored"
+                f" {report['stored_dimension']}"
+            )
+        elif report["mean_similarity"] < min_similarity:
+            problem = (
+                f"mean similarity to stored vectors is {report['mean_similarity']}"
+                f" (minimum {min_similarity})"
+            )
+        else:
+            return report
+        raise EmbeddingMismatch(
+            f"Embeddings from {self.embedding_model} are incompatible with the"
+            f" vector store: {problem}. Rebuild it with"
+            " `python -m backend.ingest --clear`."
         )
 
+    def stored_chunk_context(self, sample_size: int = 16) -> Optional[str]:
+        """
+        Chunk context mode of the stored lesson chunks, judged from a sample:
+        "prefix" or "metadata", "mixed" (e.g. an interrupted migration), or
+        None if no lesson chunks are stored
+        """
+        results = self.course_content.get(
+            where={"lesson_number": {"$gte": 0}},
+            limit=sample_size,
+            include=["documents", "metadatas"],
+        )
+        if not results["ids"]:
+            return None
+        prefixed = {
+            document.startswith(
+                ChunkBatch.prefix(metadata["course_title"], metadata["lesson_number"])
+            )
+            for document, metadata in zip(results["documents"], results["metadatas"])
+        }
+        if len(prefixed) > 1:
+            return "mixed"
+        return "prefix" if prefixed.pop() else "metadata"
+
+    def migrate_chunk_context(self, batch_size: int = 64) -> int:
+        """
+        Rewrite stored lesson chunks in the configured chunk context mode.
+
+        Chunks stored in the other mode get the lesson prefix added to or
+        removed from their text and are re-embedded in batches, reusing stored
+        vectors for identical text. Chunk IDs do not depend on the mode, so
+        they and the ingestion manifest stay valid. Chunks already in the
+        configured mode are skipped, so an interrupted migration can simply
+        be run again. Returns the number of chunks rewritten.
+        """
+        self._check_writable()
+        ids = self.course_content.get(where={"lesson_number": {"$gte": 0}}, include=[])[
+            "ids"
+        ]
+        migrated = 0
+        for offset in range(0, len(ids), batch_size):
+            results = self.course_content.get(
+                ids=ids[offset : offset + batch_size],
+                include=["documents", "metadatas"],
+            )
+            chunk_ids = []
+            chunks = ChunkBatch()
+            for chunk_id, document, metadata in zip(
+                results["ids"], results["documents"], results["metadatas"]
+            ):
+                course_title = metadata["course_title"]
+                lesson_number = metadata["lesson_number"]
+                prefix = ChunkBatch.prefix(course_title, lesson_number)
+                prefixed = document.startswith(prefix)
+                if prefixed == (self.chunk_context == "prefix"):
+                    continue  # Already in the configured mode
+                chunk_ids.append(chunk_id)
+                chunks.append(
+                    document[len(prefix) :] if prefixed else document,
+                    course_title,
+                    lesson_number,
+                    metadata["chunk_index"],
+                    prefixed=True,
+                )
+            if not chunk_ids:
+                continue
+
+            embeddings = self.embed_chunks(chunks)[0]
+            _, documents, metadatas = self.chunk_records(chunks)
+            self.course_content.upsert(
+                documents=documents,
+                metadatas=metadatas,
+                ids=chunk_ids,
+                embeddings=embeddings,
+            )
+            self.lexical_index.add(chunk_ids, documents, metadatas)
+            migrated += len(chunk_ids)
+
+        if migrated:
+            self.corpus_version += 1
+        return migrated
+
     def search(
         self,
         query: str,
         course_name: Optional[str] = None,
         lesson_number: Optional[int] = None,
         limit: Optional[int] = None,
+        mode: Optional[str] = None,
     ) -> SearchResults:
         """
         Main search interface that handles course resolution and content search.
@@ -87,10 +474,16 @@ class VectorStore:
             course_name: Optional course name/title to filter by
             lesson_number: Optional lesson number to filter by
             limit: Maximum results to return
+            mode: "hybrid" (BM25 and vector results fused by reciprocal rank),
+                "dense" or "lexical"; defaults to the store's search_mode
 
         Returns:
             SearchResults object with documents and metadata
         """
+        mode = mode or self.search_mode
+        if mode not in SEARCH_MODES:
+            return SearchResults.empty(f"Unknown search mode: {mode}")
+
         # Step 1: Resolve course name if provided
         course_title = None
         if course_name:
@@ -106,21 +499,147 @@ class VectorStore:
         search_limit = limit if limit is not None else self.max_results
 
         try:
-            results = self.course_content.query(
-                query_texts=[query], n_results=search_limit, where=filter_dict
+            if mode == "dense":
+                return self._dense_search(query, filter_dict, search_limit)
+
+            dense = SearchResults(documents=[], metadata=[], distances=[])
+            if mode == "hybrid":
+                dense = self._dense_search(
+                    query, filter_dict, search_limit * HYBRID_CANDIDATES_PER_RESULT
+                )
+            return self._combine_with_lexical(
+                query, dense, mode, search_limit, course_title, lesson_number
             )
-            return SearchResults.from_chroma(results)
         except Exception as e:
             return SearchResults.empty(f"Search error: {str(e)}")
 
+    def search_batch(
+        self,
+        queries: List[str],
+        limit: Optional[int] = None,
+        mode: Optional[str] = None,
+    ) -> List[SearchResults]:
+        """
+        Search course content for many queries in one retrieval pass.
+
+        All queries are embedded in one model call and sent to ChromaDB as a
+        single multi-query request; BM25 matching and fusion then run per query.
+
+        Args:
+            queries: What to search for, one entry per query
+            limit: Maximum results to return per query
+            mode: "hybrid", "dense" or "lexical"; defaults to search_mode
+
+        Returns:
+            One SearchResults per query, in order
+        """
+        mode = mode or self.search_mode
+        if mode not in SEARCH_MODES:
+            return [
+                SearchResults.empty(f"Unknown search mode: {mode}") for _ in queries
+            ]
+        if not queries:
+            return []
+
+        search_limit = limit if limit is not None else self.max_results
+        try:
+            dense_batch = [
+                SearchResults(documents=[], metadata=[], distances=[]) for _ in queries
+            ]
+            if mode != "lexical":
+                n_results = search_limit
+                if mode == "hybrid":
+                    n_results *= HYBRID_CANDIDATES_PER_RESULT
+                results = self.course_content.query(
+                    query_embeddings=self.embed_queries(queries), n_results=n_results
+                )
+                dense_batch = [
+                    SearchResults.from_chroma(results, index)
+                    for index in range(len(queries))
+                ]
+            if mode == "dense":
+                return dense_batch
+
+            return [
+                self._combine_with_lexical(query, dense, mode, search_limit)
+                for query, dense in zip(queries, dense_batch)
+            ]
+        except Exception as e:
+            return [SearchResults.empty(f"Search error: {str(e)}") for _ in queries]
+
+    def _combine_with_lexical(
+        self,
+        query: str,
+        dense: SearchResults,
+        mode: str,
+        limit: int,
+        course_title: Optional[str] = None,
+        lesson_number: Optional[int] = None,
+    ) -> SearchResults:
+        """BM25 results alone ("lexical") or fused with dense results ("hybrid")"""
+        lexical_ids = [
+            chunk_id
+            for chunk_id, _ in self.lexical_index.search(
+                query,
+                limit if mode == "lexical" else limit * HYBRID_CANDIDATES_PER_RESULT,
+                course_title,
+                lesson_number,
+            )
+        ]
+        if mode == "lexical":
+            return self._collect_results(lexical_ids, dense)
+
+        fused = reciprocal_rank_fusion([dense.ids, lexical_ids])
+        return self._collect_results(fused[:limit], dense)
+
+    def _dense_search(
+        self, query: str, filter_dict: Optional[Dict], limit: int
+    ) -> SearchResults:
+        """Vector search over course_content"""
+        results = self.course_content.query(
+            query_embeddings=[self.embed_query(query)],
+            n_results=limit,
+            where=filter_dict,
+        )
+        return SearchResults.from_chroma(results)
+
+    def _collect_results(self, ids: List[str], dense: SearchResults) -> SearchResults:
+        """Build results for ranked IDs from dense hits and the lexical index"""
+        dense_hits = {
+            chunk_id: (document, metadata, distance)
+            for chunk_id, document, metadata, distance in zip(
+                dense.ids, dense.documents, dense.metadata, dense.distances
+            )
+        }
+
+        results = SearchResults(documents=[], metadata=[], distances=[])
+        for chunk_id in ids:
+            hit = dense_hits.get(chunk_id)
+            if hit is None:
+                indexed = self.lexical_index.get(chunk_id)
+                if indexed is None:
+                    continue
+                hit = (*indexed, None)
+            results.ids.append(chunk_id)
+            results.documents.append(hit[0])
+            results.metadata.append(hit[1])
+            results.distances.append(hit[2])
+        return results
+
     def _resolve_course_name(self, course_name: str) -> Optional[str]:
-        """Use vector search to find best matching course by name"""
+        """Resolve a course name to a catalog title, locally when possible"""
+        return self.title_resolver.resolve(course_name)
+
+    def nearest_course_title(self, course_name: str) -> Optional[Tuple[str, float]]:
+        """Use vector search to find the closest course title and its distance"""
         try:
-            results = self.course_catalog.query(query_texts=[course_name], n_results=1)
+            results = self.course_catalog.query(
+                query_embeddings=[self.embed_query(course_name)], n_results=1
+            )
 
             if results and results.get("documents") and results["documents"][0]:
                 # Return the title (which is now the ID)
-                return results["metadatas"][0][0]["title"]
+                return results["metadatas"][0][0]["title"], results["distances"][0][0]
         except Exception as e:
             print(f"Error resolving course name: {e}")
 
@@ -149,8 +668,7 @@ class VectorStore:
 
     def add_course_metadata(self, course: Course):
         """Add course information to the catalog for semantic search"""
-        import json
-
+        self._check_writable()
         course_text = course.title
 
         # Build lessons metadata and serialize as JSON string
@@ -172,40 +690,179 @@ class VectorStore:
             "lesson_count": len(course.lessons),
         }
 
-        self.course_catalog.add(
+        metadata = {k: v for k, v in course_metadata.items() if v is not None}
+        self.course_catalog.upsert(
             documents=[course_text],
-            metadatas=[{k: v for k, v in course_metadata.items() if v is not None}],
+            metadatas=[metadata],
             ids=[course.title],
+            embeddings=self.embedder([course_text]),
+        )
+        self._index_course(metadata)
+        self.corpus_version += 1
+
+    @staticmethod
+    def chunk_id(chunk: CourseChunk) -> str:
+        """
+        ID under which a chunk is stored in the course_content collection.
+
+        Content-addressed (course plus normalized text), so re-ingesting a
+        course maps unchanged text to the same IDs wherever it moved, and
+        identical text within a course is stored once.
+        """
+        return _chunk_id(chunk.course_title, content_hash(chunk.content))
+
+    def chunk_records(
+        self, chunks: Union[ChunkBatch, Iterable[CourseChunk]]
+    ) -> Tuple[List[str], List[str], List[Dict[str, Any]]]:
+        """
+        IDs, texts and metadata under which chunks are stored in the
+        course_content collection, one per chunk.
+
+        In chunk context mode "metadata" the text of a lesson chunk leaves out
+        the lesson prefix, which its metadata already records. IDs come from
+        the prefixed text (as chunk_id) in either mode.
+        """
+        chunks = ChunkBatch.of(chunks)
+        with_prefix = self.chunk_context == "prefix"
+        documents = chunks.contents(prefix=with_prefix)
+        ids = []
+        metadatas = []
+        for index, document in enumerate(documents):
+            digest = content_hash(document)
+            course_title = chunks.course_titles[index]
+            if with_prefix or not chunks.prefixed[index]:
+                ids.append(_chunk_id(course_title, digest))
+            else:
+                ids.append(_chunk_id(course_title, content_hash(chunks.content(index))))
+            metadata = {
+                "course_title": course_title,
+                "chunk_index": chunks.chunk_indices[index],
+                "content_hash": digest,
+            }
+            lesson_number = chunks.lesson_number(index)
+            if lesson_number is not None:
+                metadata["lesson_number"] = lesson_number
+            metadatas.append(metadata)
+        return ids, documents, metadatas
+
+    def find_embeddings(self, content_hashes: List[str]) -> Dict[str, Any]:
+        """Get stored embeddings by content hash, from chunks of any course"""
+        unique = list(dict.fromkeys(content_hashes))
+        if not unique:
+            return {}
+        results = self.course_content.get(
+            where={"content_hash": {"$in": unique}},
+            include=["metadatas", "embeddings"],
+        )
+        if not results["ids"]:
+            return {}
+        return {
+            metadata["content_hash"]: embedding
+            for metadata, embedding in zip(results["metadatas"], results["embeddings"])
+        }
+
+    def embed_chunks(
+        self, chunks: Union[ChunkBatch, Iterable[CourseChunk]]
+    ) -> Tuple[List, int]:
+        """
+        Embed chunks, computing each distinct text at most once.
+
+        Text already stored (e.g. intro and outro boilerplate shared by many
+        courses) reuses the stored vector, and repeats within the batch share
+        one. Returns the embeddings, one per chunk, and how many chunks were
+        not sent to the model.
+        """
+        documents = ChunkBatch.of(chunks).contents(
+            prefix=self.chunk_context == "prefix"
         )
+        hashes = [content_hash(document) for document in documents]
+        embeddings = self.find_embeddings(hashes)
+        missing: Dict[str, str] = {}
+        for digest, document in zip(hashes, documents):
+            if digest not in embeddings:
+                missing.setdefault(digest, document)
+        if missing:
+            embeddings.update(
+                zip(missing, self.embed_documents(list(missing.values())))
+            )
+        return [embeddings[digest] for digest in hashes], len(documents) - len(missing)
 
-    def add_course_content(self, chunks: List[CourseChunk]):
-        """Add course content chunks to the vector store"""
+    def add_course_content(
+        self,
+        chunks: Union[ChunkBatch, Iterable[CourseChunk]],
+        embeddings: Optional[List] = None,
+    ):
+        """
+        Add or update course content chunks in the vector store.
+
+        Precomputed embeddings (one per chunk, e.g. from embed_chunks) are
+        stored as-is; otherwise the chunks are embedded here. Writes are
+        upserts, so adding the same chunks again is a no-op.
+        """
+        self._check_writable()
+        chunks = ChunkBatch.of(chunks)
         if not chunks:
             return
 
-        documents = [chunk.content for chunk in chunks]
-        metadatas = [
-            {
-                k: v
-                for k, v in {
-                    "course_title": chunk.course_title,
-                    "lesson_number": chunk.lesson_number,
-                    "chunk_index": chunk.chunk_index,
-                }.items()
-                if v is not None
-            }
-            for chunk in chunks
-        ]
-        # Use title with chunk index for unique IDs
-        ids = [
-            f"{chunk.course_title.replace(' ', '_')}_{chunk.chunk_index}"
-            for chunk in chunks
-        ]
+        ids, documents, metadatas = self.chunk_records(chunks)
+        # Repeated text within a course shares an ID: keep the first occurrence
+        first: Dict[str, int] = {}
+        for index, chunk_id in enumerate(ids):
+            first.setdefault(chunk_id, index)
+        if len(first) < len(ids):
+            ids = list(first)
+            documents = [documents[index] for index in first.values()]
+            metadatas = [metadatas[index] for index in first.values()]
+            if embeddings is not None:
+                embeddings = [embeddings[index] for index in first.values()]
+        if embeddings is None:
+            embeddings = self.embed_chunks(chunks.select(first.values()))[0]
+
+        self.course_content.upsert(
+            documents=documents, metadatas=metadatas, ids=ids, embeddings=embeddings
+        )
+        self.lexical_index.add(ids, documents, metadatas)
+        self.corpus_version += 1
+
+    def get_chunks(self, ids: List[str]) -> Dict[str, Tuple[str, Dict[str, Any]]]:
+        """Get stored chunk text and metadata by ID; missing IDs are omitted"""
+        if not ids:
+            return {}
+        results = self.course_content.get(ids=ids, include=["documents", "metadatas"])
+        return {
+            chunk_id: (document, metadata)
+            for chunk_id, document, metadata in zip(
+                results["ids"], results["documents"], results["metadatas"]
+            )
+        }
 
-        self.course_content.add(documents=documents, metadatas=metadatas, ids=ids)
+    def get_course_chunk_ids(self, course_title: str) -> List[str]:
+        """Get the IDs of all content chunks stored for a course"""
+        results = self.course_content.get(
+            where={"course_title": course_title}, include=[]
+        )
+        return results["ids"]
+
+    def delete_course_content(self, ids: List[str]):
+        """Delete content chunks by ID"""
+        self._check_writable()
+        if ids:
+            self.course_content.delete(ids=ids)
+            self.lexical_index.remove(ids)
+            self.corpus_version += 1
+
+    def delete_course(self, course_title: str):
+        """Delete a course's catalog entry and all of its content chunks"""
+        self._check_writable()
+        self.lexical_index.remove(self.get_course_chunk_ids(course_title))
+        self.course_content.delete(where={"course_title": course_title})
+        self.course_catalog.delete(ids=[course_title])
+        self._unindex_course(course_title)
+        self.corpus_version += 1
 
     def clear_all_data(self):
         """Clear all data from both collections"""
+        self._check_writable()
         try:
             self.client.delete_collection("course_catalog")
             self.client.delete_collection("course_content")
@@ -214,82 +871,31 @@ class VectorStore:
             self.course_content = self._create_collection("course_content")
         except Exception as e:
             print(f"Error clearing data: {e}")
+        finally:
+            self._load_catalog_index()
+            self._load_lexical_index()
+            self.corpus_version += 1
 
     def get_existing_course_titles(self) -> List[str]:
-        """Get all existing course titles from the vector store"""
-        try:
-            # Get all documents from the catalog
-            results = self.course_catalog.get()
-            if results and "ids" in results:
-                return results["ids"]
-            return []
-        except Exception as e:
-            print(f"Error getting existing course titles: {e}")
-            return []
+        """Get all existing course titles from the catalog index"""
+        return list(self._catalog)
 
     def get_course_count(self) -> int:
-        """Get the total number of courses in the vector store"""
-        try:
-            results = self.course_catalog.get()
-            if results and "ids" in results:
-                return len(results["ids"])
-            return 0
-        except Exception as e:
-            print(f"Error getting course count: {e}")
-            return 0
+        """Get the total number of courses in the catalog index"""
+        return len(self._catalog)
 
     def get_all_courses_metadata(self) -> List[Dict[str, Any]]:
-        """Get metadata for all courses in the vector store"""
-        import json
-
-        try:
-            results = self.course_catalog.get()
-            if results and "metadatas" in results:
-                # Parse lessons JSON for each course
-                parsed_metadata = []
-                for metadata in results["metadatas"]:
-                    course_meta = metadata.copy()
-                    if "lessons_json" in course_meta:
-                        course_meta["lessons"] = json.loads(course_meta["lessons_json"])
-                        del course_meta[
-                            "lessons_json"
-                        ]  # Remove the JSON string version
-                    parsed_metadata.append(course_meta)
-                return parsed_metadata
-            return []
-        except Exception as e:
-            print(f"Error getting courses metadata: {e}")
-            return []
+        """Get metadata (with parsed lessons) for all courses in the catalog index"""
+        return [
+            {**course_meta, "lessons": list(course_meta["lessons"])}
+            for course_meta in self._catalog.values()
+        ]
 
     def get_course_link(self, course_title: str) -> Optional[str]:
         """Get course link for a given course title"""
-        try:
-            # Get course by ID (title is the ID)
-            results = self.course_catalog.get(ids=[course_title])
-            if results and "metadatas" in results and results["metadatas"]:
-                metadata = results["metadatas"][0]
-                return metadata.get("course_link")
-            return None
-        except Exception as e:
-            print(f"Error getting course link: {e}")
-            return None
+        course_meta = self._catalog.get(course_title)
+        return course_meta.get("course_link") if course_meta else None
 
     def get_lesson_link(self, course_title: str, lesson_number: int) -> Optional[str]:
         """Get lesson link for a given course title and lesson number"""
-        import json
-
-        try:
-            # Get course by ID (title is the ID)
-            results = self.course_catalog.get(ids=[course_title])
-            if results and "metadatas" in results and results["metadatas"]:
-                metadata = results["metadatas"][0]
-                lessons_json = metadata.get("lessons_json")
-                if lessons_json:
-                    lessons = json.loads(lessons_json)
-                    # Find the lesson with matching number
-                    for lesson in lessons:
-                        if lesson.get("lesson_number") == lesson_number:
-                            return lesson.get("lesson_link")
-            return None
-        except Exception as e:
-            print(f"Error getting lesson link: {e}")
+        return self._lesson_links.get((course_title, lesson_number))
@@ -81,7 +81,7 @@ async function sendMessage() {
     chatMessages.scrollTop = chatMessages.scrollHeight;
 
     try {
-        const response = await fetch(`${API_URL}/query`, {
+        const response = await fetch(`${API_URL}/query/stream`, {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
@@ -92,18 +92,38 @@ async function sendMessage() {
             })
         });
 
-        if (!response.ok) throw new Error('Query failed');
+        if (!response.ok || !response.body) throw new Error('Query failed');
 
-        const data = await response.json();
-        
-        // Update session ID if new
-        if (!currentSessionId) {
-            currentSessionId = data.session_id;
-        }
+        let answer = '';
+        let sources = null;
+        let messageDiv = null;
 
-        // Replace loading message with response
-        loadingMessage.remove();
-        addMessage(data.answer, 'assistant', data.sources);
+        await readEventStream(response, (event, data) => {
+            if (event === 'session') {
+                // Update session ID if new
+                if (!currentSessionId) {
+                    currentSessionId = data.session_id;
+                }
+            } else if (event === 'token') {
+                // Replace loading message with the answer on the first token
+                if (!messageDiv) {
+                    loadingMessage.remove();
+                    messageDiv = createAssistantMessage();
+                }
+                answer += data.text;
+                renderAssistantMessage(messageDiv, answer, sources);
+            } else if (event === 'sources') {
+                sources = data;
+            } else if (event === 'error') {
+                throw new Error(data.detail || 'Query failed');
+            }
+        });
+
+        if (!messageDiv) {
+            loadingMessage.remove();
+            messageDiv = createAssistantMessage();
+        }
+        renderAssistantMessage(messageDiv, answer, sources);
 
     } catch (error) {
         // Replace loading message with error
@@ -116,6 +136,49 @@ async function sendMessage() {
     }
 }
 
+// Read a Server-Sent Events response body, calling onEvent(event, data) per frame
+async function readEventStream(response, onEvent) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const frame = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+
+            let event = 'message';
+            let data = '';
+            frame.split('\n').forEach(line => {
+                if (line.startsWith('event:')) {
+                    event = line.slice(6).trim();
+                } else if (line.startsWith('data:')) {
+                    data += line.slice(5).trim();
+                }
+            });
+            if (data) onEvent(event, JSON.parse(data));
+        }
+    }
+}
+
+function createAssistantMessage() {
+    const messageDiv = document.createElement('div');
+    messageDiv.className = 'message assistant';
+    messageDiv.id = `message-${Date.now()}`;
+    chatMessages.appendChild(messageDiv);
+    return messageDiv;
+}
+
+function renderAssistantMessage(messageDiv, content, sources) {
+    messageDiv.innerHTML = `<div class="message-content">${marked.parse(content)}</div>` + buildSourcesHtml(sources);
+    chatMessages.scrollTop = chatMessages.scrollHeight;
+}
+
 function createLoadingMessage() {
     const messageDiv = document.createElement('div');
     messageDiv.className = 'message assistant';
@@ -141,23 +204,7 @@ function addMessage(content, type, sources = null, isWelcome = false) {
     const displayContent = type === 'assistant' ? marked.parse(content) : escapeHtml(content);
     
     let html = `<div class="message-content">${displayContent}</div>`;
-    
-    if (sources && sources.length > 0) {
-        const sourcesHtml = sources.map(source => {
-            if (source.link) {
-                return `<a href="${source.link}" target="_blank">${escapeHtml(source.text)}</a>`;
-            } else {
-                return escapeHtml(source.text);
-            }
-        }).join(', ');
-
-        html += `
-            <details class="sources-collapsible">
-                <summary class="sources-header">Sources</summary>
-                <div class="sources-content">${sourcesHtml}</div>
-            </details>
-        `;
-    }
+    html += buildSourcesHtml(sources);
     
     messageDiv.innerHTML = html;
     chatMessages.appendChild(messageDiv);
@@ -166,6 +213,25 @@ function addMessage(content, type, sources = null, isWelcome = false) {
     return messageId;
 }
 
+function buildSourcesHtml(sources) {
+    if (!sources || sources.length === 0) return '';
+
+    const sourcesHtml = sources.map(source => {
+        if (source.link) {
+            return `<a href="${source.link}" target="_blank">${escapeHtml(source.text)}</a>`;
+        } else {
+            return escapeHtml(source.text);
+        }
+    }).join(', ');
+
+    return `
+        <details class="sources-collapsible">
+            <summary class="sources-header">Sources</summary>
+            <div class="sources-content">${sourcesHtml}</div>
+        </details>
+    `;
+}
+
 // Helper function to escape HTML for user messages
 function escapeHtml(text) {
     const div = document.createElement('div');